@@ -1,13 +1,36 @@
 # coding=utf-8
 """ Contains all DCR activity classes and their definitions"""
 
+import sys
+import weakref
 from abc import ABC
-from ssl import ALERT_DESCRIPTION_BAD_CERTIFICATE_STATUS_RESPONSE
+
+# The ancestors of activities that are not nested.
+NO_ANCESTORS = frozenset()
+
+# Role sets in use. Activities with the same roles share one frozenset, in choreographies and all their projections.
+# A set is only kept while something uses it, so the table doesn't grow with every graph a long running process has read.
+ROLE_SETS = weakref.WeakValueDictionary()
+
+def intern_roles(roles):
+    """ #own
+    Get the shared frozenset of roles. The role strings are interned as well.
+    :param roles: Iterable of role strings.
+    :return: frozenset
+    """
+    roles = frozenset(sys.intern(r) for r in roles)
+    shared = ROLE_SETS.get(roles)
+    if shared is None:
+        # The key is a copy, as a key that is the set itself would keep it alive.
+        ROLE_SETS[frozenset(tuple(roles))] = shared = roles
+    return shared
 
 class DCRActivityBase(ABC):
     """ # modified, added methods and datatypes, recursive nesting...
     The base class for all DCR activities
     """
+    # Slots instead of a __dict__ per activity, as projections copy every relevant activity for every actor.
+    __slots__ = ('ActivityId', 'ActivityName', 'Roles', 'Parent', 'isNest', 'Ancestors', 'Successors')
 
     def str_name(self):
         """ #own """
@@ -26,53 +49,122 @@ class DCRActivityBase(ABC):
 
         self.ActivityId = activity_id
         self.ActivityName = activity_name
-        self.Roles = set()
+        self.Roles = intern_roles(())
         self.Parent = None
 
+        #own
+        # Cached frozensets of ancestors, and for nests of successors. None when they must be computed again.
+        # Activities with the same parent share the frozenset of ancestors.
+        self.Ancestors = None
+        self.Successors = None
+
         #own
         self.isNest = False
 
     def set_roles(self, roles: list):
-        """
+        """ #modified to keep roles in a shared frozenset.
         Sets the roles for the activity
         :param roles: roles that are set for the activity
         """
-        for role in roles:
-            self.Roles.add(role)
+        self.Roles = intern_roles(self.Roles.union(roles))
 
     #own moved this from DCRActivity, for recursive nesting.
     def set_parent_activity(self, parent):
-        """
+        """ #modified to invalidate the cached ancestors and successors.
         Set the parent nesting activity that contains this activity
         :param parent: DCRActivityNest
         """
+        if self.Parent is not None:
+            self.Parent.invalidate_successors()
         self.Parent = parent
+        if parent is not None:
+            parent.invalidate_successors()
+        self.invalidate_ancestors()
 
-    def get_ancestors(self):
+    def invalidate_ancestors(self):
+        """ #own
+        Drop the cached ancestors of this activity, and of all activities nested under it.
+        """
+        todo = [self]
+        while todo:
+            n = todo.pop()
+            n.Ancestors = None
+            if n.isNest:
+                n.ChildAncestors = None
+                todo.extend(n.Activities)
+
+    def invalidate_successors(self):
+        """ #own
+        Drop the cached successors of this activity, and of all its ancestors.
+        """
+        n = self
+        while n is not None:
+            n.Successors = None
+            n = n.Parent
+
+    def clear_nesting_cache(self):
         """ #own
+        Drop the cached ancestors and successors of only this activity. For changing the nesting of many activities,
+        when the caches of all of them are dropped afterwards.
+        """
+        self.Ancestors = None
+        self.Successors = None
+        if self.isNest:
+            self.ChildAncestors = None
+
+    def get_ancestors(self):
+        """ #modified to cache the ancestors.
         Get parent nests, parents of parents aso.
+        :return: frozenset. It is cached, until the nesting of the activity changes.
         """
-        if self.Parent is None:
-            return set()
-        else:
-            return self.Parent.get_ancestors().union({self.Parent})
+        if self.Ancestors is None:
+            # Fill the caches from the top-most ancestor without a cache and down.
+            chain = []
+            n = self
+            while n is not None and n.Ancestors is None:
+                chain.append(n)
+                n = n.Parent
+            for n in reversed(chain):
+                p = n.Parent
+                if p is None:
+                    n.Ancestors = NO_ANCESTORS
+                else:
+                    if p.ChildAncestors is None:
+                        p.ChildAncestors = p.Ancestors.union({p})
+                    n.Ancestors = p.ChildAncestors
+        return self.Ancestors
+
+    def has_ancestor(self, node):
+        """ #own
+        Checks if node is a parent nest, parent of a parent aso. of this activity.
+        :param node: The node.
+        :return: Bool.
+        """
+        return node in self.get_ancestors()
 
     def get_successors(self):
-        """ #own
+        """ #modified to cache the successors, and to not change Activities.
         Get child nodes, children of children aso.
+        :return: frozenset. It is cached, until the nesting under the activity changes.
         """
         if not self.isNest:
-            return set()
-        else:
-            children = self.Activities # Allowed, because we know it's a nest.
-            for child in children:
-                children.update(child.get_successors())
-            return children
+            return frozenset()
+        if self.Successors is None:
+            ret = set()
+            todo = list(self.Activities) # Allowed, because we know it's a nest.
+            while todo:
+                n = todo.pop()
+                ret.add(n)
+                if n.isNest:
+                    todo.extend(n.Activities)
+            self.Successors = frozenset(ret)
+        return self.Successors
 
 class DCRActivity(DCRActivityBase):
     """ #modified, added data type
     A default DCRActivity
     """
+    __slots__ = ('datatype',)
 
     def __init__(self, activity_id, activity_name):
         """
@@ -96,30 +188,31 @@ class DCRInteractionActivity(DCRActivity):
     """ #own
     An InteractionActivity that has an initiator and one or more receivers.
     """
+    __slots__ = ('receivers', 'initiator')
 
     def __init__(self, activity_id=str, activity_name=str, initiator = None, receivers = None):
 
         super().__init__(activity_id, activity_name)
 
-        self.receivers = receivers
-        self.initiator = initiator
+        self.set_initiator_and_receivers(initiator, receivers)
 
     def set_initiator_and_receivers(self, initiator, receivers: []):
         """
         Sets the initiator and receiver(s) of the activity.
         :param initiator: The initiator
-        :param receivers: The receiver(s)
+        :param receivers: The receiver(s). Kept as a shared frozenset.
         """
-        self.initiator = initiator
-        self.receivers = receivers
+        self.initiator = sys.intern(initiator) if initiator is not None else None
+        self.receivers = intern_roles(receivers) if receivers is not None else None
 
     def get_initiator_and_receivers(self):
-        return self.senders.union({self.initiator})
+        return self.receivers.union({self.initiator})
 
 class DCREndpointActivity(DCRInteractionActivity):
     """ #own
     An End-point activity, that has initiator and receiver and is either input or output.
     """
+    __slots__ = ('is_output',)
 
     def __init__(self,activity_id, activity_name, initiator, receivers, is_output):
         super().__init__(activity_id,activity_name,initiator,receivers)
@@ -140,6 +233,7 @@ class DCRActivityNest(DCRActivityBase):
     """ # own
     Representation of Nesting activity of DCR graphs
     """
+    __slots__ = ('Activities', 'ChildAncestors')
 
     def __init__(self, activity_id=str, activity_name=str, activities=None):
         """
@@ -151,6 +245,10 @@ class DCRActivityNest(DCRActivityBase):
 
         super().__init__(activity_id, activity_name)
 
+        #own
+        # Cached frozenset of the ancestors of the children: the ancestors of the nest, and the nest.
+        self.ChildAncestors = None
+
         activities = activities
 
         if activities is None:
@@ -165,5 +263,18 @@ class DCRActivityNest(DCRActivityBase):
         # Set self as Parent in all activities.
 
     def add_child_activity(self, activity):
+        """ #modified to invalidate the cached successors.
+        Nest activity under this nest.
+        :param activity: The activity.
+        """
         activity.set_parent_activity(self)
         self.Activities.add(activity)
+        self.invalidate_successors()
+
+    def remove_child_activity(self, activity):
+        """ #own
+        Remove activity from the children of this nest. The Parent of activity is not changed.
+        :param activity: The activity.
+        """
+        self.Activities.discard(activity)
+        self.invalidate_successors()
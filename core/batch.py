@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+This module contains the batch mode, which compiles every choreography in a folder, or matching a glob,
+in one process start. Choreographies are spread over a pool of worker processes, and each one is written to its own subfolder.
+"""
+import glob
+import os
+import time
+import xml.etree.ElementTree as Etree
+from concurrent.futures import ProcessPoolExecutor
+
+import cmd_parser
+from graph import DCRChoreography
+from jolie_templates import get_backend
+from writer import JolieFileWriter
+
+def find_choreographies(pattern):
+    """ #own
+    Find the choreographies to compile.
+    :param pattern: A folder, in which all .xml files are found, also in subfolders, or a glob.
+    :return: [path], sorted.
+    """
+    if os.path.isdir(pattern):
+        return sorted(glob.glob(os.path.join(pattern, "**", "*.xml"), recursive=True))
+    return sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+
+def get_output_folders(xml_paths, output_root):
+    """ #own
+    Get the output subfolder of every choreography: its path without extension, relative to the folder they are all in.
+    :param xml_paths: [path]
+    :param output_root: The folder the subfolders are made in.
+    :return: [path], in the same order.
+    """
+    if not xml_paths:
+        return []
+    common = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in xml_paths])
+    return [os.path.join(output_root, os.path.splitext(os.path.relpath(os.path.abspath(p), common))[0]) for p in xml_paths]
+
+def compile_choreography(xml_path, output_folder, backend_name = None):
+    """ #own
+    Parse a choreography, project it for every actor, and write the Jolie files of the projections to output_folder.
+    Runs in the main process, or in a worker process when --jobs is used.
+    :param xml_path: The path of the choreography.
+    :param output_folder: The folder to write the files to.
+    :param backend_name: Name of the JolieBackend to generate with. Default is http.
+    :return: Dict with the status, the number of actors and files, the error, if any, and the seconds spent in every phase.
+    """
+    result = {'xml': xml_path, 'output': output_folder, 'status': 'generated', 'actors': 0, 'files': 0, 'error': None,
+              'seconds': {'parse': 0.0, 'project': 0.0, 'generate': 0.0, 'write': 0.0}}
+    try:
+        compile_phases(xml_path, output_folder, backend_name, result)
+    except Exception as e:
+        # Any other error is kept with the file, so that it does not stop the batch, and the other results are shown.
+        result.update(status='failed', error=type(e).__name__ + ": " + str(e))
+    return result
+
+def compile_phases(xml_path, output_folder, backend_name, result):
+    """ #own
+    The phases of compile_choreography.
+    :param xml_path: The path of the choreography.
+    :param output_folder: The folder to write the files to.
+    :param backend_name: Name of the JolieBackend to generate with, or None for http.
+    :param result: The result of compile_choreography, which is updated.
+    """
+    seconds = result['seconds']
+
+    start = time.perf_counter()
+    try:
+        choreography = DCRChoreography().from_xml(xml_path)
+    except (ValueError, OSError, Etree.ParseError) as e:
+        result.update(status='unreadable', error=str(e))
+        return
+    finally:
+        seconds['parse'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    violations = choreography.get_projectability_violations()
+    if violations:
+        seconds['project'] = time.perf_counter() - start
+        result.update(status='not projectable', error="{} dependencies, e.g. {}".format(len(violations), violations[0]))
+        return
+
+    actors = sorted(choreography.get_roles())
+    if not actors:
+        # e.g. an XML file that is not a DCR graph.
+        seconds['project'] = time.perf_counter() - start
+        result.update(status='no actors', error="The graph has no roles.")
+        return
+    views = [choreography.project_view_for_actor(a) for a in actors]
+    seconds['project'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backend = get_backend(backend_name)
+    writer = JolieFileWriter()
+    for view in views:
+        for fname, fcontents in view.gen_jolie_files(backend).items():
+            writer.add(os.path.join(output_folder, os.path.basename(fname)), fcontents)
+    seconds['generate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        os.makedirs(output_folder, exist_ok=True)
+        written, error = writer.flush()
+    except OSError as e:
+        written, error = {}, e
+    seconds['write'] = time.perf_counter() - start
+
+    result.update(actors=len(actors), files=len(written))
+    if error is not None:
+        result.update(status='not written', error=str(error))
+
+def compile_batch(xml_paths, output_root, jobs = 1, backend_name = None):
+    """ #own
+    Compile choreographies, each into its own subfolder of output_root.
+    :param xml_paths: [path]
+    :param output_root: The folder the subfolders are made in.
+    :param jobs: Number of worker processes.
+    :param backend_name: Name of the JolieBackend to generate with. Default is http.
+    :return: [dict] as returned by compile_choreography, in the same order as xml_paths.
+    """
+    output_folders = get_output_folders(xml_paths, output_root)
+    if jobs == 1 or len(xml_paths) <= 1:
+        return [compile_choreography(p, o, backend_name) for p, o in zip(xml_paths, output_folders)]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(xml_paths))) as executor:
+        return list(executor.map(compile_choreography, xml_paths, output_folders, [backend_name]*len(xml_paths)))
+
+def print_summary(results, seconds = None):
+    """ #own
+    Print a table with the status and timing of every choreography.
+    :param results: [dict] as returned by compile_choreography.
+    :param seconds: The wall clock time of the whole batch, if known.
+    """
+    header = ["File", "Status", "Actors", "Files", "Parse", "Project", "Generate", "Write", "Total"]
+    rows = []
+    for r in results:
+        s = r['seconds']
+        rows.append([r['xml'], r['status'], str(r['actors']), str(r['files'])] +
+                    ["{:.3f}".format(t) for t in [s['parse'], s['project'], s['generate'], s['write'], sum(s.values())]])
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    # The file and the status are left aligned, numbers right aligned.
+    line = lambda row: "  ".join(c.ljust(w) if i < 2 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths))).rstrip()
+    print(line(header))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print(line(row))
+
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    print("{} choreographies: {}{}".format(len(results), ", ".join("{} {}".format(n, status) for status, n in sorted(counts.items())),
+                                           "" if seconds is None else ", in {:.3f} s".format(seconds)))
+    for r in results:
+        if r['error'] is not None:
+            print("  {}: {}".format(r['xml'], r['error']))
+
+def main():
+    """ #own """
+    xml_paths = find_choreographies(pattern)
+    if not xml_paths:
+        print("No choreographies found for " + pattern + ".")
+        return
+
+    start = time.perf_counter()
+    results = compile_batch(xml_paths, output_root, jobs, backend_name)
+    print_summary(results, time.perf_counter() - start)
+    print("Interface files can be found in the folder '" + output_root + "', in a subfolder for every choreography.")
+
+if __name__ == '__main__':
+    # input parameters
+    args = cmd_parser.parse_batch_args()
+    pattern = args.input
+    output_root = args.output
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    backend_name = args.backend
+    main()
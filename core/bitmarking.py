@@ -0,0 +1,294 @@
+# coding=utf-8
+"""
+The module implements a Marking of a DCR Graph as integer bit masks.
+Every node of the graph gets a dense position, and the relations of every node are compiled to masks once,
+so checking if an event is enabled, and executing it, are a few integer operations.
+"""
+from conn import Condition, Milestone, Include, Exclude, Response, CoResponse
+
+class DCRMarkingIndex(object):
+    """ #own
+    Dense integer positions of the nodes of a graph, and the relations of every node compiled to bit masks.
+    Nesting is flattened: a relation from or to a nest is a relation from or to every node nested under it,
+    and a node has the relations of all its ancestors. Only non-nest nodes can block an event, or be executed.
+    Expressions on connections are not evaluated.
+    """
+
+    def __init__(self, graph):
+        """
+        Constructor for the index.
+        :param graph: The DCRGraph, or any subclass of it.
+        """
+        self.Nodes = sorted(graph.Nodes, key=lambda n: n.ActivityId)
+        self.Positions = {n: i for i, n in enumerate(self.Nodes)}
+
+        # The node and all nodes under it.
+        self.Below = {}
+        # The non-nest nodes under a node, or the node itself if it is not a nest.
+        self.LeavesBelow = {}
+        # Deepest nodes first, so the masks of children are there before their nest.
+        for n in sorted(self.Nodes, key=self.get_depth, reverse=True):
+            below = self.bit(n)
+            leaves = 0 if n.isNest else below
+            if n.isNest:
+                for child in n.Activities:
+                    if child in self.Positions:
+                        below |= self.Below[child]
+                        leaves |= self.LeavesBelow[child]
+            self.Below[n] = below
+            self.LeavesBelow[n] = leaves
+        self.LeafMask = 0
+        for n in self.Nodes:
+            if not n.isNest:
+                self.LeafMask |= self.bit(n)
+
+        # node -> mask of nodes that must be executed (if included) / must not be pending (if included) for node to be enabled.
+        self.ConditionMask = {}
+        self.MilestoneMask = {}
+        # node -> mask of nodes that are included / excluded / made pending / no longer pending when node is executed.
+        self.IncludeMask = {}
+        self.ExcludeMask = {}
+        self.ResponseMask = {}
+        self.CoResponseMask = {}
+
+        for n in self.Nodes:
+            masks = {Condition: 0, Milestone: 0}
+            for c in graph.get_in_connections(n, ctypes = [Condition, Milestone]):
+                if c.StartNode in self.Positions:
+                    masks[type(c)] |= self.LeavesBelow[c.StartNode]
+            self.ConditionMask[n] = masks[Condition]
+            self.MilestoneMask[n] = masks[Milestone]
+
+            masks = {Include: 0, Exclude: 0, Response: 0, CoResponse: 0}
+            for c in graph.get_out_connections(n, ctypes = [Include, Exclude, Response, CoResponse]):
+                if c.EndNode in self.Positions:
+                    masks[type(c)] |= self.Below[c.EndNode]
+            self.IncludeMask[n] = masks[Include]
+            self.ExcludeMask[n] = masks[Exclude]
+            self.ResponseMask[n] = masks[Response]
+            self.CoResponseMask[n] = masks[CoResponse]
+
+    @staticmethod
+    def get_depth(node):
+        """
+        Get the number of ancestors of a node.
+        :param node: The node.
+        :return: int
+        """
+        depth = 0
+        while node.Parent is not None:
+            node = node.Parent
+            depth += 1
+        return depth
+
+    def bit(self, node):
+        """
+        Get the bit of a node.
+        :param node: The node.
+        :return: int with only the bit of node set.
+        """
+        return 1 << self.Positions[node]
+
+    def mask(self, nodes):
+        """
+        Get the mask of a set of nodes.
+        :param nodes: The nodes. Nodes that are not in the graph are ignored.
+        :return: int
+        """
+        ret = 0
+        for n in nodes:
+            if n in self.Positions:
+                ret |= self.bit(n)
+        return ret
+
+    def nodes(self, mask):
+        """
+        Get the nodes of a mask.
+        :param mask: int
+        :return: Set of nodes.
+        """
+        ret = set()
+        while mask:
+            low = mask & -mask
+            ret.add(self.Nodes[low.bit_length() - 1])
+            mask ^= low
+        return ret
+
+class BitMarking(object):
+    """ #own
+    A marking of a graph, where Included, PendingResponse and Executed are bit masks over the positions of a DCRMarkingIndex.
+    """
+
+    def __init__(self, index, included = 0, pending_response = 0, executed = 0):
+        """
+        Constructor for a marking.
+        :param index: The DCRMarkingIndex of the graph.
+        :param included: Mask of included nodes.
+        :param pending_response: Mask of pending nodes.
+        :param executed: Mask of executed nodes.
+        """
+        self.index = index
+        self.Included = included
+        self.PendingResponse = pending_response
+        self.Executed = executed
+
+    @classmethod
+    def from_graph(cls, graph, index = None):
+        """
+        Make the initial marking of a graph.
+        :param graph: The graph.
+        :param index: DCRMarkingIndex of graph. Made if not given.
+        :return: BitMarking
+        """
+        index = index if index is not None else DCRMarkingIndex(graph)
+        return cls(index, index.mask(graph.InitialIncluded), index.mask(graph.InitialPending), index.mask(graph.InitialExecuted))
+
+    def copy(self):
+        """
+        Copy the marking. The index is shared.
+        :return: BitMarking
+        """
+        return BitMarking(self.index, self.Included, self.PendingResponse, self.Executed)
+
+    def freeze(self):
+        """
+        Get an immutable copy of the marking.
+        :return: FrozenBitMarking
+        """
+        return FrozenBitMarking(self.index, self.Included, self.PendingResponse, self.Executed)
+
+    def __eq__(self, other):
+        return isinstance(other, BitMarking) and self.index is other.index and \
+            (self.Included, self.PendingResponse, self.Executed) == (other.Included, other.PendingResponse, other.Executed)
+
+    def __hash__(self):
+        return hash((self.Included, self.PendingResponse, self.Executed))
+
+    def is_included(self, node):
+        """
+        Checks if node is included.
+        :param node: The node.
+        :return: Bool.
+        """
+        return self.Included & self.index.bit(node) != 0
+
+    def is_pending(self, node):
+        """
+        Checks if node is pending.
+        :param node: The node.
+        :return: Bool.
+        """
+        return self.PendingResponse & self.index.bit(node) != 0
+
+    def is_executed(self, node):
+        """
+        Checks if node has been executed.
+        :param node: The node.
+        :return: Bool.
+        """
+        return self.Executed & self.index.bit(node) != 0
+
+    def get_blocking(self, node):
+        """
+        Get the mask of included nodes that block node, through a condition or a milestone.
+        :param node: The node.
+        :return: int. 0 if node is not blocked.
+        """
+        index = self.index
+        return (index.ConditionMask[node] & self.Included & ~self.Executed) | \
+               (index.MilestoneMask[node] & self.Included & self.PendingResponse)
+
+    def is_enabled(self, node):
+        """
+        Checks if node can be executed: it is an included non-nest node, and not blocked.
+        :param node: The node.
+        :return: Bool.
+        """
+        return not node.isNest and self.is_included(node) and self.get_blocking(node) == 0
+
+    def perform_transition_node(self, node):
+        """
+        Execute node, whether it is enabled or not.
+        Exclusions are applied before inclusions, and cancelled responses before new responses.
+        :param node: The node.
+        """
+        index = self.index
+        bit = index.bit(node)
+        self.Executed |= bit
+        self.Included = (self.Included & ~index.ExcludeMask[node]) | index.IncludeMask[node]
+        self.PendingResponse = (self.PendingResponse & ~bit & ~index.CoResponseMask[node]) | index.ResponseMask[node]
+
+    def execute(self, node):
+        """
+        Get the marking after executing node, whether it is enabled or not. The marking itself is not changed.
+        :param node: The node.
+        :return: BitMarking
+        """
+        ret = self.copy()
+        ret.perform_transition_node(node)
+        return ret
+
+    def is_accepting(self):
+        """
+        Checks if no included non-nest node is pending.
+        :return: Bool.
+        """
+        return self.Included & self.PendingResponse & self.index.LeafMask == 0
+
+class FrozenBitMarking(BitMarking):
+    """ #own
+    An immutable marking. The masks are ints, so markings made from each other share them until they change,
+    and forking a marking is free. The hash is computed once, so markings can be kept in sets and dicts cheaply.
+    """
+    def __init__(self, index, included = 0, pending_response = 0, executed = 0):
+        object.__setattr__(self, 'index', index)
+        object.__setattr__(self, 'Included', included)
+        object.__setattr__(self, 'PendingResponse', pending_response)
+        object.__setattr__(self, 'Executed', executed)
+        object.__setattr__(self, 'Hash', hash((included, pending_response, executed)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenBitMarking is immutable")
+
+    def __eq__(self, other):
+        return isinstance(other, BitMarking) and self.__hash__() == other.__hash__() and BitMarking.__eq__(self, other)
+
+    def __hash__(self):
+        return self.Hash
+
+    def __reduce__(self):
+        return FrozenBitMarking, (self.index, self.Included, self.PendingResponse, self.Executed)
+
+    def copy(self):
+        """
+        Forking an immutable marking is free: it is its own copy.
+        :return: self
+        """
+        return self
+
+    def freeze(self):
+        return self
+
+    def thaw(self):
+        """
+        Get a mutable copy of the marking.
+        :return: BitMarking
+        """
+        return BitMarking(self.index, self.Included, self.PendingResponse, self.Executed)
+
+    def perform_transition_node(self, node):
+        raise AttributeError("FrozenBitMarking is immutable, use execute")
+
+    def execute(self, node):
+        """
+        Get the marking after executing node, whether it is enabled or not.
+        Exclusions are applied before inclusions, and cancelled responses before new responses.
+        :param node: The node.
+        :return: FrozenBitMarking
+        """
+        index = self.index
+        bit = index.bit(node)
+        return FrozenBitMarking(index,
+                                (self.Included & ~index.ExcludeMask[node]) | index.IncludeMask[node],
+                                (self.PendingResponse & ~bit & ~index.CoResponseMask[node]) | index.ResponseMask[node],
+                                self.Executed | bit)
@@ -0,0 +1,29 @@
+# coding=utf-8
+"""
+This module contains the description of a change to a DCR choreography, used for incremental projection.
+"""
+
+class DCRChoreographyChange(object):
+    """ #own
+    A change to a choreography: events and connections that are added or removed, and changes to the initial marking.
+    """
+
+    def __init__(self, added_events = (), removed_events = (), added_connections = (), removed_connections = (),
+                 marking = None, users = (), services = ()):
+        """
+        Constructor for a change.
+        :param added_events: New activities. If an activity has a Parent, it is added as a child of that nest.
+        :param removed_events: Activities of the choreography to remove. Their connections are removed as well.
+        :param added_connections: New connections between activities of the choreography (or added activities).
+        :param removed_connections: Connections of the choreography to remove.
+        :param marking: Dict from activity to a tuple (included, pending, executed) with its new initial marking.
+        :param users: Roles that are classified as Users.
+        :param services: Roles that are classified as Services.
+        """
+        self.AddedEvents = list(added_events)
+        self.RemovedEvents = list(removed_events)
+        self.AddedConnections = list(added_connections)
+        self.RemovedConnections = list(removed_connections)
+        self.Marking = dict(marking) if marking is not None else {}
+        self.Users = set(users)
+        self.Services = set(services)
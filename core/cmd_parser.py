@@ -2,15 +2,120 @@
 """Contains methods for command line interaction"""
 import argparse
 
+from jolie_templates import BACKENDS
+
 def parse_args():
     """ #modified
     Creates the argument parser for the command line
     :return: the args that were parsed from the command line
     """
 
-    parser = argparse.ArgumentParser(prog='epp_dcr.py', usage='epp_dcr.py [--xml file]')
+    parser = argparse.ArgumentParser(prog='epp_dcr.py', usage='epp_dcr.py [--xml file] [--jobs N] [--io-threads N] [--backend name] [--no-snapshot] [--no-cache] [--diagnostics file] [--profile file] [--cprofile file] [--serve [--socket path | --port N] [--cache-size N]]')
 
     parser.add_argument('--xml', nargs="?", default='input/House_for_sale.xml',
                         help='The input path for the DCR Graph xml')
 
-    return parser.parse_args()
\ No newline at end of file
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Number of processes used to project and generate actors. 0 uses one process per CPU')
+
+    parser.add_argument('--io-threads', type=int, default=8,
+                        help='Number of threads used to write the Jolie files')
+
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='http',
+                        help='Protocol of the generated ports, and execution of services. The -concurrent backends make services concurrent')
+
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help='Always parse the xml, instead of loading the binary snapshot next to it (file.dcrs) when it is newer')
+
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Generate all Jolie files, also for projections that are unchanged since the last run')
+
+    parser.add_argument('--diagnostics', default=None,
+                        help='Write every dependency that makes the graph not projectable to this file as json (- for the console), and only generate if there are none')
+
+    parser.add_argument('--profile', default=None,
+                        help='Write the time of every phase and actor, call counts and peak memory to this file as json (- for the console). Runs in one process')
+
+    parser.add_argument('--cprofile', default=None,
+                        help='Write cProfile statistics of the run to this file. Runs in one process')
+
+    parser.add_argument('--serve', action='store_true',
+                        help='Stay resident, and answer JSON-RPC requests to project and generate files, one per line, on stdin and stdout')
+
+    parser.add_argument('--socket', default=None,
+                        help='With --serve, listen on this unix domain socket instead of stdin')
+
+    parser.add_argument('--port', type=int, default=None,
+                        help='With --serve, listen on this TCP port on localhost instead of stdin')
+
+    parser.add_argument('--cache-size', type=int, default=16,
+                        help='With --serve, the number of parsed choreographies to keep')
+
+    return parser.parse_args()
+
+def parse_conformance_args():
+    """ #own
+    Creates the argument parser for the command line of the conformance checker
+    :return: the args that were parsed from the command line
+    """
+
+    parser = argparse.ArgumentParser(prog='conformance.py', usage='conformance.py --log file [--xml file] [--projections] [--jobs N] [--json file]')
+
+    parser.add_argument('--xml', nargs="?", default='input/House_for_sale.xml',
+                        help='The input path for the DCR Graph xml')
+
+    parser.add_argument('--log', required=True,
+                        help='The event log to check, as .xes or .csv (columns case, activity and role)')
+
+    parser.add_argument('--projections', action='store_true',
+                        help='Also check the log against the projection for every actor')
+
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Number of processes used to replay traces. 0 uses one process per CPU')
+
+    parser.add_argument('--json', default=None,
+                        help='Also write the violation statistics to this file, as json')
+
+    return parser.parse_args()
+
+
+def parse_explorer_args():
+    """ #own
+    Creates the argument parser for the command line of the state space explorer
+    :return: the args that were parsed from the command line
+    """
+
+    parser = argparse.ArgumentParser(prog='explorer.py', usage='explorer.py [--xml file] [--projections] [--max-states N]')
+
+    parser.add_argument('--xml', nargs="?", default='input/House_for_sale.xml',
+                        help='The input path for the DCR Graph xml')
+
+    parser.add_argument('--projections', action='store_true',
+                        help='Also explore the projection for every actor')
+
+    parser.add_argument('--max-states', type=int, default=1000000,
+                        help='Stop exploring a graph after this many markings. 0 for no limit')
+
+    return parser.parse_args()
+
+def parse_batch_args():
+    """ #own
+    Creates the argument parser for the command line of the batch mode
+    :return: the args that were parsed from the command line
+    """
+
+    parser = argparse.ArgumentParser(prog='batch.py', usage='batch.py --input folder|glob [--output folder] [--jobs N] [--backend name]')
+
+    parser.add_argument('--input', required=True,
+                        help='A folder, in which every .xml file is compiled, also in subfolders, or a glob such as "input/*.xml"')
+
+    parser.add_argument('--output', default='output',
+                        help='The folder where every choreography gets a subfolder for its Jolie files')
+
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Number of processes used to compile choreographies. 0 uses one process per CPU')
+
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='http',
+                        help='Protocol of the generated ports, and execution of services. The -concurrent backends make services concurrent')
+
+    return parser.parse_args()
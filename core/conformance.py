@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+This module contains the batch conformance checker, which replays the traces of an event log on a DCR graph,
+e.g. a choreography or its projections, and collects statistics of the violations.
+"""
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import cmd_parser
+from bitmarking import DCRMarkingIndex, BitMarking
+from conn import Condition, Milestone
+from eventlog import read_event_log
+from graph import DCRChoreography
+
+# Number of traces that are sent to a worker process at a time.
+CHUNK_SIZE = 1000
+
+class DCRTraceData(object):
+    """ #own
+    The violations found while replaying one trace.
+    The add_violating_ methods are the ones Marking reports its violations with.
+    """
+
+    def __init__(self, trace_id = None):
+        """
+        Constructor for the trace data.
+        :param trace_id: Id of the trace in the log.
+        """
+        self.TraceId = trace_id
+        # Names of activities that were executed while excluded or blocked.
+        self.Activities = []
+        # Conditions and milestones that blocked an executed activity, e.g. 'condition-Publish-Offer'.
+        self.Connections = []
+        # (role, expected role) for activities executed by the wrong role.
+        self.Roles = []
+        # Names of nests that were executed.
+        self.Nests = []
+        # Names of activities that were still pending at the end of the trace.
+        self.Pending = []
+        # Labels of events with no activity in the graph.
+        self.Unknown = []
+        # Roles that executed an event with a violation. None if the log has no role.
+        self.EventRoles = []
+
+    def add_violating_activity(self, name):
+        self.Activities.append(name)
+
+    def add_violating_connection(self, relation):
+        self.Connections.append(relation)
+
+    def add_violating_role(self, role, expected_role):
+        self.Roles.append((role, expected_role))
+
+    def add_violating_nesting_activity_occurred(self, name):
+        self.Nests.append(name)
+
+    def add_violating_nesting_activity_blocked(self, node):
+        self.Activities.append(getattr(node, 'ActivityName', node))
+
+    def add_pending_activity(self, name):
+        self.Pending.append(name)
+
+    def add_unknown_activity(self, label):
+        self.Unknown.append(label)
+
+    def add_violating_event(self, role):
+        self.EventRoles.append(role)
+
+    def is_conformant(self):
+        """
+        Checks if no violations were found.
+        :return: Bool.
+        """
+        return not (self.Activities or self.Connections or self.Roles or self.Nests or self.Pending or self.Unknown)
+
+class DCRConformanceStats(object):
+    """ #own
+    Violation statistics of a set of traces. Statistics of parts of a log can be merged.
+    """
+
+    def __init__(self):
+        self.Traces = 0
+        self.ConformantTraces = 0
+        self.Events = 0
+        self.ViolatingEvents = 0
+        # relation -> number of events it blocked.
+        self.Relations = Counter()
+        # role -> number of events with a violation the role executed.
+        self.Roles = Counter()
+        # 'role-expected role' -> number of events executed by the wrong role.
+        self.WrongRoles = Counter()
+        # activity name -> number of times it was executed while excluded or blocked.
+        self.Activities = Counter()
+        # activity name -> number of traces that ended with the activity pending.
+        self.Pending = Counter()
+        # nest name -> number of times it was executed.
+        self.Nests = Counter()
+        # event label -> number of events with no activity in the graph.
+        self.Unknown = Counter()
+
+    def add_trace(self, trace_data, n_events):
+        """
+        Add the violations of a trace.
+        :param trace_data: The DCRTraceData of the trace.
+        :param n_events: The number of events of the trace.
+        """
+        self.Traces += 1
+        self.Events += n_events
+        if trace_data.is_conformant():
+            self.ConformantTraces += 1
+            return
+        self.ViolatingEvents += len(trace_data.EventRoles)
+        self.Relations.update(trace_data.Connections)
+        self.Roles.update(r for r in trace_data.EventRoles if r is not None)
+        self.WrongRoles.update(r + "-" + expected for r, expected in trace_data.Roles)
+        self.Activities.update(trace_data.Activities)
+        self.Pending.update(trace_data.Pending)
+        self.Nests.update(trace_data.Nests)
+        self.Unknown.update(trace_data.Unknown)
+
+    def merge(self, other):
+        """
+        Add the statistics of other.
+        :param other: DCRConformanceStats
+        :return: self
+        """
+        self.Traces += other.Traces
+        self.ConformantTraces += other.ConformantTraces
+        self.Events += other.Events
+        self.ViolatingEvents += other.ViolatingEvents
+        for name in ('Relations', 'Roles', 'WrongRoles', 'Activities', 'Pending', 'Nests', 'Unknown'):
+            getattr(self, name).update(getattr(other, name))
+        return self
+
+    def to_dict(self):
+        """
+        Get the statistics as plain data, e.g. for json.
+        :return: dict
+        """
+        ret = {'traces': self.Traces, 'conformant_traces': self.ConformantTraces,
+               'events': self.Events, 'violating_events': self.ViolatingEvents}
+        for name in ('Relations', 'Roles', 'WrongRoles', 'Activities', 'Pending', 'Nests', 'Unknown'):
+            # Keys are compared as text, as an event without a name in the log has the key None.
+            ret[name.lower() if name != 'WrongRoles' else 'wrong_roles'] = dict(sorted(getattr(self, name).items(), key=lambda kv: str(kv[0])))
+        return ret
+
+class DCRConformanceChecker(object):
+    """ #own
+    Replays traces on a graph, from its initial marking. Every event of a trace is executed, also when it violates the graph,
+    so one violation doesn't hide the ones after it. Expressions on connections are not evaluated.
+    """
+
+    def __init__(self, graph, ignore_unknown = False):
+        """
+        Constructor for the checker.
+        :param graph: The DCRGraph, or any subclass of it, e.g. a DCRChoreography or a DCRProjection.
+        :param ignore_unknown: Skip events with no activity in the graph, instead of counting them as violations.
+        Used to check a projection against the log of the whole choreography.
+        """
+        self.graph = graph
+        self.ignore_unknown = ignore_unknown
+        self.index = DCRMarkingIndex(graph)
+        self.initial = BitMarking.from_graph(graph, self.index)
+
+        # Events are matched on activity id, or else on activity name.
+        self.Labels = {}
+        for n in reversed(self.index.Nodes):
+            self.Labels[n.ActivityName] = n
+        for n in self.index.Nodes:
+            self.Labels[n.ActivityId] = n
+
+        # node -> [(relation, type, mask of the nodes that make it blocking)]
+        self.Blockers = {}
+        # node -> roles that may execute it. Empty if any role may.
+        self.Allowed = {}
+        for n in self.index.Nodes:
+            self.Blockers[n] = sorted([
+                ("{}-{}-{}".format(type(c).__name__.lower(), c.StartNode.ActivityName, c.EndNode.ActivityName),
+                 type(c), self.index.LeavesBelow[c.StartNode])
+                for c in graph.get_in_connections(n, ctypes = [Condition, Milestone]) if c.StartNode in self.index.Positions],
+                key=lambda b: b[0])
+            initiator = getattr(n, 'initiator', None)
+            self.Allowed[n] = {initiator} if initiator is not None else set(n.Roles)
+
+    def check_trace(self, events, trace_id = None):
+        """
+        Replay a trace.
+        :param events: [LogEvent]
+        :param trace_id: Id of the trace.
+        :return: DCRTraceData with the violations.
+        """
+        trace_data = DCRTraceData(trace_id)
+        marking = self.initial.copy()
+        for e in events:
+            node = self.Labels.get(e.Activity)
+            if node is None:
+                if not self.ignore_unknown:
+                    trace_data.add_unknown_activity(e.Activity)
+                    trace_data.add_violating_event(e.Role)
+                continue
+
+            violating = False
+            if node.isNest:
+                trace_data.add_violating_nesting_activity_occurred(node.ActivityName)
+                violating = True
+            blocking = marking.get_blocking(node)
+            if blocking:
+                for relation, ctype, mask in self.Blockers[node]:
+                    if ctype is Condition:
+                        blocks = mask & marking.Included & ~marking.Executed
+                    else:
+                        blocks = mask & marking.Included & marking.PendingResponse
+                    if blocks:
+                        trace_data.add_violating_connection(relation)
+            if blocking or not marking.is_included(node):
+                trace_data.add_violating_activity(node.ActivityName)
+                violating = True
+            allowed = self.Allowed[node]
+            if e.Role is not None and allowed and e.Role not in allowed:
+                trace_data.add_violating_role(e.Role, sorted(allowed)[0])
+                violating = True
+            if violating:
+                trace_data.add_violating_event(e.Role)
+
+            marking.perform_transition_node(node)
+
+        for n in sorted(self.index.nodes(marking.Included & marking.PendingResponse & self.index.LeafMask), key=lambda n: n.ActivityId):
+            trace_data.add_pending_activity(n.ActivityName)
+        return trace_data
+
+    def check_traces(self, traces):
+        """
+        Replay traces.
+        :param traces: Iterable of (trace id, [LogEvent]).
+        :return: DCRConformanceStats
+        """
+        stats = DCRConformanceStats()
+        for trace_id, events in traces:
+            stats.add_trace(self.check_trace(events, trace_id), len(events))
+        return stats
+
+    def check_log(self, traces, jobs = 1, chunk_size = CHUNK_SIZE):
+        """
+        Replay all traces of a log.
+        :param traces: Iterable of (trace id, [LogEvent]), e.g. from read_event_log.
+        :param jobs: Number of worker processes. 1 replays in this process.
+        :param chunk_size: Number of traces sent to a worker at a time.
+        :return: DCRConformanceStats
+        """
+        return check_log([self], traces, jobs, chunk_size)[0]
+
+def init_worker(checkers):
+    """ #own
+    Initializer for worker processes. The checkers are made once in the main process, and handed to every worker.
+    :param checkers: [DCRConformanceChecker]
+    """
+    global conformance_checkers
+    conformance_checkers = checkers
+
+def check_chunk(chunk):
+    """ #own
+    Replay a chunk of traces on every checker of the worker.
+    :param chunk: [(trace id, [LogEvent])]
+    :return: [DCRConformanceStats], one for every checker.
+    """
+    return [c.check_traces(chunk) for c in conformance_checkers]
+
+def check_log(checkers, traces, jobs = 1, chunk_size = CHUNK_SIZE):
+    """ #own
+    Replay the traces of a log on several graphs, reading the log only once.
+    The log is read lazily, and at most two chunks per worker are waiting, so a log of any size can be checked.
+    :param checkers: [DCRConformanceChecker]
+    :param traces: Iterable of (trace id, [LogEvent]).
+    :param jobs: Number of worker processes. 1 replays in this process.
+    :param chunk_size: Number of traces sent to a worker at a time.
+    :return: [DCRConformanceStats], one for every checker.
+    """
+    stats = [DCRConformanceStats() for _ in checkers]
+    traces = iter(traces)
+    chunks = iter(lambda: list(islice(traces, chunk_size)), [])
+
+    def merge(results):
+        for s, result in zip(stats, results):
+            s.merge(result)
+
+    if jobs == 1:
+        for chunk in chunks:
+            merge([c.check_traces(chunk) for c in checkers])
+        return stats
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(checkers,)) as executor:
+        waiting = deque()
+        for chunk in chunks:
+            waiting.append(executor.submit(check_chunk, chunk))
+            if len(waiting) >= 2 * jobs:
+                merge(waiting.popleft().result())
+        while waiting:
+            merge(waiting.popleft().result())
+    return stats
+
+def print_stats(name, stats):
+    """ #own
+    Print a summary of the statistics.
+    :param name: What the log was checked against.
+    :param stats: DCRConformanceStats
+    """
+    print("{}: {} of {} traces conformant, {} of {} events violating".format(
+        name, stats.ConformantTraces, stats.Traces, stats.ViolatingEvents, stats.Events))
+    for title, counter in [("Relations", stats.Relations), ("Roles", stats.Roles), ("Wrong roles", stats.WrongRoles),
+                           ("Activities", stats.Activities), ("Pending at end", stats.Pending),
+                           ("Nests", stats.Nests), ("Unknown", stats.Unknown)]:
+        if counter:
+            print("  " + title + ":")
+            # Keys are compared as text, as an event without a name in the log has the key None.
+            for key, count in sorted(counter.items(), key=lambda kv: (-kv[1], str(kv[0]))):
+                print("    {:8d}  {}".format(count, key))
+
+def main():
+    """ #own """
+    try:
+        choreography = DCRChoreography().from_xml(xml_path)
+    except ValueError as e:
+        print("The graph could not be read.")
+        print("ErrorMessage:", e)
+        return
+    except FileNotFoundError:
+        print("Input file not found. Some example files can be found in the folder 'input'.")
+        return
+
+    names = ["Choreography"]
+    checkers = [DCRConformanceChecker(choreography)]
+    if check_projections:
+        try:
+            for a in sorted(choreography.get_roles()):
+                names.append("Projection for " + a)
+                checkers.append(DCRConformanceChecker(choreography.project_for_actor(a), ignore_unknown=True))
+        except AssertionError:
+            print("The projections could not be made, as the graph is not projectable.")
+            return
+
+    try:
+        results = check_log(checkers, read_event_log(log_path), jobs)
+    except (ValueError, KeyError, SyntaxError) as e:
+        print("The event log could not be read.")
+        print("ErrorMessage:", e)
+        return
+    except FileNotFoundError:
+        print("Event log not found.")
+        return
+
+    for name, stats in zip(names, results):
+        print_stats(name, stats)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({name: stats.to_dict() for name, stats in zip(names, results)}, f, indent=1)
+
+if __name__ == '__main__':
+    # input parameters
+    args = cmd_parser.parse_conformance_args()
+    xml_path = args.xml
+    log_path = args.log
+    check_projections = args.projections
+    json_path = args.json
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    main()
@@ -25,10 +25,23 @@ Spawn: The Spawn connection creates a relation between an activity A and a sub-a
 when A occurs, a new instance of B is created
 """
 
+def get_nodes_below(node):
+    """ #own
+    Get node and all nodes nested under it, at any depth.
+    :param node: The node.
+    :return: List of nodes.
+    """
+    ret = [node]
+    for n in ret:
+        if n.isNest:
+            ret.extend(n.Activities)
+    return ret
+
 class DCRConnection(ABC):
     """ # modified, added methods.
     Abstract class for DCR relations to be inherited
     """
+    __slots__ = ('StartNode', 'EndNode', 'Expression', 'HasExpression')
 
     def __str__(self):
         return self.StartNode.str_name() + "-" + DCRConnection.get_connection_string(type(self)) + "-" + self.EndNode.str_name()
@@ -141,6 +154,7 @@ class Include(DCRConnection):
     The representation of an Include relations
     :DCRConnection implementer
     """
+    __slots__ = ()
 
     def __init__(self, start_node, end_node):
         """
@@ -153,26 +167,21 @@ class Include(DCRConnection):
         super().__init__(start_node, end_node)
 
     def perform_transition(self, marking):
-        """
+        """ #modified to handle recursive nesting.
         Includes the target activities
         :param marking: Needed to manipulate the marking
         :return:
         """
-        if self.EndNode not in marking.Included:
-            marking.Included.append(self.EndNode)
-        if hasattr(self.EndNode, "Activities"):
-            for activity in self.EndNode.Activities:
-                if activity not in marking.Included:
-                    marking.Included.append(activity)
-        elif self.EndNode.NestingActivity is not None:
-            if self.EndNode.NestingActivity is not marking.Included:
-                marking.Included.append(self.EndNode.NestingActivity)
+        for activity in get_nodes_below(self.EndNode):
+            if activity not in marking.Included:
+                marking.Included.append(activity)
 
 
 class Milestone(DCRConnection):
     """
     The class that represents a Milestone relation
     """
+    __slots__ = ()
 
     def __init__(self, start_node, end_node):
         """
@@ -196,6 +205,7 @@ class Condition(DCRConnection):
     """
     The class that represents a condition relation
     """
+    __slots__ = ()
 
     def __init__(self, start_node, end_node):
         super().__init__(start_node, end_node)
@@ -214,6 +224,7 @@ class Exclude(DCRConnection):
     """
     The class represents the Exclude relation
     """
+    __slots__ = ()
 
     def __init__(self, start_node, end_node):
         super().__init__(start_node, end_node)
@@ -223,22 +234,17 @@ class Exclude(DCRConnection):
           Override for base method
           :param marking: Base-Marking on which the transition is checked
           :return: True if conformant, False if not
-          """
-        if self.EndNode in marking.Included:
-            marking.Included.remove(self.EndNode)
-        if hasattr(self.EndNode, "Activities"):
-            for activity in self.EndNode.Activities:
-                if activity in marking.Included:
-                    marking.Included.remove(activity)
-        elif self.EndNode.NestingActivity is not None:
-            if not any(activity in marking.Included for activity in self.EndNode.NestingActivity.Activities):
-                marking.Included.remove(self.EndNode.NestingActivity)
+          """ #modified to handle recursive nesting.
+        for activity in get_nodes_below(self.EndNode):
+            if activity in marking.Included:
+                marking.Included.remove(activity)
 
 
 class Response(DCRConnection):
     """
     The class represents a Response connection in a DCR graph
     """
+    __slots__ = ()
 
     def __init__(self, start_node, end_node):
         """
@@ -253,23 +259,16 @@ class Response(DCRConnection):
         Performs the transition for a response connection
         :param marking:
         :return:
-        """
-        if self.EndNode not in marking.PendingResponse:
-            marking.PendingResponse.append(self.EndNode)
-
-        if hasattr(self.EndNode, "Activities"):
-            for activity in self.EndNode.Activities:
-                if activity not in marking.PendingResponse:
-                    marking.PendingResponse.append(activity)
-        elif self.EndNode.NestingActivity is not None:
-            # if any(activity in self.EndNode.NestingActivity.Activities for activity in marking.PendingResponse):
-            if self.EndNode.NestingActivity not in marking.PendingResponse:
-                marking.PendingResponse.append(self.EndNode.NestingActivity)
+        """ #modified to handle recursive nesting.
+        for activity in get_nodes_below(self.EndNode):
+            if activity not in marking.PendingResponse:
+                marking.PendingResponse.append(activity)
 
 class CoResponse(DCRConnection):
     """ #own
     The class represents a CoResponse connection in a DCR graph
     """
+    __slots__ = ()
 
     def __init__(self, start_node, end_node):
         """
@@ -284,19 +283,7 @@ class CoResponse(DCRConnection):
         Performs the transition for a coresponse connection
         :param marking:
         :return:
-        """
-        if self.EndNode in marking.PendingResponse:
-            marking.PendingResponse.remove(self.EndNode)
-
-        # FIXME This should be changed completely.
-        # It doesn't take recursive nesting into account,
-        # and it doesn't handle groups correctly.
-        if hasattr(self.EndNode, "Activities"):
-            for activity in self.EndNode.Activities:
-                if activity in marking.PendingResponse:
-                    marking.PendingResponse.remove(activity)
-        
-        elif self.EndNode.NestingActivity is not None:
-            if any(activity in self.EndNode.NestingActivity.Activities for activity in marking.PendingResponse):
-                if self.EndNode.NestingActivity not in marking.PendingResponse:
-                    marking.PendingResponse.append(self.EndNode.NestingActivity)
\ No newline at end of file
+        """ #modified to handle recursive nesting.
+        for activity in get_nodes_below(self.EndNode):
+            if activity in marking.PendingResponse:
+                marking.PendingResponse.remove(activity)
\ No newline at end of file
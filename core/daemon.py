@@ -0,0 +1,432 @@
+# coding=utf-8
+"""
+This module contains the resident server mode of epp_dcr. It answers JSON-RPC 2.0 requests, one per line,
+on stdin and stdout or on a local socket, and keeps parsed choreographies and their projections between requests.
+"""
+import contextlib
+import json
+import os
+import socketserver
+import sys
+import time
+import xml.etree.ElementTree as Etree
+from collections import OrderedDict
+
+from graph import DCRChoreography
+from jolie_templates import get_backend
+from output_cache import JolieOutputCache
+from writer import JolieFileWriter
+
+# JSON-RPC 2.0 error codes, and the codes of this server.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+FILE_NOT_FOUND = -32001
+UNREADABLE = -32002
+NOT_PROJECTABLE = -32003
+NOT_WRITTEN = -32004
+
+class DCRRequestError(Exception):
+    """ #own
+    An error that is answered as a JSON-RPC error object.
+    """
+
+    def __init__(self, code, message, data = None):
+        """
+        Constructor for the error.
+        :param code: The JSON-RPC error code.
+        :param message: Short description of the error.
+        :param data: More about the error, as plain data, or None.
+        """
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+    def to_dict(self):
+        """
+        Get the JSON-RPC error object.
+        :return: dict
+        """
+        ret = {'code': self.code, 'message': self.message}
+        if self.data is not None:
+            ret['data'] = self.data
+        return ret
+
+class DCRChoreographyCache(object):
+    """ #own
+    Least recently used cache of parsed choreographies, and the views of their projections, by file path.
+    An entry is only used while the file has the modification time and size it had when it was parsed.
+    """
+
+    def __init__(self, max_entries = 16):
+        """
+        Constructor for the cache.
+        :param max_entries: The largest number of choreographies kept.
+        """
+        self.max_entries = max(1, max_entries)
+        # absolute path -> ((mtime_ns, size), DCRChoreography, {actor: DCRProjectionView}), least recently used first.
+        self.Entries = OrderedDict()
+        self.Hits = 0
+        self.Misses = 0
+
+    def get_entry(self, path):
+        """
+        Get the entry of a file, and parse it if it is not cached or has changed.
+        :param path: The path of the choreography.
+        :return: The entry, and whether it was cached.
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        entry = self.Entries.get(path)
+        if entry is not None and entry[0] == stamp:
+            self.Hits += 1
+            self.Entries.move_to_end(path)
+            return entry, True
+
+        self.Misses += 1
+        self.Entries.pop(path, None)
+        entry = (stamp, DCRChoreography().from_xml(path), {})
+        self.Entries[path] = entry
+        while len(self.Entries) > self.max_entries:
+            self.Entries.popitem(last=False)
+        return entry, False
+
+    def get_choreography(self, path):
+        """
+        Get the choreography of a file.
+        :param path: The path of the choreography.
+        :return: DCRChoreography
+        """
+        return self.get_entry(path)[0][1]
+
+    @staticmethod
+    def get_view(entry, actor):
+        """
+        Get the view of the projection for an actor, which is kept with the choreography.
+        :param entry: An entry of the cache.
+        :param actor: The actor.
+        :return: DCRProjectionView
+        """
+        views = entry[2]
+        if actor not in views:
+            views[actor] = entry[1].project_view_for_actor(actor)
+        return views[actor]
+
+class DCRCompileServer(object):
+    """ #own
+    Answers JSON-RPC 2.0 requests to project and generate choreographies. Methods:
+    project (path, actors, backend), generate (path, actors, backend, output), diagnostics (path), stats and shutdown.
+    """
+
+    def __init__(self, cache_size = 16):
+        """
+        Constructor for the server.
+        :param cache_size: The largest number of choreographies kept.
+        """
+        self.cache = DCRChoreographyCache(cache_size)
+        # absolute path of the output folder -> JolieOutputCache, so that unchanged projections are not generated again.
+        self.OutputCaches = {}
+        self.Running = True
+        self.Requests = 0
+        self.methods = {'project': self.project, 'generate': self.generate, 'diagnostics': self.diagnostics,
+                        'stats': self.stats, 'shutdown': self.shutdown}
+
+    def handle_line(self, line):
+        """
+        Answer a line of the protocol.
+        :param line: A JSON-RPC request, or batch of requests.
+        :return: The response as a line of json, or None if nothing is to be answered.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps(self.error_response(None, DCRRequestError(PARSE_ERROR, "Parse error", str(e))))
+        if isinstance(request, list):
+            responses = [r for r in (self.handle(q) for q in request) if r is not None]
+            return json.dumps(responses) if responses else None
+        response = self.handle(request)
+        return json.dumps(response) if response is not None else None
+
+    def handle(self, request):
+        """
+        Answer a request.
+        :param request: The JSON-RPC request, as parsed json.
+        :return: The response, or None for a notification.
+        """
+        if not isinstance(request, dict) or request.get('jsonrpc') != "2.0" or not isinstance(request.get('method'), str):
+            return self.error_response(None, DCRRequestError(INVALID_REQUEST, "Invalid Request"))
+        request_id = request.get('id')
+        self.Requests += 1
+        try:
+            method = self.methods.get(request['method'])
+            if method is None:
+                raise DCRRequestError(METHOD_NOT_FOUND, "Method not found", request['method'])
+            params = request.get('params', {})
+            if not isinstance(params, dict):
+                raise DCRRequestError(INVALID_PARAMS, "Invalid params", "params must be an object")
+            result = method(params)
+        except DCRRequestError as e:
+            return self.error_response(request_id, e) if 'id' in request else None
+        except Exception as e:
+            # A bug, or a graph the compiler cannot handle, must not stop the server for the requests after it.
+            error = DCRRequestError(INTERNAL_ERROR, "Internal error", type(e).__name__ + ": " + str(e))
+            return self.error_response(request_id, error) if 'id' in request else None
+        if 'id' not in request:
+            return None
+        return {'jsonrpc': "2.0", 'id': request_id, 'result': result}
+
+    @staticmethod
+    def error_response(request_id, error):
+        """
+        Make a JSON-RPC error response.
+        :param request_id: The id of the request, or None if it could not be read.
+        :param error: DCRRequestError
+        :return: dict
+        """
+        return {'jsonrpc': "2.0", 'id': request_id, 'error': error.to_dict()}
+
+    @staticmethod
+    def get_param(params, name, kind, default = None, required = False):
+        """
+        Get a parameter of a request.
+        :param params: The params of the request.
+        :param name: The name of the parameter.
+        :param kind: The type it must have.
+        :param default: The value if it is not given.
+        :param required: Whether the parameter must be given.
+        :return: The value.
+        """
+        value = params.get(name, default)
+        if value is None and required:
+            raise DCRRequestError(INVALID_PARAMS, "Invalid params", name + " is required")
+        if value is not None and not isinstance(value, kind):
+            raise DCRRequestError(INVALID_PARAMS, "Invalid params", name + " must be a " + kind.__name__)
+        return value
+
+    def get_entry(self, params):
+        """
+        Get the cache entry of the choreography of a request.
+        :param params: The params of the request, with its path.
+        :return: The entry, and whether it was cached.
+        """
+        path = self.get_param(params, 'path', str, required=True)
+        try:
+            return self.cache.get_entry(path)
+        except FileNotFoundError:
+            raise DCRRequestError(FILE_NOT_FOUND, "File not found", path)
+        except (ValueError, OSError, Etree.ParseError) as e:
+            # e.g. a folder, a file that may not be read, or a file that is still being written.
+            raise DCRRequestError(UNREADABLE, "The graph could not be read", str(e))
+
+    def get_views(self, entry, params):
+        """
+        Get the views of the projections that a request asks for.
+        :param entry: The cache entry of the choreography.
+        :param params: The params of the request, with the actors, or all actors if none are given.
+        :return: Dict from actor to DCRProjectionView, sorted by actor.
+        """
+        choreography = entry[1]
+        roles = choreography.get_roles()
+        actors = self.get_param(params, 'actors', list, sorted(roles))
+        if not all(isinstance(a, str) for a in actors):
+            raise DCRRequestError(INVALID_PARAMS, "Invalid params", "actors must be a list of strings")
+        unknown = [a for a in actors if a not in roles]
+        if unknown:
+            raise DCRRequestError(INVALID_PARAMS, "Invalid params", "unknown actors: " + ", ".join(map(str, unknown)))
+        violations = choreography.get_projectability_violations(actors, [e for e in choreography.get_interactions() if e.initiator in actors])
+        if violations:
+            raise DCRRequestError(NOT_PROJECTABLE, "The graph is not projectable", [v.to_dict() for v in violations])
+        return OrderedDict((a, self.cache.get_view(entry, a)) for a in sorted(actors))
+
+    def get_backend(self, params):
+        """
+        Get the backend that a request asks for.
+        :param params: The params of the request, with the name of the backend, or none for the default.
+        :return: JolieBackend
+        """
+        try:
+            return get_backend(self.get_param(params, 'backend', str))
+        except ValueError as e:
+            raise DCRRequestError(INVALID_PARAMS, "Invalid params", str(e))
+
+    def project(self, params):
+        """
+        Project a choreography.
+        :param params: path, and optionally actors and backend.
+        :return: dict with whether the choreography was cached, and the structure hash and size of every projection.
+        """
+        start = time.perf_counter()
+        entry, cached = self.get_entry(params)
+        backend = self.get_backend(params)
+        projections = {a: {'structure_hash': view.get_structure_hash(backend), 'events': len(view.Events),
+                           'connections': len(view.Connections)}
+                       for a, view in self.get_views(entry, params).items()}
+        return {'path': params['path'], 'cached': cached, 'projections': projections,
+                'milliseconds': round(1000 * (time.perf_counter() - start), 3)}
+
+    def generate(self, params):
+        """
+        Project a choreography, and write the Jolie files of the projections.
+        Projections with the same structure hash as the files already in the output folder are not generated again.
+        :param params: path, and optionally actors, backend and output, the folder to write to. Default is output.
+        :return: dict with whether the choreography was cached, and how every file was written. See write_file.
+        """
+        start = time.perf_counter()
+        entry, cached = self.get_entry(params)
+        backend = self.get_backend(params)
+        output_folder = self.get_param(params, 'output', str, "output")
+        views = self.get_views(entry, params)
+
+        # The same folder may be written in different ways, e.g. output and ./output, but must have one cache.
+        output_cache = self.OutputCaches.get(os.path.abspath(output_folder))
+        if output_cache is None:
+            output_cache = JolieOutputCache.load(os.path.join(output_folder, ".jolie_cache.json"))
+            self.OutputCaches[os.path.abspath(output_folder)] = output_cache
+
+        files = {}
+        writer = JolieFileWriter()
+        generated = []
+        for a, view in views.items():
+            structure_hash = view.get_structure_hash(backend)
+            if structure_hash == output_cache.get_fresh_hash(a):
+                files.update((fname, "skipped") for fname in output_cache.get_files(a))
+                continue
+            fnames = []
+            for fname, fcontents in view.gen_jolie_files(backend).items():
+                fname = os.path.join(output_folder, os.path.basename(fname))
+                writer.add(fname, fcontents)
+                fnames.append(fname)
+            generated.append((a, structure_hash, fnames))
+
+        try:
+            os.makedirs(output_folder, exist_ok=True)
+            written, error = writer.flush()
+        except OSError as e:
+            written, error = {}, e
+        files.update(written)
+        for a, structure_hash, fnames in generated:
+            if all(fname in written for fname in fnames):
+                output_cache.update(a, structure_hash, fnames)
+        if generated and os.path.isdir(output_folder):
+            output_cache.save()
+        if error is not None:
+            raise DCRRequestError(NOT_WRITTEN, "Interface files could not be written", str(error))
+
+        return {'path': params['path'], 'cached': cached, 'files': files,
+                'milliseconds': round(1000 * (time.perf_counter() - start), 3)}
+
+    def diagnostics(self, params):
+        """
+        Find every dependency that makes a choreography not projectable.
+        :param params: path.
+        :return: dict as in violations_to_json.
+        """
+        entry, cached = self.get_entry(params)
+        violations = entry[1].get_projectability_violations()
+        return {'projectable': not violations, 'violations': [v.to_dict() for v in violations], 'cached': cached}
+
+    def stats(self, params):
+        """
+        Get the statistics of the server.
+        :param params: None are used.
+        :return: dict
+        """
+        return {'requests': self.Requests, 'cached': len(self.cache.Entries), 'hits': self.cache.Hits, 'misses': self.cache.Misses}
+
+    def shutdown(self, params):
+        """
+        Stop the server, after answering.
+        :param params: None are used.
+        :return: True
+        """
+        self.Running = False
+        return True
+
+def serve_stream(server, infile, outfile):
+    """ #own
+    Answer requests, one per line, until the input ends or the server is shut down.
+    Anything the projection prints goes to stderr, so that outfile only has responses.
+    :param server: DCRCompileServer
+    :param infile: File to read requests from.
+    :param outfile: File to write responses to.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        for line in infile:
+            if not line.strip():
+                continue
+            response = server.handle_line(line)
+            if response is not None:
+                outfile.write(response + "\n")
+                outfile.flush()
+            if not server.Running:
+                break
+
+class TextWriter(object):
+    """ #own
+    Writes text to a binary socket file, as utf-8.
+    """
+
+    def __init__(self, wfile):
+        """
+        Constructor for the writer.
+        :param wfile: The binary file of the socket.
+        """
+        self.wfile = wfile
+
+    def write(self, text):
+        """
+        Write text.
+        :param text: String.
+        """
+        self.wfile.write(text.encode("utf-8"))
+
+    def flush(self):
+        """
+        Send what has been written.
+        """
+        self.wfile.flush()
+
+def serve_socket(server, socket_path = None, port = None):
+    """ #own
+    Answer requests on a local socket, one connection at a time, until the server is shut down.
+    A connection can send any number of requests, one per line.
+    :param server: DCRCompileServer
+    :param socket_path: Path of a unix domain socket to listen on.
+    :param port: Otherwise, a TCP port to listen on, on localhost only.
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (line.decode("utf-8") for line in self.rfile)
+            serve_stream(server, lines, TextWriter(self.wfile))
+
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        listener = socketserver.UnixStreamServer(socket_path, Handler)
+    else:
+        listener = socketserver.TCPServer(("127.0.0.1", port), Handler)
+    try:
+        print("Listening on", socket_path if socket_path is not None else "127.0.0.1:" + str(listener.server_address[1]), file=sys.stderr)
+        while server.Running:
+            listener.handle_request()
+    finally:
+        listener.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def serve(socket_path = None, port = None, cache_size = 16):
+    """ #own
+    Run the server, on stdin and stdout, or on a local socket.
+    :param socket_path: Path of a unix domain socket to listen on, or None.
+    :param port: A TCP port on localhost to listen on, or None.
+    :param cache_size: The largest number of choreographies kept.
+    """
+    server = DCRCompileServer(cache_size)
+    if socket_path is None and port is None:
+        serve_stream(server, sys.stdin, sys.stdout)
+    else:
+        serve_socket(server, socket_path, port)
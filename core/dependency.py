@@ -0,0 +1,144 @@
+# coding=utf-8
+"""
+This module contains the index of direct dependencies between the events of a DCR graph,
+which projectability and end-point projection are decided from.
+"""
+from conn import Condition, Milestone, Include, Exclude, Response
+
+class DCRDependencyIndex(object):
+    """ #own
+    The direct dependers and dependees of every node of a graph, as in DCRGraph.get_direct_dependers and get_direct_dependees.
+    The connections are read once, into what every node contributes by itself. A node also has the connections of its ancestors,
+    so its dependencies are what it and its ancestors contribute. They are put together, and kept, the first time they are asked for.
+    The index is not updated when the graph changes. The graph drops it instead.
+    """
+
+    def __init__(self, graph):
+        """
+        Constructor for the index.
+        :param graph: The DCRGraph, or any subclass of it.
+        """
+        # node -> the non-nest nodes under it, or the node itself if it is not a nest.
+        self.SubNodes = {}
+
+        # node -> nodes that the connections from (to) the node itself make dependers (dependees).
+        self.OwnDependers = {}
+        self.OwnDependees = {}
+        # node -> sub nodes of the ends of its own conditions and milestones / only milestones,
+        # i.e. what an include, exclude or response to the node also makes a depender.
+        own_next_cond_or_mil = {}
+        own_next_mil = {}
+        # node -> sub nodes of the starts of its own incoming includes and excludes / responses,
+        # i.e. what a condition or milestone from the node also makes a dependee.
+        own_prev_inc_or_exc = {}
+        own_prev_resp = {}
+
+        for c in graph.Connections:
+            start, end = c.StartNode, c.EndNode
+            if start is None or end is None:
+                continue
+            ctype = type(c)
+            self.OwnDependers.setdefault(start, set()).update(self.get_sub_nodes(end))
+            self.OwnDependees.setdefault(end, set()).update(self.get_sub_nodes(start))
+            if ctype in (Condition, Milestone):
+                own_next_cond_or_mil.setdefault(start, set()).update(self.get_sub_nodes(end))
+            if ctype == Milestone:
+                own_next_mil.setdefault(start, set()).update(self.get_sub_nodes(end))
+            if ctype in (Include, Exclude):
+                own_prev_inc_or_exc.setdefault(end, set()).update(self.get_sub_nodes(start))
+            if ctype == Response:
+                own_prev_resp.setdefault(end, set()).update(self.get_sub_nodes(start))
+
+        # The second step goes through the connections of the node at the end (start) of the first, and of its ancestors.
+        next_cond_or_mil = {}
+        next_mil = {}
+        prev_inc_or_exc = {}
+        prev_resp = {}
+        for c in graph.Connections:
+            start, end = c.StartNode, c.EndNode
+            if start is None or end is None:
+                continue
+            ctype = type(c)
+            if ctype in (Include, Exclude):
+                self.OwnDependers[start].update(self.inherited(end, own_next_cond_or_mil, next_cond_or_mil))
+            elif ctype == Response:
+                self.OwnDependers[start].update(self.inherited(end, own_next_mil, next_mil))
+            elif ctype == Condition:
+                self.OwnDependees[end].update(self.inherited(start, own_prev_inc_or_exc, prev_inc_or_exc))
+            elif ctype == Milestone:
+                self.OwnDependees[end].update(self.inherited(start, own_prev_inc_or_exc, prev_inc_or_exc))
+                self.OwnDependees[end].update(self.inherited(start, own_prev_resp, prev_resp))
+
+        # node -> what it and its ancestors contribute / its direct dependers (dependees), made when first asked for.
+        self.InheritedDependers = {}
+        self.InheritedDependees = {}
+        self.Dependers = {}
+        self.Dependees = {}
+
+    def get_sub_nodes(self, node):
+        """
+        Get the non-nest nodes under node, at any depth, or node itself if it is not a nest.
+        :param node: The node.
+        :return: frozenset of nodes.
+        """
+        ret = self.SubNodes.get(node)
+        if ret is None:
+            if not node.isNest:
+                ret = frozenset([node])
+            else:
+                ret = set()
+                todo = list(node.Activities)
+                while todo:
+                    n = todo.pop()
+                    if n.isNest:
+                        todo.extend(n.Activities)
+                    else:
+                        ret.add(n)
+                ret = frozenset(ret)
+            self.SubNodes[node] = ret
+        return ret
+
+    @staticmethod
+    def inherited(node, own, memo):
+        """
+        Get the union of own over node and its ancestors.
+        :param node: The node.
+        :param own: dict from node to a set.
+        :param memo: dict where the unions are kept, for node and its ancestors.
+        :return: frozenset
+        """
+        chain = []
+        n = node
+        while n is not None and n not in memo:
+            chain.append(n)
+            n = n.Parent
+        ret = memo[n] if n is not None else frozenset()
+        for n in reversed(chain):
+            if n in own:
+                ret = ret.union(own[n])
+            memo[n] = ret
+        return memo[node]
+
+    def get_direct_dependers(self, node):
+        """
+        Get all direct dependers of node, including node itself.
+        :param node: The node.
+        :return: frozenset of nodes.
+        """
+        ret = self.Dependers.get(node)
+        if ret is None:
+            ret = self.inherited(node, self.OwnDependers, self.InheritedDependers).union([node])
+            self.Dependers[node] = ret
+        return ret
+
+    def get_direct_dependees(self, node):
+        """
+        Get all nodes that node directly depends on, including node itself.
+        :param node: The node.
+        :return: frozenset of nodes.
+        """
+        ret = self.Dependees.get(node)
+        if ret is None:
+            ret = self.inherited(node, self.OwnDependees, self.InheritedDependees).union([node])
+            self.Dependees[node] = ret
+        return ret
@@ -0,0 +1,44 @@
+# coding=utf-8
+"""
+This module contains the diagnostics of why a choreography is not projectable.
+"""
+import json
+
+class DCRProjectabilityViolation(object):
+    """ #own
+    A direct dependency that makes a choreography not projectable: the initiator of depender doesn't take part in action,
+    so it can't know when action has happened.
+    """
+
+    def __init__(self, action, depender, participants):
+        """
+        Constructor for a violation.
+        :param action: The interaction that depender depends on.
+        :param depender: The direct depender of action.
+        :param participants: The roles that take part in action, i.e. the roles allowed to initiate depender.
+        """
+        self.Action = action
+        self.Depender = depender
+        self.Initiator = depender.initiator
+        self.Participants = participants
+
+    def __str__(self):
+        return "There is a direct dependency from {} to {} and {} not in {}".format(
+            self.Action.ActivityName, self.Depender.ActivityName, self.Initiator, self.Participants)
+
+    def to_dict(self):
+        """
+        Get the violation as plain data, e.g. for json.
+        :return: dict
+        """
+        return {'action': self.Action.ActivityName, 'action_id': self.Action.ActivityId,
+                'depender': self.Depender.ActivityName, 'depender_id': self.Depender.ActivityId,
+                'initiator': self.Initiator, 'allowed': sorted(self.Participants)}
+
+def violations_to_json(violations):
+    """ #own
+    Make the json report of a list of violations.
+    :param violations: [DCRProjectabilityViolation]
+    :return: String.
+    """
+    return json.dumps({'projectable': not violations, 'violations': [v.to_dict() for v in violations]}, indent=1)
@@ -1,7 +1,60 @@
 #!/usr/bin/env python
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import cmd_parser
+import daemon
 from graph import DCRChoreography
+from output_cache import JolieOutputCache
+from diagnostics import violations_to_json
+from writer import JolieFileWriter
+from jolie_templates import get_backend
+from profiler import DCRProfiler, NULL_PROFILER
+
+# Set by profiled_main when --profile is used.
+profiler = NULL_PROFILER
+
+def init_worker(choreography):
+    """ #own
+    Initializer for worker processes. The choreography is parsed once in the main process,
+    and handed to every worker, where it is only read.
+    :param choreography: The parsed DCRChoreography.
+    """
+    global dcr_choreography
+    dcr_choreography = choreography
+
+def describe_projection(a, p):
+    """ #own
+    Verbatim description of a projection.
+    :param a: The actor of the projection.
+    :param p: The projection.
+    :return: String with the projection and its marking.
+    """
+    ret  = "\n\nProjection for  " + a + " : " + str(p.get_roles()) + " \n " + str(p) + "\n"
+    ret += "Included, " + str([e.ActivityName for e in p.InitialIncluded]) + "\n"
+    ret += "Excluded " + str([e.ActivityName for e in p.Nodes if e not in p.InitialIncluded]) + "\n"
+    ret += "Pending, " + str([e.ActivityName for e in p.InitialPending]) + "\n"
+    ret += "Executed, " + str([e.ActivityName for e in p.InitialExecuted])
+    return ret
+
+def project_and_generate(a, verbatim = False, cached_hash = None, backend_name = None):
+    """ #own
+    Project the choreography for an actor, and generate the Jolie files of the projection.
+    Runs in the main process, or in a worker process when --jobs is used.
+    :param a: The actor.
+    :param verbatim: Whether to also describe the projection.
+    :param cached_hash: Structure hash of the projection that the current files were generated from, if any.
+    :param backend_name: Name of the JolieBackend to generate with. Default is http.
+    :return: The description of the projection (or None), the structure hash of the projection,
+    and a dict from file name to file contents, or None if the cached files are up to date.
+    """
+    # The view is enough for the Jolie files. The projection is only made to describe it.
+    p = dcr_choreography.project_view_for_actor(a)
+    backend = get_backend(backend_name)
+    structure_hash = p.get_structure_hash(backend)
+    files = p.gen_jolie_files(backend) if structure_hash != cached_hash else None
+    return (describe_projection(a, p.materialize()) if verbatim else None), structure_hash, files
 
 def main():
     """ #modified heavily. """
@@ -9,7 +62,10 @@ def main():
 
     global dcr_choreography
     try:
-        dcr_choreography = DCRChoreography().from_xml(xml_path)
+        if use_snapshot:
+            dcr_choreography = DCRChoreography.from_xml_or_snapshot(xml_path, os.path.splitext(xml_path)[0] + ".dcrs")
+        else:
+            dcr_choreography = DCRChoreography().from_xml(xml_path)
     except ValueError as e:
         print("Interfaces could not be made.")
         print("ErrorMessage:",e)
@@ -26,28 +82,104 @@ def main():
 
     #Alright! Now we've got the instance!
 
+    if diagnostics_path:
+        violations = dcr_choreography.get_projectability_violations()
+        if diagnostics_path == "-":
+            print(violations_to_json(violations))
+        else:
+            with open(diagnostics_path, "w") as f:
+                f.write(violations_to_json(violations))
+        if violations:
+            print("Interfaces could not be made, as the graph is not projectable. Dependencies that prevent it:", len(violations))
+            return
+
+    # Sorted, so that serial and parallel runs write the files in the same order.
+    actors = sorted(dcr_choreography.get_roles())
+
+    # The cache is also read with --no-cache, to know the files of actors that are gone.
+    cache = JolieOutputCache.load("output/.jolie_cache.json")
+    cached_hashes = [cache.get_fresh_hash(a) if use_cache else None for a in actors]
+
     try:
-        projections = {}
-        for a in dcr_choreography.get_roles():
-                projections[a] = dcr_choreography.project_for_actor(a)
+        if jobs == 1:
+            results = []
+            for a, h in zip(actors, cached_hashes):
+                with profiler.actor(a):
+                    results.append(project_and_generate(a, verbatim, h, backend_name))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(dcr_choreography,)) as executor:
+                results = list(executor.map(project_and_generate, actors, [verbatim]*len(actors), cached_hashes, [backend_name]*len(actors)))
     except AssertionError:
         print("Interfaces could not be made, as the graph is not projectable.")
         return
 
-        
-    for a,p in projections.items():
+    # Nothing is written before all actors have been projected. Then all files are written at once.
+    report = {"created": [], "rewritten": [], "skipped": [], "removed": []}
+    writer = JolieFileWriter(io_threads)
+    generated = []
+    for a, (description, structure_hash, files) in zip(actors, results):
         if verbatim:
-            print("\n\nProjection for ",a,":",p.get_roles(),"\n",p)
-            print("Included,",[e.ActivityName for e in p.InitialIncluded])
-            print("Excluded",[e.ActivityName for e in p.Nodes if e not in p.InitialIncluded])
-            print("Pending,",[e.ActivityName for e in p.InitialPending])
-            print("Executed,",[e.ActivityName for e in p.InitialExecuted])
+            print(description)
+
+        if files is None:
+            report["skipped"].extend(cache.get_files(a))
+            continue
+        writer.add_files(files)
+        generated.append((a, structure_hash, files))
+    written, error = writer.flush()
+
+    for a, structure_hash, files in generated:
+        for fname in files:
+            if fname in written:
+                report[written[fname]].append(fname)
+        # Actors with a file that could not be written are generated again next time.
+        if all(fname in written for fname in files):
+            cache.update(a, structure_hash, files.keys())
+    report["removed"] = cache.remove_stale(actors, [fname for a in actors for fname in cache.get_files(a)])
+    cache.save()
 
-        p.generate_jolie("/output")
+    for status, fnames in report.items():
+        if fnames:
+            print(status.capitalize()+":", ", ".join(fnames))
+    if error is not None:
+        print("Interface files could not be written.")
+        print("ErrorMessage:", error)
+        return
     print("Interface files can be found in the folder 'output'.")
 
+def profiled_main(profile_path, cprofile_path):
+    """ #own
+    Run main with a profiler, and write what it found.
+    :param profile_path: File to write the json report to, - for the console, or None.
+    :param cprofile_path: File to write the cProfile statistics to, or None.
+    """
+    global profiler
+    profiler = DCRProfiler(use_cprofile=cprofile_path is not None)
+    profiler.start()
+    try:
+        main()
+    finally:
+        profiler.stop()
+    if profile_path:
+        profiler.write_report(profile_path)
+    if cprofile_path:
+        profiler.dump_cprofile(cprofile_path)
+
 if __name__ == '__main__':
     # input parameters
     args = cmd_parser.parse_args()
     xml_path = args.xml
-    main()
+    use_snapshot = not args.no_snapshot
+    use_cache = not args.no_cache
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    diagnostics_path = args.diagnostics
+    io_threads = args.io_threads
+    backend_name = args.backend
+    if args.serve:
+        daemon.serve(args.socket, args.port, args.cache_size)
+    elif args.profile or args.cprofile:
+        # The actors are profiled in this process.
+        jobs = 1
+        profiled_main(args.profile, args.cprofile)
+    else:
+        main()
@@ -0,0 +1,119 @@
+# coding=utf-8
+"""
+This module contains streaming readers for event logs, in the XES format or as CSV.
+Traces are read one at a time, so memory grows with the longest trace, not with the size of the log.
+"""
+import csv
+import os
+import xml.etree.ElementTree as Etree
+
+class LogEvent(object):
+    """ #own
+    An event of a trace: the label of the activity that happened, and the role that performed it.
+    """
+    __slots__ = ('Activity', 'Role')
+
+    def __init__(self, activity, role = None):
+        """
+        Constructor for an event.
+        :param activity: Id or name of the activity.
+        :param role: The role that performed the activity, or None if unknown.
+        """
+        self.Activity = activity
+        self.Role = role
+
+    def __eq__(self, other):
+        return isinstance(other, LogEvent) and (self.Activity, self.Role) == (other.Activity, other.Role)
+
+    def __hash__(self):
+        return hash((self.Activity, self.Role))
+
+    def __repr__(self):
+        return "LogEvent({!r}, {!r})".format(self.Activity, self.Role)
+
+def read_event_log(path):
+    """ #own
+    Read an event log, in the format given by the file extension: .xes, or .csv.
+    :param path: Path of the log.
+    :return: Generator of (trace id, [LogEvent]).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xes":
+        return read_xes(path)
+    if ext == ".csv":
+        return read_csv(path)
+    raise ValueError("Unknown event log format: " + path)
+
+def local_name(tag):
+    """
+    Strip the namespace of an XML tag.
+    :param tag: The tag, e.g. '{http://www.xes-standard.org/}trace'.
+    :return: The tag without namespace, e.g. 'trace'.
+    """
+    return tag.rsplit('}', 1)[-1]
+
+def read_xes(path):
+    """ #own
+    Read an XES event log with iterparse. The activity of an event is its concept:name,
+    and the role is its org:role, or org:resource if it has no role. An event without concept:name has the activity None,
+    which no graph has, so it is checked as an unknown activity.
+    Traces without concept:name are numbered from 0, in the order of the log.
+    :param path: Path of the log.
+    :return: Generator of (trace id, [LogEvent]).
+    """
+    stack = []
+    trace_id, events, attributes = None, [], {}
+    n = 0
+    for action, elem in Etree.iterparse(path, events=('start', 'end')):
+        if action == 'start':
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        tag = local_name(elem.tag)
+        parent = local_name(stack[-1].tag) if stack else None
+        if tag == 'event':
+            events.append(LogEvent(attributes.get('concept:name'), attributes.get('org:role', attributes.get('org:resource'))))
+            attributes = {}
+        elif tag == 'trace':
+            yield (trace_id if trace_id is not None else str(n)), events
+            trace_id, events = None, []
+            n += 1
+        elif parent == 'event':
+            attributes[elem.get('key')] = elem.get('value')
+        elif parent == 'trace' and elem.get('key') == 'concept:name':
+            trace_id = elem.get('value')
+
+        # Attributes of the log itself are kept; everything inside a trace has been consumed.
+        if stack and (tag in ('trace', 'event') or parent in ('trace', 'event')):
+            elem.clear()
+            stack[-1].remove(elem)
+
+def read_csv(path):
+    """ #own
+    Read a CSV event log with a header row. The columns used are 'case' (the trace id), 'activity' and,
+    if it is there, 'role'. The events of a trace must be on consecutive rows, in the order they happened.
+    Empty rows are skipped.
+    :param path: Path of the log.
+    :return: Generator of (trace id, [LogEvent]).
+    :raises ValueError: If a row does not have all the columns.
+    """
+    with open(path, newline='') as f:
+        rows = csv.reader(f)
+        header = next(rows, [])
+        case, activity = header.index('case'), header.index('activity')
+        role = header.index('role') if 'role' in header else None
+        n_columns = max(case, activity, -1 if role is None else role) + 1
+        trace_id, events = None, []
+        for row in rows:
+            if not any(field.strip() for field in row):
+                continue
+            if len(row) < n_columns:
+                raise ValueError("Line {} of {} has {} columns, not {}.".format(rows.line_num, path, len(row), n_columns))
+            if row[case] != trace_id:
+                if trace_id is not None:
+                    yield trace_id, events
+                trace_id, events = row[case], []
+            events.append(LogEvent(row[activity], (row[role] or None) if role is not None else None))
+        if trace_id is not None:
+            yield trace_id, events
@@ -0,0 +1,79 @@
+# coding=utf-8
+"""
+The module implements execution of a DCR Graph, on top of the bit mask markings in bitmarking.
+"""
+from bitmarking import DCRMarkingIndex, BitMarking
+
+class DCRExecutor(object):
+    """ #own
+    Executes events of a graph. The condition, milestone and effect masks of every node are computed once,
+    in the DCRMarkingIndex, so queries don't look at the connections of the graph.
+    Markings given to and returned by the executor are not changed by it.
+    """
+
+    def __init__(self, graph):
+        """
+        Constructor for the executor.
+        :param graph: The DCRGraph, or any subclass of it. Changes to the graph after this are not seen.
+        """
+        self.graph = graph
+        self.index = DCRMarkingIndex(graph)
+
+    def initial_marking(self):
+        """
+        Get the initial marking of the graph.
+        :return: BitMarking
+        """
+        return BitMarking.from_graph(self.graph, self.index)
+
+    def enabled_events(self, marking):
+        """
+        Get the events that can be executed in marking.
+        :param marking: BitMarking
+        :return: Set of nodes.
+        """
+        ret = set()
+        for n in self.index.nodes(marking.Included & self.index.LeafMask):
+            if marking.get_blocking(n) == 0:
+                ret.add(n)
+        return ret
+
+    def is_enabled(self, marking, event):
+        """
+        Checks if event can be executed in marking.
+        :param marking: BitMarking
+        :param event: The node.
+        :return: Bool.
+        """
+        return event in self.index.Positions and marking.is_enabled(event)
+
+    def execute(self, marking, event):
+        """
+        Execute event in marking.
+        :param marking: BitMarking
+        :param event: The node.
+        :return: The new BitMarking, frozen if marking is.
+        """
+        if not self.is_enabled(marking, event):
+            raise ValueError("Event {} is not enabled".format(getattr(event, 'ActivityId', event)))
+        return marking.execute(event)
+
+    def execute_trace(self, events, marking = None):
+        """
+        Execute a sequence of events.
+        :param events: Iterable of nodes.
+        :param marking: BitMarking to start from. Default is the initial marking.
+        :return: The BitMarking after the last event.
+        """
+        marking = marking if marking is not None else self.initial_marking()
+        for e in events:
+            marking = self.execute(marking, e)
+        return marking
+
+    def is_accepting(self, marking):
+        """
+        Checks if no included event is pending in marking.
+        :param marking: BitMarking
+        :return: Bool.
+        """
+        return marking.is_accepting()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+This module contains the explorer of the reachable markings of a DCR graph, used to check a choreography,
+or its projections, for deadlocks and liveness.
+"""
+from collections import deque
+
+import cmd_parser
+from executor import DCRExecutor
+from bitmarking import FrozenBitMarking
+from graph import DCRChoreography
+
+class DCRStateSpace(object):
+    """ #own
+    The reachable markings of a graph, and the transitions between them. Markings are numbered in the order they were found,
+    breadth first, so the trace to a marking found by get_trace is a shortest one.
+    """
+
+    def __init__(self, index):
+        """
+        Constructor for the state space.
+        :param index: The DCRMarkingIndex of the graph.
+        """
+        self.index = index
+        # state id -> FrozenBitMarking
+        self.States = []
+        # FrozenBitMarking -> state id
+        self.Ids = {}
+        # state id -> (id of the state it was found from, event), or None for the initial state.
+        self.Parents = []
+        # state id -> [(event, state id)]
+        self.Successors = []
+        # Number of states whose successors have been found. States are expanded in the order of their ids.
+        self.Expanded = 0
+        # False if the exploration stopped at the maximum number of states.
+        self.Complete = True
+
+    def add_state(self, marking, parent):
+        """
+        Add a marking, if it is new.
+        :param marking: FrozenBitMarking
+        :param parent: (state id, event) it was reached by, or None.
+        :return: The state id, and whether the marking is new.
+        """
+        state = self.Ids.get(marking)
+        if state is not None:
+            return state, False
+        state = len(self.States)
+        self.Ids[marking] = state
+        self.States.append(marking)
+        self.Parents.append(parent)
+        self.Successors.append([])
+        return state, True
+
+    def count_transitions(self):
+        """
+        :return: The number of transitions found.
+        """
+        return sum(len(s) for s in self.Successors)
+
+    def get_trace(self, state):
+        """
+        Get a shortest trace from the initial marking to a state.
+        :param state: The state id.
+        :return: [node]
+        """
+        trace = []
+        while self.Parents[state] is not None:
+            state, event = self.Parents[state]
+            trace.append(event)
+        trace.reverse()
+        return trace
+
+    def get_deadlocks(self):
+        """
+        Get the states where no event is enabled, but some included event is pending.
+        Only complete if the exploration is.
+        :return: [state id]
+        """
+        return [s for s, m in enumerate(self.States[:self.Expanded]) if not self.Successors[s] and not m.is_accepting()]
+
+    def get_non_live_states(self):
+        """
+        Get the states from which no accepting marking can be reached.
+        If the exploration is not complete, states that were not expanded count as able to reach one.
+        :return: [state id]
+        """
+        predecessors = [[] for _ in self.States]
+        for s, successors in enumerate(self.Successors):
+            for _, t in successors:
+                predecessors[t].append(s)
+
+        live = [False] * len(self.States)
+        queue = deque()
+        for s, m in enumerate(self.States):
+            if m.is_accepting() or s >= self.Expanded:
+                live[s] = True
+                queue.append(s)
+        while queue:
+            for p in predecessors[queue.popleft()]:
+                if not live[p]:
+                    live[p] = True
+                    queue.append(p)
+        return [s for s in range(len(self.States)) if not live[s]]
+
+    def is_live(self):
+        """
+        Checks if an accepting marking can be reached from every reachable marking.
+        :return: Bool.
+        """
+        return not self.get_non_live_states()
+
+    def get_dead_events(self):
+        """
+        Get the events that are not nests, and are not enabled in any reachable marking.
+        :return: [node], sorted by id.
+        """
+        enabled = {e for successors in self.Successors for e, _ in successors}
+        return [n for n in self.index.Nodes if not n.isNest and n not in enabled]
+
+class DCRStateExplorer(object):
+    """ #own
+    Explores the reachable markings of a graph breadth first, with a visited set of immutable markings.
+    Executed is only kept for events that are the source of a condition, as it doesn't change what happens next
+    for other events. Markings that only differ in it are the same state.
+    """
+
+    def __init__(self, graph, max_states = None):
+        """
+        Constructor for the explorer.
+        :param graph: The DCRGraph, or any subclass of it.
+        :param max_states: Stop expanding states once this many have been found. None for no limit.
+        """
+        self.executor = DCRExecutor(graph)
+        self.index = self.executor.index
+        self.max_states = max_states
+        self.ExecutedMask = 0
+        for mask in self.index.ConditionMask.values():
+            self.ExecutedMask |= mask
+
+    def normalize(self, marking):
+        """
+        Forget what is not needed to tell the state apart.
+        :param marking: BitMarking
+        :return: FrozenBitMarking
+        """
+        return FrozenBitMarking(self.index, marking.Included, marking.PendingResponse, marking.Executed & self.ExecutedMask)
+
+    def explore(self):
+        """
+        Find the reachable markings.
+        :return: DCRStateSpace
+        """
+        positions = self.index.Positions
+        space = DCRStateSpace(self.index)
+        initial, _ = space.add_state(self.normalize(self.executor.initial_marking()), None)
+        queue = deque([initial])
+        while queue:
+            if self.max_states is not None and len(space.States) >= self.max_states:
+                space.Complete = False
+                break
+            state = queue.popleft()
+            space.Expanded += 1
+            marking = space.States[state]
+            for e in sorted(self.executor.enabled_events(marking), key=positions.get):
+                successor, new = space.add_state(self.normalize(marking.execute(e)), (state, e))
+                space.Successors[state].append((e, successor))
+                if new:
+                    queue.append(successor)
+        return space
+
+def print_state_space(name, space):
+    """ #own
+    Print the result of exploring a graph.
+    :param name: What was explored.
+    :param space: DCRStateSpace
+    """
+    names = lambda trace: ", ".join(e.ActivityName for e in trace) or "(initial marking)"
+    print("{}: {} states, {} transitions{}".format(name, len(space.States), space.count_transitions(),
+                                                     "" if space.Complete else " (stopped at the maximum number of states)"))
+    deadlocks = space.get_deadlocks()
+    if deadlocks:
+        print("  Deadlocks: {}. Shortest trace to one: {}".format(len(deadlocks), names(space.get_trace(deadlocks[0]))))
+    non_live = space.get_non_live_states()
+    if non_live:
+        print("  Not live: no accepting marking can be reached after {}".format(names(space.get_trace(non_live[0]))))
+    dead = space.get_dead_events()
+    if dead:
+        print("  Never enabled: " + ", ".join(e.ActivityName for e in dead))
+    if not (deadlocks or non_live or dead):
+        print("  No deadlocks, live, and every event can happen.")
+
+def main():
+    """ #own """
+    try:
+        choreography = DCRChoreography().from_xml(xml_path)
+    except ValueError as e:
+        print("The graph could not be read.")
+        print("ErrorMessage:", e)
+        return
+    except FileNotFoundError:
+        print("Input file not found. Some example files can be found in the folder 'input'.")
+        return
+
+    print_state_space("Choreography", DCRStateExplorer(choreography, max_states).explore())
+    if explore_projections:
+        try:
+            for a in sorted(choreography.get_roles()):
+                print_state_space("Projection for " + a, DCRStateExplorer(choreography.project_for_actor(a), max_states).explore())
+        except AssertionError:
+            print("The projections could not be made, as the graph is not projectable.")
+
+if __name__ == '__main__':
+    # input parameters
+    args = cmd_parser.parse_explorer_args()
+    xml_path = args.xml
+    explore_projections = args.projections
+    max_states = args.max_states if args.max_states > 0 else None
+    main()
@@ -2,12 +2,20 @@
 """
 This module contains the DCR graph representation. It also contains the XML format parsing functionality
 """
+import hashlib
+import io
 import os
-import xml.etree.ElementTree as Etree
 import re
 
-from activity import DCRActivityBase, DCRActivityNest, DCRActivity, DCREndpointActivity, DCRInteractionActivity
+from activity import DCRActivityBase, DCRActivityNest, DCRActivity, DCREndpointActivity, DCRInteractionActivity, intern_roles
 from conn import DCRConnection, Condition, Response, CoResponse, Include, Exclude, Milestone
+from index import DCRGraphIndex, DCRPositionTable
+from dependency import DCRDependencyIndex
+from diagnostics import DCRProjectabilityViolation
+from loader import DCRXMLReader
+from writer import JolieFileWriter, write_file
+from jolie_templates import DEFAULT_BACKEND
+import snapshot
 from collections import defaultdict
 
 class DCRGraph(object):
@@ -18,7 +26,7 @@ class DCRGraph(object):
     # Recursive pretty print of the graph structure
     def str_node(self,node,indent):
         """ #own """
-        return "\n"+"    "*indent+node.str_name()+''.join(["\n"+"    "*(indent)+"<-"+str(c) for c in self.Connections if c.EndNode == node])+''.join(["\n"+"    "*(indent)+"->"+str(c) for c in self.Connections if c.StartNode == node])+" (" + ', '.join([self.str_node(n,indent+1) for n in (node.Activities if node.isNest else [])]) + ")"
+        return "\n"+"    "*indent+node.str_name()+''.join(["\n"+"    "*(indent)+"<-"+str(c) for c in self.get_in_connections(node,False)])+''.join(["\n"+"    "*(indent)+"->"+str(c) for c in self.get_out_connections(node,False)])+" (" + ', '.join([self.str_node(n,indent+1) for n in (node.Activities if node.isNest else [])]) + ")"
 
     def __str__(self):
         """#own
@@ -39,6 +47,8 @@ class DCRGraph(object):
         self.InitialIncluded = set()
         self.InitialPending = set()
         self.InitialExecuted = set()
+        self.Index = None
+        self.Dependencies = None
 
     @classmethod
     def from_xml(cls,xml_path):
@@ -49,6 +59,38 @@ class DCRGraph(object):
         graph.parse(xml_path)
         return graph
 
+    @classmethod
+    def from_snapshot(cls,snapshot_path):
+        """ #own
+        Initiate a DCR graph from a binary snapshot made by save_snapshot.
+        :param snapshot_path: Path of the snapshot.
+        :return: DCRGraph
+        """
+        with open(snapshot_path, "rb") as f:
+            return snapshot.loads(cls(), f.read())
+
+    @classmethod
+    def from_xml_or_snapshot(cls,xml_path,snapshot_path):
+        """ #own
+        Initiate a DCR graph from a snapshot, if it is newer than the XML. Otherwise the XML is parsed,
+        and a new snapshot is saved.
+        :param xml_path: Path of the XML file.
+        :param snapshot_path: Path of the snapshot.
+        :return: DCRGraph
+        """
+        if os.path.exists(snapshot_path) and os.path.getmtime(snapshot_path) >= os.path.getmtime(xml_path):
+            try:
+                return cls.from_snapshot(snapshot_path)
+            except ValueError:
+                pass # Made by another version. Parse the XML and replace it.
+
+        graph = cls.from_xml(xml_path)
+        try:
+            graph.save_snapshot(snapshot_path)
+        except OSError:
+            pass # The snapshot is only a cache.
+        return graph
+
     @classmethod
     def from_data(cls, mapping, activities, connections, included, pending, executed):
         """ #own
@@ -75,26 +117,111 @@ class DCRGraph(object):
 
         return graph
 
+    def save_snapshot(self, snapshot_path):
+        """ #own
+        Save the graph as a binary snapshot, that can be loaded with from_snapshot.
+        :param snapshot_path: Path of the snapshot.
+        """
+        data = snapshot.dumps(self)
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, snapshot_path)
+
+    def get_index(self):
+        """ #own
+        Get the index of nodes and connections. The index is built the first time it is needed,
+        and is kept up to date by add_node, add_connection and collapse.
+        :return: DCRGraphIndex
+        """
+        if self.Index is None:
+            self.Index = DCRGraphIndex(self.Nodes, self.Connections)
+        return self.Index
+
+    def invalidate_index(self):
+        """ #own
+        Drop the index, and the dependency index. Must be called if Nodes or Connections, or the nesting of nodes,
+        are changed without using the methods of the graph.
+        """
+        self.Index = None
+        self.Dependencies = None
+
+    def get_dependency_index(self):
+        """ #own
+        Get the index of direct dependencies. The index is built the first time it is needed,
+        and is dropped when nodes or connections are added or removed.
+        :return: DCRDependencyIndex
+        """
+        if self.Dependencies is None:
+            self.Dependencies = DCRDependencyIndex(self)
+        return self.Dependencies
+
+    def add_node(self, node):
+        """ #own
+        Add a node to the graph.
+        :param node: The node to add.
+        """
+        self.Nodes.add(node)
+        if self.Index is not None:
+            self.Index.add_node(node)
+        self.Dependencies = None
+
+    def add_connection(self, connection):
+        """ #own
+        Add a connection to the graph.
+        :param connection: The connection to add.
+        """
+        self.Connections.add(connection)
+        if self.Index is not None:
+            self.Index.add_connection(connection)
+        self.Dependencies = None
+
+    def remove_node(self, node):
+        """ #own
+        Remove a node from the graph, from its parent nest and from the initial marking.
+        Connections to and from the node must be removed separately. The Parent of node is kept.
+        :param node: The node to remove.
+        """
+        self.Nodes.discard(node)
+        if node.Parent is not None:
+            node.Parent.remove_child_activity(node)
+        self.InitialIncluded.discard(node)
+        self.InitialPending.discard(node)
+        self.InitialExecuted.discard(node)
+        if self.Index is not None:
+            self.Index.remove_node(node)
+        self.Dependencies = None
+
+    def remove_connection(self, connection):
+        """ #own
+        Remove a connection from the graph.
+        :param connection: The connection to remove.
+        """
+        self.Connections.discard(connection)
+        if self.Index is not None:
+            self.Index.remove_connection(connection)
+        self.Dependencies = None
+
     def parse(self, xml_path):
+        """ #modified to read the XML in one streaming pass.
+        Parses a DCR Graph XML file into the graph.
+        :param xml_path: Path of the XML file.
+        """
         # Init XML reader for class
-        dcr_xml = Etree.parse(xml_path)
-        dcr_xml_root = dcr_xml.getroot()
+        dcr_xml = DCRXMLReader(xml_path).read()
 
-        # Start parsing the DCR Graph xml
-        self.parse_label_mapping(dcr_xml_root)
-        self.parse_activities(dcr_xml_root)
-        self.parse_connections(dcr_xml_root)
-        self.parse_initial_marking(dcr_xml_root)
+        # Start building the DCR Graph from what was read.
+        self.parse_label_mapping(dcr_xml)
+        self.parse_activities(dcr_xml)
+        self.parse_connections(dcr_xml)
+        self.parse_initial_marking(dcr_xml)
 
-    def parse_label_mapping(self,dcr_xml_root):
+    def parse_label_mapping(self,dcr_xml):
         """
         In DCR-Graph xml the activity label and id have to be matched to relate them
         :return: a dict with related mappings
         """
-        mappings = {}
-        for mapping in dcr_xml_root.iter('labelMapping'):
-            mappings[mapping.get('eventId')] = mapping.get('labelId')
-        self.Mappings = mappings
+        self.Mappings = dict(dcr_xml.Mappings)
 
     def make_event(self,event_id, event_name):
         """ #own
@@ -106,127 +233,88 @@ class DCRGraph(object):
         """
         return DCRActivity(event_id, event_name)
 
-    def handle_roles(self,node,event):
+    def handle_roles(self,node,roles):
         """ #own
         Handles parsing of roles.
         Made to be overridden in DCRInteractionGraph.
         :param node: The node to add the roles to.
-        :param event: The xml event containing string of the roles.
+        :param roles: The role strings of the xml event. May contain None for empty roles.
         """
-        roles = set()
-        for role in event.iter('role'):
-            if role.text is not None:
-                roles.add(role.text)
-
-        node.set_roles(roles)
+        node.set_roles({role for role in roles if role is not None})
 
 
-    def parse_xml_event(self,event):
+    def parse_xml_event(self,event_id, datatype, roles):
         """ #modified to add datatype and handle roles.
         Adds an event to the graph
-        :param event: The event to be added
+        :param event_id: The id of the event to be added
+        :param datatype: The data type of the event.
+        :param roles: The role strings of the event.
         """
-
-        event_id: str = event.get('id')
         event_name = self.Mappings.get(event_id)
 
         node = self.make_event(event_id, event_name)
 
-        datatype_field = event.find('custom').find('eventData').find('dataType')
-        node.set_datatype( datatype_field.text if datatype_field is not None else "")
+        node.set_datatype(datatype)
 
-        self.handle_roles(node,event)
+        self.handle_roles(node,roles)
 
-        self.Nodes.add(node)
+        self.add_node(node)
 
-    def parse_xml_nest(self, nest):
+    def parse_xml_nest(self, event_id, sub_events):
         """ #modified to handle recursive nesting.
-        Adds a nested activity to the DCR Graph
-        :param nest: The root of the nested activity
+        Adds a nested activity to the DCR Graph. The sub events must have been added already.
+        :param event_id: The id of the nested activity.
+        :param sub_events: The ids of the sub events.
         """
-        sub_events = set()
-        activities = set()
-
-        # First add all sub_events.
-        for event in nest.findall('event'):
-            self.parse_event_or_nest(event)
-            sub_events.add(event.get('id'))
-
-        event_id: str = nest.get('id')
         event_name = self.Mappings.get(event_id)
-        
-        for activity in sub_events:
-            activities.add(self.get_event(activity))
 
-        nest_node = DCRActivityNest(event_id, event_name, activities)
+        activities = {self.get_event(activity) for activity in sub_events}
 
-        self.Nodes.add(nest_node)
+        nest_node = DCRActivityNest(event_id, event_name, activities)
 
-    def parse_event_or_nest(self,event):
-        """ #own
-        Wrapper for parse_xml_nest and parse_xml_event.
-        Determines whether param 'event' is a nest or not, and calls the proper parse function.
-        :param event: The event or event nest to be added.
-        """
-        if len(event.findall('event')) > 0: # If it has children.
-            self.parse_xml_nest(event)
-        else:
-            self.parse_xml_event(event)
+        self.add_node(nest_node)
 
-    def parse_activities(self,dcr_xml_root):
+    def parse_activities(self,dcr_xml):
         """ #modified to handle recursive nesting.
         Only purpose is to get the activities from the DCR Graph XML into the data structure
         :return: None
         """
-        for events in dcr_xml_root.iter('events'):
-            for event in events:
-                self.parse_event_or_nest(event)
+        # Sub events come before their nest.
+        for event_id, datatype, roles, sub_events in dcr_xml.Events:
+            if len(sub_events) > 0: # If it has children.
+                self.parse_xml_nest(event_id, sub_events)
+            else:
+                self.parse_xml_event(event_id, datatype, roles)
     
-    def parse_initial_marking(self,dcr_xml_root):
+    def parse_initial_marking(self,dcr_xml):
         """
         Sets the initial state of the DCR_Graph, which activities are included from the beginning
         """
-        for include in dcr_xml_root.iter('included'):
-            for event in include:
-                event_id = event.get('id')
-                node: DCRActivityBase = self.get_event(event_id)
-                self.InitialIncluded.add(node)
-        for executed_xml in dcr_xml_root.iter('executed'):
-            for event in executed_xml:
-                event_id = event.get('id')
-                node: DCRActivityBase = self.get_event(event_id)
-                self.InitialExecuted.add(node)
-        for pendingResponse in dcr_xml_root.iter('pendingResponses'):
-            for event in pendingResponse:
-                event_id = event.get('id')
-                node: DCRActivityBase = self.get_event(event_id)
-                self.InitialPending.add(node)
-
-    def parse_connections(self,dcr_xml_root):
+        for event_id in dcr_xml.Marking['included']:
+            node: DCRActivityBase = self.get_event(event_id)
+            self.InitialIncluded.add(node)
+        for event_id in dcr_xml.Marking['executed']:
+            node: DCRActivityBase = self.get_event(event_id)
+            self.InitialExecuted.add(node)
+        for event_id in dcr_xml.Marking['pendingResponses']:
+            node: DCRActivityBase = self.get_event(event_id)
+            self.InitialPending.add(node)
+
+    def parse_connections(self,dcr_xml):
         """
         Creates all constraints (connections) of a DCR Graph from the XML
         :return: None
         """
-        for constraint in dcr_xml_root.iter('constraints'):
+        for connection_tag, connection_source, connection_destination in dcr_xml.Connections:
 
-            for constraint_type in constraint:
+            source_node = self.get_event(connection_source)
+            target_event = self.get_event(connection_destination)
 
-                for connection in constraint_type:
+            connection_type = DCRConnection.get_connection_type(connection_tag)
 
-                    connection_source = connection.get('sourceId')
+            dcr_connection = DCRConnection.create_connection(source_node, target_event, connection_type)
 
-                    connection_destination = connection.get('targetId')
-
-                    source_node = self.get_event(connection_source)
-                    target_event = self.get_event(connection_destination)
-
-                    connection_type = DCRConnection.get_connection_type(connection.tag)
-
-                    dcr_connection = None
-
-                    dcr_connection = DCRConnection.create_connection(source_node, target_event, connection_type)
-
-                    self.Connections.add(dcr_connection)
+            self.add_connection(dcr_connection)
 
     def get_sub_nodes(self, node):
         """ #own
@@ -258,9 +346,7 @@ class DCRGraph(object):
         :param node_id:The node id which is located
         :return: A DCRActivityBase object
         """
-        for node in self.Nodes:
-            if node.ActivityId == node_id:
-                return node
+        return self.get_index().get_node(node_id)
 
 
     def get_dependees_l(self,nodes):
@@ -276,26 +362,14 @@ class DCRGraph(object):
 
     #dependee is an agent that is depended on by a depender
     def get_direct_dependees(self,node):
-        """ #own
+        """ #modified
         Returns all nodes that node depends on.
+        e' is a dependee of e if e' == e, e' ->? e (any relation), e' ->+/% e'' ->C/M e or e' ->R e'' ->M e,
+        where e' stands for all sub nodes, and e for all ancestors. The dependees are looked up in the dependency index.
         :param node: The node for which to get dependees.
         :return: [DRCActivityBase]
         """
-        # if e' == e
-        ret = {node} # every node is a dependee of itself.
-
-        for a in self.get_in_connections(node):
-            # if e' ->? e (any relation)
-            ret.update(self.get_sub_nodes(a.StartNode)) # There is a connection from e to node
-            # We also need to look at the previous relation
-            if type(a) in [Condition, Milestone]:
-                for a_prev in self.get_in_connections(a.StartNode):
-                    # if e' ->+/% e'' ->C/M e
-                    if (type(a_prev) in [Include, Exclude] and type(a) in [Condition, Milestone] or
-                        # if e' ->R   e'' ->M   e
-                        type(a_prev) == Response and type(a) == Milestone):
-                        ret.update(self.get_sub_nodes(a_prev.StartNode)) #get_sub_nodes here. Since it's all subnodes.
-        return ret
+        return self.get_dependency_index().get_direct_dependees(node)
 
     def get_dependers_l(self,nodes):
         """ #own
@@ -303,33 +377,20 @@ class DCRGraph(object):
         :param nodes: The nodes for which to get dependencies.
         :return: [DCRActivityBase]
         """
-        ret = set
+        ret = set()
         for node in nodes:
             ret.update(self.get_direct_dependers(node))
         return ret
 
     def get_direct_dependers(self,node):
-        """ #own
+        """ #modified
         Returns all direct dependencies of node.
+        e is a direct depender of e' if e == e', e' ->? e (any relation), e' ->+/% e'' ->C/M e or e' ->R e'' ->M e,
+        where e stands for all sub nodes, and e' for all ancestors. The dependers are looked up in the dependency index.
         :param node: The node for which to get dependencies.
         :return: [DCRActivityBase]
         """
-        # if e' == e
-        ret = {node} # Every node is a direct dependency of itself.
-
-        for a in self.get_out_connections(node):
-            # if e' ->? e (any relation)
-            ret.update(self.get_sub_nodes(a.EndNode)) # There is a connection from node to e
-
-            # We also need to look at the next relation.
-            if type(a) in [Exclude, Include, Response]:
-                for a_next in self.get_out_connections(a.EndNode):
-                    # if e' ->+/% e'' ->C/M e
-                    if (type(a) in [Include, Exclude] and type(a_next) in [Condition, Milestone] or
-                        # if e' ->R   e'' ->M   e
-                        type(a) == Response and type(a_next) == Milestone):
-                        ret.update(self.get_sub_nodes(a_next.EndNode))
-        return ret 
+        return self.get_dependency_index().get_direct_dependers(node)
 
     def get_in_connections(self,node:DCRActivityBase, include_ancestors = True,ctypes = []):
         """ #own
@@ -338,8 +399,13 @@ class DCRGraph(object):
         :param include_ancestors: Whether or not to include incoming connections to parent nests. Default is true.
         :param ctypes: Restrict type of connections to look for. Default is None = any type.
         """
-        nodes = node.get_ancestors().union({node}) if include_ancestors else {node}
-        return {c for c in self.Connections if c.EndNode in nodes and (ctypes == [] or type(c) in ctypes)}
+        index = self.get_index()
+        ret = index.get_in(node, ctypes)
+        if include_ancestors:
+            # The ancestors are cached on the node.
+            for n in node.get_ancestors():
+                ret.update(index.get_in(n, ctypes))
+        return ret
 
     def get_out_connections(self,node:DCRActivityBase, include_ancestors = True, ctypes = []):
         """ #own
@@ -348,33 +414,94 @@ class DCRGraph(object):
         :param include_ancestors: Whether or not to include outgoing connections from parent nests. Default is true.
         :param ctypes: Restrict type of connections to look for. Default is None = any type.
         """
-        nodes = node.get_ancestors().union({node}) if include_ancestors else {node}
-        return {c for c in self.Connections if c.StartNode in nodes and (ctypes == [] or type(c) in ctypes)}
+        index = self.get_index()
+        ret = index.get_out(node, ctypes)
+        if include_ancestors:
+            # The ancestors are cached on the node.
+            for n in node.get_ancestors():
+                ret.update(index.get_out(n, ctypes))
+        return ret
 
-    def collapse(self):
+    def get_connections_to(self, nodes, ctypes = []):
         """ #own
+        Gets the connections going directly to any node in nodes. Incoming connections to parent nests are not included.
+        :param nodes: The nodes.
+        :param ctypes: Restrict type of connections to look for. Default is None = any type.
+        """
+        index = self.get_index()
+        return set().union(*(index.get_in(n, ctypes) for n in nodes))
+
+    def get_nodes_below(self, nodes):
+        """ #own
+        Returns nodes, and all nodes nested under them, at any depth.
+        :param nodes: The nodes.
+        :return: [DCRActivityBase]
+        """
+        ret = set()
+        todo = list(nodes)
+        while todo:
+            n = todo.pop()
+            if n not in ret:
+                ret.add(n)
+                if n.isNest:
+                    todo.extend(n.Activities)
+        return ret
+
+    def collapse(self):
+        """ #modified to collapse all nests in one pass, from the top.
         Collapses nests of activities, if they have only one child, or no connections.
+        A nest is decided after its parent, so it is decided with the connections it got from a collapsed parent,
+        and chains of nests are collapsed completely. Every node is visited once, and every connection moved once.
         """
 
         # It's safe to remove a nest if it has only one child and possibly connections OR if it has no connections and possibly several children.
         # But not if it has connections and more than one child.
-        collapsed = set()
-        for e in self.Nodes:
-            if e.isNest and (len(e.Activities) == 1 or self.get_in_connections(e,False) == set() and self.get_out_connections(e,False) == set()):
-                for c in e.Activities:
-                    c.Parent = e.Parent
-                    if c.Parent is not None:
-                        c.Parent.Activities.discard(e)
-                        c.Parent.Activities.add(c)
-
-                    # e either has exactly one child, or no connections.
-                    for con in self.get_in_connections(e,False):
-                        con.EndNode = c
-                    for con in self.get_out_connections(e,False):
-                        con.StartNode = c
-            else:
-                collapsed.add(e)
-        self.Nodes = collapsed
+        index = self.get_index()
+        # nest -> number of connections to and from it, including those it got from collapsed parents.
+        n_connections = {}
+        # Collapsed nests with connections, in the order they were collapsed, and the child their connections go to.
+        moved = []
+        removed = set()
+
+        todo = [n for n in self.Nodes if n.Parent is None]
+        while todo:
+            e = todo.pop()
+            if not e.isNest:
+                continue
+            children = list(e.Activities)
+            todo.extend(children)
+            n = n_connections.get(e, 0) + len(index.get_in(e)) + len(index.get_out(e))
+            if len(children) == 1 or n == 0:
+                # The parent has been decided, and is kept. The nesting caches are dropped at the end, all at once.
+                parent = e.Parent
+                for c in children:
+                    c.Parent = parent
+                if parent is not None:
+                    parent.Activities.discard(e)
+                    parent.Activities.update(children)
+                if n > 0:
+                    # e has exactly one child.
+                    n_connections[children[0]] = n_connections.get(children[0], 0) + n
+                    moved.append((e, children[0]))
+                removed.add(e)
+
+        # The connections of a nest go to the node they end up at, past the nests collapsed under it.
+        # Nests collapsed later are further down, so going backwards, that node is known for the child.
+        targets = {}
+        for e, c in reversed(moved):
+            targets[e] = targets.get(c, c)
+            for con in index.get_in(e):
+                index.set_end_node(con, targets[e])
+            for con in index.get_out(e):
+                index.set_start_node(con, targets[e])
+
+        for e in removed:
+            index.remove_node(e)
+        if removed:
+            self.Nodes = {n for n in self.Nodes if n not in removed}
+            for n in self.Nodes:
+                n.clear_nesting_cache()
+        self.Dependencies = None
 
 class DCRInteractionGraph(DCRGraph):
     """ #own
@@ -461,21 +588,108 @@ class DCRChoreography(DCRInteractionGraph):
     A DCRInteractionGraph extended with initiators and receivers, and projections.
     """
 
+    def __init__(self):
+        super().__init__()
+        self.RoleIndex = None
+        self.PositionTable = None
+
+    def invalidate_index(self):
+        """ #own
+        Override of DCRGraph invalidate_index, that also drops the index of interactions by role, and the position table.
+        """
+        super().invalidate_index()
+        self.RoleIndex = None
+        self.PositionTable = None
+
+    def add_node(self, node):
+        """ #own
+        Override of DCRGraph add_node, that also drops the index of interactions by role, and the position table.
+        :param node: The node to add.
+        """
+        super().add_node(node)
+        self.RoleIndex = None
+        self.PositionTable = None
+
+    def remove_node(self, node):
+        """ #own
+        Override of DCRGraph remove_node, that also drops the index of interactions by role, and the position table.
+        :param node: The node to remove.
+        """
+        super().remove_node(node)
+        self.RoleIndex = None
+        self.PositionTable = None
+
+    def add_connection(self, connection):
+        """ #own
+        Override of DCRGraph add_connection, that also drops the position table.
+        :param connection: The connection to add.
+        """
+        super().add_connection(connection)
+        self.PositionTable = None
+
+    def remove_connection(self, connection):
+        """ #own
+        Override of DCRGraph remove_connection, that also drops the position table.
+        :param connection: The connection to remove.
+        """
+        super().remove_connection(connection)
+        self.PositionTable = None
+
+    def get_position_table(self):
+        """ #own
+        Get the numbering of nodes and connections that projection views refer to them by. It is made once, and shared by all views.
+        :return: DCRPositionTable
+        """
+        if self.PositionTable is None:
+            self.PositionTable = DCRPositionTable(self.Nodes, self.Connections)
+        return self.PositionTable
+
+    def get_role_index(self):
+        """ #own
+        Get the interactions of the choreography grouped by role. The grouping is made once, and reused for all actors.
+        :return: Two dicts from role to interactions. The first is for initiators, the second for receivers.
+        """
+        if self.RoleIndex is None:
+            initiated = defaultdict(set)
+            received = defaultdict(set)
+            for e in self.get_interactions():
+                initiated[e.initiator].add(e)
+                for r in e.receivers:
+                    received[r].add(e)
+            self.RoleIndex = (dict(initiated), dict(received))
+        return self.RoleIndex
+
+    def get_initiated_by(self, actor):
+        """ #own
+        Get the interactions that actor initiates.
+        :param actor: The actor.
+        :return: [DCRInteractionActivity]
+        """
+        return self.get_role_index()[0].get(actor, set())
+
+    def get_received_by(self, actor):
+        """ #own
+        Get the interactions that actor receives.
+        :param actor: The actor.
+        :return: [DCRInteractionActivity]
+        """
+        return self.get_role_index()[1].get(actor, set())
+
     # Override to handle roles correctly.
-    def handle_roles(self,node,event):
+    def handle_roles(self,node,roles):
         """
         Override parsing of roles to include initiator, receiver, user and service.
         All roles must be prefixed with S: ( S for sender/initiator) or R: (R for receiver),
         and optionally also S: (for service) or U: (for user.) Default is service.
         :param node: The node that roles should be added to.
-        :param event: The XML-event to be parsed.
+        :param roles: The role strings of the XML-event to be parsed.
         """
-        roles = set()
+        role_names = set()
         initiator = None
         receivers = set()
-        for role in event.iter('role'):
-            if role.text is not None:
-                match =  re.match("^(S|R):((U|S):)?([^+]+$)",role.text)
+        for role_text in roles:
+            if role_text is not None:
+                match =  re.match("^(S|R):((U|S):)?([^+]+$)",role_text)
                 if match:
                     ms = match.groups()
 
@@ -490,15 +704,15 @@ class DCRChoreography(DCRInteractionGraph):
                     # Add role to Users or Services. Assume Service if no indicator.
                     (self.Users if ms[1] == "U:" else self.Services).add(ms[3])
                     
-                    roles.add(ms[3])
+                    role_names.add(ms[3])
 
                 else:
-                    raise ValueError("Role "+role.text+" is not well formed.")
+                    raise ValueError("Role "+role_text+" is not well formed.")
 
         if initiator is None or receivers == set():
             raise ValueError("Choreography activities must have one sender and at least one receiver.")
         node.set_initiator_and_receivers(initiator, receivers)
-        node.set_roles(roles)
+        node.set_roles(role_names)
 
     def is_projectable(self):
         """
@@ -522,24 +736,51 @@ class DCRChoreography(DCRInteractionGraph):
         :param actor: Actor for which to determine projectability.
         :return: Bool. True if the choreography is projectable for actor, otherwise false.
         """
-        return self.is_projectable_for_actors([actor],[e for e in self.get_interactions() if e.initiator == actor])
+        return self.is_projectable_for_actors([actor],self.get_initiated_by(actor))
 
     def is_projectable_for_actors(self, actors, delta):
-        """
+        """ #modified
         Determines whether the choreography instance is projectable for a set of actors and a set of events.
         A choreography is projectable if the initiator of an event e is involved, as initiator or receiver, in all events for which there is a direct dependency to e.
         :param actors: Set of actors for which to determine projectability.
         :param delta: Set of events for which to determine projectability.
         :return: Bool. True if the choreography is projectable for delta, otherwise false.
         """
+        # Stop at the first violation. get_projectability_violations finds all of them.
+        for violation in self.iter_projectability_violations(actors, delta):
+            print("Warning: The graph is not projectable, as there is a direct dependency from",violation.Action.ActivityName,"to",violation.Depender.ActivityName, "and",violation.Initiator,"not in",violation.Participants)
+            return False
+        return True
+
+    def iter_projectability_violations(self, actors, delta):
+        """ #own
+        Generates the direct dependencies that make the choreography not projectable for a set of actors and a set of events.
+        :param actors: Set of actors for which to determine projectability.
+        :param delta: Set of events for which to determine projectability.
+        :return: Generator of DCRProjectabilityViolation.
+        """
         # make sure that for every interaction, the initiator of an event is present in the previous interaction as either initiator or receiver.
+        # The dependers are looked up in the dependency index, which is shared by all actors and projections.
+        dependencies = self.get_dependency_index()
         for action in delta:
             if action.initiator in actors:
-                for dp in self.get_direct_dependers(action):
-                   if not dp.initiator in action.receivers.union({action.initiator}):
-                        print("Warning: The graph is not projectable, as there is a direct dependency from",action.ActivityName,"to",dp.ActivityName, "and",dp.initiator,"not in",action.receivers.union({action.initiator}))
-                        return False
-        return True
+                # A set, not a frozenset as the receivers are, so that the warning reads as it always has.
+                participants = {action.initiator}.union(action.receivers)
+                for dp in dependencies.get_direct_dependers(action):
+                    if not dp.initiator in participants:
+                        yield DCRProjectabilityViolation(action, dp, participants)
+
+    def get_projectability_violations(self, actors = None, delta = None):
+        """ #own
+        Get all direct dependencies that make the choreography not projectable, in one pass over the interactions.
+        :param actors: Set of actors to check. Default is all roles.
+        :param delta: Set of events to check. Default is all interactions.
+        :return: [DCRProjectabilityViolation], sorted by the ids of action and depender. Empty if the choreography is projectable.
+        """
+        actors = self.get_roles() if actors is None else actors
+        delta = self.get_interactions() if delta is None else delta
+        return sorted(self.iter_projectability_violations(actors, delta),
+                      key=lambda v: (v.Action.ActivityId, v.Depender.ActivityId))
 
     def project(self):
         """
@@ -548,10 +789,129 @@ class DCRChoreography(DCRInteractionGraph):
         """
         return [self.project_for_actor(a) for a in self.get_roles()]
 
-    def add_event(self,event_set,actor,event):
+    def get_participants(self, events):
+        """ #own
+        Get the initiators and receivers of events.
+        :param events: Set of (non-nest) events.
+        :return: [string]
+        """
+        ret = set()
+        for e in events:
+            ret.add(e.initiator)
+            ret.update(e.receivers)
+        return ret
+
+    def get_actors_affected_by_event(self, node):
+        """ #own
+        Get the actors whose projection may change if node is added, removed, or its initial marking changes.
+        Those are the participants of the events under node, which have them in their projection, and the initiators
+        of the events those events depend on, as the events become direct dependers of them.
+        Must be called on the choreography that contains node.
+        :param node: The event or nest.
+        :return: [string]
         """
+        ret = set()
+        for e in self.get_sub_nodes(node):
+            ret.update(self.get_participants({e}))
+            ret.update(d.initiator for d in self.get_dependees_l({e}) if not d.isNest)
+        return ret
+
+    def get_actors_affected_by_connection(self, connection):
+        """ #own
+        Get the actors whose projection may change if connection is added or removed.
+        Those are the initiators of the events that depend on the end of the connection, which may get the connection
+        in their projection, and the initiators of the events that the start of the connection depends on,
+        as their direct dependers change.
+        Must be called on the choreography that contains connection.
+        :param connection: The connection.
+        :return: [string]
+        """
+        affected = self.get_sub_nodes(connection.EndNode)
+        for d in self.get_direct_dependers(connection.EndNode):
+            affected.update(self.get_sub_nodes(d))
+        affected.update(self.get_dependees_l(self.get_sub_nodes(connection.StartNode)))
+        return {e.initiator for e in affected if not e.isNest}
+
+    def apply_change(self, change):
+        """ #own
+        Apply a change to the choreography.
+        :param change: DCRChoreographyChange
+        :return: The actors whose projections may have changed.
+        """
+        affected = set()
+
+        # Roles that change classification change the participants of other projections.
+        # A role is either a user or a service, so it is taken out of the other set.
+        for roles, classified, other in [(change.Users, self.Users, self.Services), (change.Services, self.Services, self.Users)]:
+            for role in roles.difference(classified):
+                if role in self.get_roles():
+                    affected.update(self.get_roles())
+                affected.add(role)
+                classified.add(role)
+                other.discard(role)
+
+        # Removals are looked up while the removed parts are still in the choreography.
+        removed_connections = set(change.RemovedConnections)
+        for e in change.RemovedEvents:
+            for n in self.get_nodes_below({e}):
+                removed_connections.update(self.get_in_connections(n, False))
+                removed_connections.update(self.get_out_connections(n, False))
+        for c in removed_connections:
+            affected.update(self.get_actors_affected_by_connection(c))
+        for e in change.RemovedEvents:
+            affected.update(self.get_actors_affected_by_event(e))
+
+        for c in removed_connections:
+            self.remove_connection(c)
+        for e in change.RemovedEvents:
+            for n in self.get_nodes_below({e}):
+                self.remove_node(n)
+
+        # Additions are looked up when the added parts are in the choreography.
+        for e in change.AddedEvents:
+            if e.Parent is not None:
+                e.Parent.add_child_activity(e)
+            self.add_node(e)
+        for c in change.AddedConnections:
+            self.add_connection(c)
+
+        for e in change.AddedEvents:
+            affected.update(self.get_actors_affected_by_event(e))
+        for c in change.AddedConnections:
+            affected.update(self.get_actors_affected_by_connection(c))
+
+        for e, (included, pending, executed) in change.Marking.items():
+            for marking, marked in [(self.InitialIncluded, included), (self.InitialPending, pending), (self.InitialExecuted, executed)]:
+                if marked:
+                    marking.add(e)
+                else:
+                    marking.discard(e)
+            # The marking is only projected for events in the projection.
+            affected.update(self.get_participants(self.get_sub_nodes(e)))
+
+        return affected
+
+    def reproject(self, projections, change):
+        """ #own
+        Apply a change to the choreography, and rebuild only the projections that are affected by it.
+        :param projections: Dict from actor to the projections of the choreography before the change.
+        :param change: DCRChoreographyChange
+        :return: Dict from actor to projection. Projections that are not affected are the same objects as before.
+        """
+        affected = self.apply_change(change)
+
+        ret = {}
+        for a in self.get_roles():
+            if a in affected or a not in projections:
+                ret[a] = self.project_for_actor(a)
+            else:
+                ret[a] = projections[a]
+        return ret
+
+    def add_event(self,new_events,actor,event):
+        """ #modified to use a map from ids to new events.
         Recursively an event to a projection.
-        :param event_set: A set of events that have already been added.
+        :param new_events: A dict from ActivityId to the events that have already been added.
         :param actor: The role of the end-point.
         :param event: The event to be added.
         """
@@ -559,9 +919,8 @@ class DCRChoreography(DCRInteractionGraph):
         activity_id = event.ActivityId
 
         # If the event has been added already, just return it.
-        for e in event_set:
-            if activity_id == e.ActivityId:
-                return e
+        if activity_id in new_events:
+            return new_events[activity_id]
 
         # Else make a new activity.        
         ne = None
@@ -578,38 +937,46 @@ class DCRChoreography(DCRInteractionGraph):
  
         # If old event has a parent, add or find parent, then add new event as its child.
         if event.Parent is not None:
-            parent = self.add_event(event_set,actor, event.Parent)
+            parent = self.add_event(new_events,actor, event.Parent)
             parent.add_child_activity(ne)
 
         ne.set_roles(event.Roles.copy())
 
-        event_set.add(ne)
+        new_events[activity_id] = ne
 
         return ne
 
-    def get_new_event(self, set, node):
+    def get_new_event(self, new_events, node):
         """
         Get an event that may aldready have been added.
-        :param set: The set of new events.
+        :param new_events: A dict from ActivityId to the new events.
         :param node: The event which may have been added.
         :return: The new node or None if the node has not yet been added.
         """
-        return next((e for e in set if e.ActivityId == node.ActivityId), None)
+        return new_events.get(node.ActivityId)
 
 
     def project_for_actor(self,actor):
-        """
+        """ #modified to materialize the view of the projection.
         Make end-point projection for an actor.
         :param actor: The actor for which to make a projection.
         :return: The projection for actor.
         """
+        return self.project_view_for_actor(actor).materialize()
+
+    def project_view_for_actor(self,actor):
+        """ #modified from project_for_actor to make a view, instead of copying the events and connections.
+        Make end-point projection for an actor, as a view of the choreography.
+        :param actor: The actor for which to make a projection.
+        :return: DCRProjectionView for actor.
+        """
 
         if not self.is_projectable_for_actor(actor):
             raise AssertionError("Choreography is not projecable for "+actor+".")
 
         # delta is the set of events for which r is the initiator. (And their parent nests.)
         delta = set()
-        for e in [e for e in self.get_interactions() if actor == e.initiator]:
+        for e in self.get_initiated_by(actor):
                 delta.add(e)
                 delta.update(e.get_ancestors())
         
@@ -626,19 +993,23 @@ class DCRChoreography(DCRInteractionGraph):
         Re_d = {a for a in self.InitialPending if a in E_d}
 
         # 2.c)
+        # The connections are looked up in the index, where they are grouped by end node and type once per choreography.
+        cond_to_d = self.get_connections_to(delta, [Condition])
+        mil_to_d =  self.get_connections_to(delta, [Milestone])
+        resp_to_d = self.get_connections_to(delta, [Response])
+        cresp_to_d = self.get_connections_to(delta, [CoResponse])
+        inc_to_d =  self.get_connections_to(delta, [Include])
+        exc_to_d =  self.get_connections_to(delta, [Exclude])
+
+        mil_to_d_starts = {c.StartNode for c in mil_to_d}
+        cond_or_mil_to_d_starts = mil_to_d_starts.union({c.StartNode for c in cond_to_d})
+
         # t = d U (events that have conds or milestones to events in d)
-        t = delta.union({e for e in self.Nodes if [c for c in self.get_out_connections(e,ctypes=[Condition, Milestone]) if c.EndNode in delta] != [] })
+        # An event also has the connections of its parent nests, so events nested under a start node are in t as well.
+        t = delta.union(self.Nodes.intersection(self.get_nodes_below(cond_or_mil_to_d_starts)))
         # (In intersected with t) U E_d\t
         In_d = (self.InitialIncluded.intersection(t)).union(E_d.difference(t))
 
-        # Now for the connections
-        cond_to_d = {c for c in self.Connections if type(c) == Condition and c.EndNode in delta}
-        mil_to_d =  {c for c in self.Connections if type(c) == Milestone and c.EndNode in delta}
-        resp_to_d = {c for c in self.Connections if type(c) == Response  and c.EndNode in delta}
-        cresp_to_d = {c for c in self.Connections if type(c) == CoResponse  and c.EndNode in delta}
-        inc_to_d =  {c for c in self.Connections if type(c) == Include   and c.EndNode in delta}
-        exc_to_d =  {c for c in self.Connections if type(c) == Exclude   and c.EndNode in delta}
-
         # 5. Condition relations to events in delta.
         Conds = cond_to_d
 
@@ -649,28 +1020,28 @@ class DCRChoreography(DCRInteractionGraph):
         # responses to events that have milestones to events in d
         # U
         # (response relations to events in d))
-        resp_to_mil_to_d = {c for c in self.Connections if type(c) == Response and c.EndNode in {c.StartNode for c in mil_to_d}}
+        resp_to_mil_to_d = self.get_connections_to(mil_to_d_starts, [Response])
 
         Resps = resp_to_d.union(resp_to_mil_to_d)
 
-        cresp_to_mil_to_d = {c for c in self.Connections if type(c) == CoResponse and c.EndNode in {c.StartNode for c in mil_to_d}}
+        cresp_to_mil_to_d = self.get_connections_to(mil_to_d_starts, [CoResponse])
         Cresps = cresp_to_d.union(cresp_to_mil_to_d)
 
         # 8. Includes.
         #includes to conds to delta U includes to mils to delta U includes to delta
-        inc_to_mil_or_cond_to_d = {c for c in self.Connections if type(c) == Include and c.EndNode in {c.StartNode for c in cond_to_d.union(mil_to_d)}}
+        inc_to_mil_or_cond_to_d = self.get_connections_to(cond_or_mil_to_d_starts, [Include])
 
         Incls = inc_to_d.union(inc_to_mil_or_cond_to_d)
 
         # 9. Excludes.
-        exc_to_mil_or_cond_to_d = {c for c in self.Connections if type(c) == Exclude and c.EndNode in {c.StartNode for c in cond_to_d.union(mil_to_d)}}        
+        exc_to_mil_or_cond_to_d = self.get_connections_to(cond_or_mil_to_d_starts, [Exclude])
 
         Excls = exc_to_d.union(exc_to_mil_or_cond_to_d)
 
         # That was the delta projection. Now on the end-point projection
 
         # E'
-        E_p = {e for e in self.get_interactions() if actor in e.receivers}
+        E_p = self.get_received_by(actor)
 
         E_d_U_E_p = delta.union(E_p)
 
@@ -686,87 +1057,81 @@ class DCRChoreography(DCRInteractionGraph):
         users = set()
         services = set()
 
-        # Make the new events.
-        activities = set()
+        # The events of the projection are those of E_d_U_E_p and their parent nests.
+        events = set(E_d_U_E_p)
         for e in E_d_U_E_p:
-            self.add_event(activities, actor, e)
+            events.update(e.get_ancestors())
 
             if not e.isNest:
                 (users if e.initiator in self.Users else services).add(e.initiator)
                 for r in e.receivers:
                     (users if r in self.Users else services).add(r)
 
-        connections = set()
-        for c in Conds.union(Miles).union(Resps).union(Cresps).union(Incls).union(Excls):
-            start = self.get_new_event(activities, c.StartNode)
-            end   = self.get_new_event(activities, c.EndNode)
-            connections.add(DCRConnection.create_connection(start, end, type(c)))
+        connections = Conds.union(Miles).union(Resps).union(Cresps).union(Incls).union(Excls)
 
-        Executed = {self.get_new_event(activities, e) for e in Ex_d             if e.ActivityId in [e.ActivityId for e in activities]}
-        Pending =  {self.get_new_event(activities, e) for e in Re_d             if e.ActivityId in [e.ActivityId for e in activities]}
-        Included = {self.get_new_event(activities, e) for e in In_d.union(In_p) if e.ActivityId in [e.ActivityId for e in activities]}
+        # 3. and 4. The labelling is made when the view is materialized.
+        return DCRProjectionView(self, actor, events, connections,
+                                 events.intersection(In_d.union(In_p)), events.intersection(Re_d), events.intersection(Ex_d),
+                                 users, services)
 
-        # 3. and 4.
-        mapping = {}        
-        for e in activities:
-            mapping[e.ActivityId] = e.ActivityName
-
-        # Return the finished projection.
-        return DCRProjection().from_data(actor,mapping, activities, connections, Included, Pending, Executed,users,services)
-
-
-
-class DCRProjection(DCRInteractionGraph):
+class DCRJolieGenerator(object):
     """ #own
-    End-point projection.
-    Projections are like choreographies, in that they have senders and receivers,
-    but you can't make a projection from them.
+    Generation of the Jolie interfaces and service of an end-point projection, from its actor, Users and interactions.
+    Shared by DCRProjection and DCRProjectionView, so that a view makes the same files without being materialized.
     """
+    __slots__ = ()
 
-    @classmethod
-    def from_data(cls, actor, mapping, activities, connections, included, pending, executed,users,services,collapse = True):
-        """
-        Makes a projectioni graph from data.
-        :param actor: The actor of the projection.
-        :param mapping: The mapping of labels to events.
-        :param activities: A list of activities.
-        :param connections: A list of connections.
-        :param included: Part of the marking. Included events.
-        :param pending: Part of the marking. Pending events.
-        :param executed: Part of the marking. Executed events.
-        :param users: List of roles that are classified as Users.
-        :param services: List roles that are classified as Services.
-        :param collapse: Whether or not to remove unnecessary nests from actions. Default is True.
-        :return: DCRInteractionGraph
-        """
-        graph = super().from_data(mapping, activities, connections, included, pending, executed,users,services,collapse)
-        
-        graph.actor = actor
-
-        return graph
+    # Change when the generated Jolie changes, so that cached output is generated again.
+    JOLIE_FORMAT_VERSION = 1
 
+    # DCR data type -> Jolie data type. Other data types are CUSTOM.
+    JOLIE_DATATYPES = {'text': 'string', 'float': 'double', 'void': 'void', 'bool': 'bool', 'int': 'int', 'long': 'long',
+                       'raw': 'raw', 'any': 'any'}
 
-    def __init__(self):
-        super().__init__()
-        self.Users = set()
-        self.Services = set()
+    def get_receivers(self, e):
+        """ #own
+        Get the receivers of an interaction, as the projection knows them.
+        :param e: The interaction.
+        :return: Set of roles.
+        """
+        return e.receivers
 
-    def gen_port(self, is_input, from_service, to_service):
+    def get_structure_hash(self, backend = DEFAULT_BACKEND):
+        """ #own
+        Hash of everything the generated Jolie depends on: the backend, the actor, whether it is a user, and the interactions.
+        :param backend: The JolieBackend the Jolie is generated with.
+        :return: String of the hex digest.
         """
+        structure = (self.JOLIE_FORMAT_VERSION, backend.Name, self.actor, self.actor in self.Users,
+                     sorted((e.ActivityId, e.ActivityName, str(e.datatype), e.initiator, sorted(self.get_receivers(e))) for e in self.get_interactions()))
+        return hashlib.sha256(repr(structure).encode("utf-8")).hexdigest()
+
+    def gen_port(self, is_input, from_service, to_service, backend = DEFAULT_BACKEND):
+        """ #modified to render the port template of a backend.
         Generate a Jolie communication port.
         :param is_input: Whether the port is an input- or output port.
         :param from_service: Name of the service the port is from.
         :param to_service: Name of the service the port is to.
+        :param backend: The JolieBackend to generate with.
         :return: String containing the communication port.
         """
-
-        ret = ""
-        ret += "\t"+("in" if is_input else "out")+"putPort "+("in"+from_service if is_input else "out"+to_service)+"Service {\n"
-        ret += "\t\tlocation: \"socket://localhost:port_of_"+("out" if is_input else "in")+"putPort_'"+("out"+to_service if is_input else "in"+from_service)+"Service'_in_"+(from_service if is_input else to_service)+"\"\n"
-        ret += "\t\tprotocol: http { format = \"json\"}\n"
-        ret += "\t\tinterfaces: "+self.gen_interface_name(from_service,to_service)+"\n" # FIXME Why is it interfaceS?
-        ret += "\t}\n\n"
-        return ret
+        location = backend.Location.render(peer_direction="out" if is_input else "in",
+                                           peer_name="out"+to_service if is_input else "in"+from_service,
+                                           service=from_service if is_input else to_service)
+        return backend.Port.render(direction="in" if is_input else "out", name="in"+from_service if is_input else "out"+to_service,
+                                   location=location, protocol=backend.Protocol,
+                                   interface=self.gen_interface_name(from_service,to_service)) # FIXME Why is it interfaceS?
+
+    def emit_port(self, out, is_input, from_service, to_service, backend = DEFAULT_BACKEND):
+        """ #own, from gen_port.
+        Write a Jolie communication port.
+        :param out: The file, or io.StringIO, to write to.
+        :param is_input: Whether the port is an input- or output port.
+        :param from_service: Name of the service the port is from.
+        :param to_service: Name of the service the port is to.
+        :param backend: The JolieBackend to generate with.
+        """
+        out.write(self.gen_port(is_input, from_service, to_service, backend))
 
     def gen_service_filename(self,actor,with_path=True):
         """
@@ -797,31 +1162,56 @@ class DCRProjection(DCRInteractionGraph):
         """
         return from_actor+to_actor+"Interface"
 
-    def gen_interfaces(self,operations, is_in):
-        """
+    def gen_interfaces(self,operations, is_in, backend = DEFAULT_BACKEND):
+        """ #modified to be made by emit_interfaces.
         Generate an interfaces.
         :param operations: The operations/actions to include in the interface.
         :param is_in: Whether the interface is for this service, or for invoking operations of another.
+        :param backend: The JolieBackend to generate with.
         :return: String of the interface.
         """
-        ret = ""
-        for event_actor,events in operations.items():
+        out = io.StringIO()
+        self.emit_interfaces(out, operations, is_in, backend)
+        return out.getvalue()
+
+    def emit_interfaces(self, out, operations, is_in, backend = DEFAULT_BACKEND):
+        """ #own, from gen_interfaces.
+        Write the interfaces to or from the other actors.
+        :param out: The file, or io.StringIO, to write to.
+        :param operations: Dict from the other actor to the operations/actions to include in its interface.
+        :param is_in: Whether the interface is for this service, or for invoking operations of another.
+        :param backend: The JolieBackend to generate with.
+        """
+        # Sorted, so that the output doesn't depend on the order of sets.
+        rendered = {event_actor: [self.gen_operation(e, backend) for e in sorted(events, key=lambda e: (e.ActivityName, e.ActivityId))]
+                    for event_actor, events in operations.items()}
+        self.emit_rendered_interfaces(out, rendered, is_in, backend)
+
+    def emit_rendered_interfaces(self, out, rendered, is_in, backend = DEFAULT_BACKEND):
+        """ #own
+        Write the interfaces to or from the other actors, with their operations already rendered.
+        :param out: The file, or io.StringIO, to write to.
+        :param rendered: Dict from the other actor to the operation strings of its interface, in order.
+        :param is_in: Whether the interface is for this service, or for invoking operations of another.
+        :param backend: The JolieBackend to generate with.
+        """
+        for event_actor, operations in sorted(rendered.items()):
             if is_in:
                 interface_name = self.gen_interface_name(event_actor,self.actor)
             else:
                 interface_name = self.gen_interface_name(self.actor,event_actor)
 
-            ret += "interface "+interface_name+"{\n\toneWay:\n\t\t"
-            ret += ",\n\t\t".join([self.gen_operation(e) for e in events])
-            ret += "\n}\n\n"
-        return ret
+            backend.Interface.render_to(out, name=interface_name, operations=",\n\t\t".join(operations))
 
-    def write_file(self,fname, fcontents):
-        if os.path.exists(fname):
-            os.remove(fname)
-        f = open(fname, "x")
-        f.write(fcontents)
-        f.close()
+    @staticmethod
+    def write_file(fname, fcontents):
+        """ #modified to write atomically, and only if the contents changed. See writer.write_file.
+        Write a generated file.
+        :param fname: The file name.
+        :param fcontents: The contents of the file.
+        :return: "skipped" if the file already had the contents, "rewritten" if it was replaced, or "created".
+        """
+        return write_file(fname, fcontents)
 
     def convert_datatype(self,e):
         """
@@ -829,65 +1219,234 @@ class DCRProjection(DCRInteractionGraph):
         :param e: The event.
         :return: String of the converted datatype.
         """
-        datatype = 'CUSTOM'
-        if e.datatype:
-            if e.datatype == 'text':
-                datatype = 'string'
-            elif e.datatype == 'float':
-                datatype = 'double'
-            elif e.datatype in ['void', 'bool', 'int', 'long', 'raw', 'any']:
-                datatype = e.datatype
-        else:
-            datatype = 'void'
+        if not e.datatype:
+            return 'void'
+        return self.JOLIE_DATATYPES.get(e.datatype, 'CUSTOM')
 
-        return datatype
-
-    def gen_operation(self,e):
-        """
+    def gen_operation(self,e, backend = DEFAULT_BACKEND):
+        """ #modified to render the operation template of a backend.
         Generate an operation-string for an interface with name and datatype.
         :param e: The event.
+        :param backend: The JolieBackend to generate with.
         :return: String of the interface operation.
         """
-        return e.ActivityName.lower().replace(' ','_')+"("+self.convert_datatype(e)+")"
+        return backend.Operation.render(name=e.ActivityName.lower().replace(' ','_'), datatype=self.convert_datatype(e))
 
-    def generate_jolie(self,output_folder_path):
+    def gen_jolie_files(self, backend = DEFAULT_BACKEND):
+        """ #own
+        Generate the Jolie interfaces and service of the projection, without writing them.
+        :param backend: The JolieBackend to generate with.
+        :return: Dict from file name to file contents.
         """
-        Generate a Jolie template from the projection.
-        :param output_folder_path: raise NotImplementedError()
+        interface_out = io.StringIO()
+        service_out = io.StringIO()
+        self.emit_jolie(interface_out, service_out, backend)
+        return {self.gen_interface_filename(self.actor): interface_out.getvalue(),
+                self.gen_service_filename(self.actor): service_out.getvalue()}
+
+    def emit_jolie(self, interface_out, service_out, backend = DEFAULT_BACKEND):
+        """ #own
+        Write the Jolie interfaces and service of the projection, as they are generated.
+        :param interface_out: The file, or io.StringIO, to write the interfaces to.
+        :param service_out: The file, or io.StringIO, to write the service to.
+        :param backend: The JolieBackend to generate with.
         """
 
-        in_interfaces = defaultdict(set)
-        out_interfaces = defaultdict(set)
+        # Operations are rendered once, in the order of the interfaces, so they are sorted once for all interfaces.
+        in_interfaces = defaultdict(list)
+        out_interfaces = defaultdict(list)
 
         inputports = set()
         outputports = set()
 
-        for e in self.get_interactions():
+        for e in sorted(self.get_interactions(), key=lambda e: (e.ActivityName, e.ActivityId)):
+            operation = self.gen_operation(e, backend)
             if self.actor == e.initiator:
-                outputports.update(e.receivers)
-                for r in e.receivers:
-                    out_interfaces[r].add(e)
+                receivers = self.get_receivers(e)
+                outputports.update(receivers)
+                for r in receivers:
+                    out_interfaces[r].append(operation)
             else: # We know by def sth that actor is the receiver.
                 inputports.add(e.initiator)
-                in_interfaces[e.initiator].add(e)
-
-        interface_str = self.gen_interfaces(in_interfaces,True)
-        interface_str += self.gen_interfaces(out_interfaces,False)
+                in_interfaces[e.initiator].append(operation)
 
-        self.write_file(self.gen_interface_filename(self.actor),interface_str)
+        self.emit_rendered_interfaces(interface_out, in_interfaces, True, backend)
+        self.emit_rendered_interfaces(interface_out, out_interfaces, False, backend)
 
-        service_str = 'include "' + self.gen_interface_filename(self.actor,False) + '.iol"'
+        ports = [self.gen_port(True, n, self.actor, backend) for n in sorted(inputports)]
+        ports += [self.gen_port(False, self.actor, n, backend) for n in sorted(outputports)]
 
-        service_str += "\n\nservice "+ self.actor+"Service{\n\texecution: {"+ ("single" if self.actor in self.Users else "sequential") + "}\n\n"
+        backend.Service.render_to(service_out, interfaces=self.gen_interface_filename(self.actor,False), actor=self.actor,
+                                  execution=backend.get_execution(self.actor in self.Users), ports="".join(ports))
 
-        for n in inputports:
-            service_str += self.gen_port(True,n,self.actor)
+    def generate_jolie(self,output_folder_path, backend = DEFAULT_BACKEND):
+        """
+        Generate a Jolie template from the projection.
+        :param output_folder_path: raise NotImplementedError()
+        :param backend: The JolieBackend to generate with.
+        :return: Dict from file name to how it was written. See write_file.
+        """
+        writer = JolieFileWriter()
+        writer.add_files(self.gen_jolie_files(backend))
+        written, error = writer.flush()
+        if error is not None:
+            raise error
+        return written
 
-        for n in outputports:
-            service_str += self.gen_port(False,self.actor,n)
+class DCRProjection(DCRInteractionGraph, DCRJolieGenerator):
+    """ #own
+    End-point projection.
+    Projections are like choreographies, in that they have senders and receivers,
+    but you can't make a projection from them.
+    """
 
-        service_str += "\n\tmain {\n\n\t}\n}"
+    @classmethod
+    def from_data(cls, actor, mapping, activities, connections, included, pending, executed,users,services,collapse = True):
+        """
+        Makes a projectioni graph from data.
+        :param actor: The actor of the projection.
+        :param mapping: The mapping of labels to events.
+        :param activities: A list of activities.
+        :param connections: A list of connections.
+        :param included: Part of the marking. Included events.
+        :param pending: Part of the marking. Pending events.
+        :param executed: Part of the marking. Executed events.
+        :param users: List of roles that are classified as Users.
+        :param services: List roles that are classified as Services.
+        :param collapse: Whether or not to remove unnecessary nests from actions. Default is True.
+        :return: DCRInteractionGraph
+        """
+        graph = super().from_data(mapping, activities, connections, included, pending, executed,users,services,collapse)
         
-        self.write_file(self.gen_service_filename(self.actor),service_str)
+        graph.actor = actor
+
+        return graph
+
+    def __init__(self):
+        super().__init__()
+        self.Users = set()
+        self.Services = set()
+
+class DCRProjectionView(DCRJolieGenerator):
+    """ #own
+    End-point projection as a view of the choreography. The events and connections of the projection are not copied,
+    but referred to by their position in the position table of the choreography. Only what differs for the actor is kept:
+    the marking, and which events the actor sends. An event that the actor receives has only the actor as receiver.
+    The view makes the same Jolie files as the projection. materialize makes the projection itself, when the graph is needed.
+    A view is only valid as long as the choreography is not changed.
+    """
+    __slots__ = ('Choreography', 'actor', 'ActorRoles', 'Table', 'Events', 'Connections', 'Included', 'Pending', 'Executed',
+                 'Users', 'Services')
+
+    def __init__(self, choreography, actor, events, connections, included, pending, executed, users, services):
+        """
+        Constructor for the view.
+        :param choreography: The DCRChoreography that is projected.
+        :param actor: The actor of the projection.
+        :param events: The events of the choreography that are in the projection, with their parent nests.
+        :param connections: The connections of the choreography that are in the projection.
+        :param included: Part of the marking. Included events.
+        :param pending: Part of the marking. Pending events.
+        :param executed: Part of the marking. Executed events.
+        :param users: List of roles that are classified as Users.
+        :param services: List roles that are classified as Services.
+        """
+        self.Choreography = choreography
+        self.actor = actor
+        self.ActorRoles = intern_roles([actor])
+        self.Table = choreography.get_position_table()
+        self.Events = self.Table.node_positions(events)
+        self.Connections = self.Table.connection_positions(connections)
+        self.Included = self.Table.node_positions(included)
+        self.Pending = self.Table.node_positions(pending)
+        self.Executed = self.Table.node_positions(executed)
+        self.Users = intern_roles(users)
+        self.Services = intern_roles(services)
+
+    def get_table(self):
+        """
+        Get the position table the view refers to, if the choreography has not changed since the view was made.
+        :return: DCRPositionTable
+        """
+        if self.Choreography.PositionTable is not self.Table:
+            raise ValueError("The choreography has changed since the projection view for " + self.actor + " was made.")
+        return self.Table
+
+    def get_events(self, positions = None):
+        """
+        Get the events at positions.
+        :param positions: Positions of events. Default is all events of the projection.
+        :return: [DCRActivityBase]
+        """
+        nodes = self.get_table().Nodes
+        return [nodes[i] for i in (self.Events if positions is None else positions)]
+
+    def get_connections(self):
+        """
+        Get the connections of the projection, as connections of the choreography.
+        :return: [DCRConnection]
+        """
+        connections = self.get_table().Connections
+        return [connections[i] for i in self.Connections]
+
+    def get_interactions(self):
+        """
+        Get all non-nest events of the projection.
+        :return: Set of interactions of the choreography.
+        """
+        return {e for e in self.get_events() if not e.isNest}
+
+    def is_output(self, e):
+        """
+        Checks if the actor sends an interaction.
+        :param e: An interaction of the projection.
+        :return: Bool.
+        """
+        return e.initiator == self.actor
+
+    def get_receivers(self, e):
+        """
+        Override of DCRJolieGenerator get_receivers. A receiving actor doesn't know the other receivers.
+        :param e: An interaction of the projection.
+        :return: Set of roles.
+        """
+        return e.receivers if self.is_output(e) else self.ActorRoles
+
+    def get_roles(self):
+        """
+        Get all roles of the projection.
+        :return: [string]
+        """
+        return set.union(set(self.Users), self.Services)
+
+    def materialize(self):
+        """
+        Make the projection, with its own events and connections.
+        :return: DCRProjection
+        """
+        choreography = self.Choreography
+
+        # Make the new events.
+        new_events = {}
+        for e in self.get_events():
+            choreography.add_event(new_events, self.actor, e)
+
+        activities = set(new_events.values())
+
+        connections = set()
+        for c in self.get_connections():
+            start = choreography.get_new_event(new_events, c.StartNode)
+            end   = choreography.get_new_event(new_events, c.EndNode)
+            connections.add(DCRConnection.create_connection(start, end, type(c)))
+
+        Executed = {new_events[e.ActivityId] for e in self.get_events(self.Executed)}
+        Pending =  {new_events[e.ActivityId] for e in self.get_events(self.Pending)}
+        Included = {new_events[e.ActivityId] for e in self.get_events(self.Included)}
+
+        # 3. and 4.
+        mapping = {}
+        for e in activities:
+            mapping[e.ActivityId] = e.ActivityName
 
-        return
\ No newline at end of file
+        return DCRProjection().from_data(self.actor, mapping, activities, connections, Included, Pending, Executed,
+                                         set(self.Users), set(self.Services))
@@ -0,0 +1,148 @@
+# coding=utf-8
+"""
+This module contains the hash-indexed store used by DCRGraph to look up nodes and connections,
+and the table of positions that projection views use to refer to them.
+"""
+from array import array
+
+class DCRGraphIndex(object):
+    """ #own
+    Index of the nodes and connections of a DCR graph.
+    Nodes are indexed by ActivityId, and connections are indexed by the node they go to or come from,
+    and by their connection type.
+    """
+
+    def __init__(self, nodes = (), connections = ()):
+        """
+        Constructor for the index.
+        :param nodes: The nodes to index.
+        :param connections: The connections to index.
+        """
+        self.NodesById = {}
+        # node -> connection type -> set of connections.
+        self.Incoming = {}
+        self.Outgoing = {}
+
+        for node in nodes:
+            self.add_node(node)
+        for connection in connections:
+            self.add_connection(connection)
+
+    def add_node(self, node):
+        """
+        Add a node to the index.
+        :param node: The node.
+        """
+        self.NodesById[node.ActivityId] = node
+
+    def remove_node(self, node):
+        """
+        Remove a node from the index. Connections to and from the node are kept.
+        :param node: The node.
+        """
+        if self.NodesById.get(node.ActivityId) is node:
+            del self.NodesById[node.ActivityId]
+
+    def get_node(self, node_id):
+        """
+        Get a node by its id.
+        :param node_id: The ActivityId of the node.
+        :return: The node, or None if there is no node with that id.
+        """
+        return self.NodesById.get(node_id)
+
+    def add_connection(self, connection):
+        """
+        Add a connection to the adjacency of its start and end node.
+        :param connection: The connection.
+        """
+        self.Outgoing.setdefault(connection.StartNode, {}).setdefault(type(connection), set()).add(connection)
+        self.Incoming.setdefault(connection.EndNode, {}).setdefault(type(connection), set()).add(connection)
+
+    def remove_connection(self, connection):
+        """
+        Remove a connection from the adjacency of its start and end node.
+        :param connection: The connection.
+        """
+        self.Outgoing.get(connection.StartNode, {}).get(type(connection), set()).discard(connection)
+        self.Incoming.get(connection.EndNode, {}).get(type(connection), set()).discard(connection)
+
+    def set_start_node(self, connection, node):
+        """
+        Move the start of a connection to another node, and keep the index up to date.
+        :param connection: The connection.
+        :param node: The new start node.
+        """
+        self.remove_connection(connection)
+        connection.StartNode = node
+        self.add_connection(connection)
+
+    def set_end_node(self, connection, node):
+        """
+        Move the end of a connection to another node, and keep the index up to date.
+        :param connection: The connection.
+        :param node: The new end node.
+        """
+        self.remove_connection(connection)
+        connection.EndNode = node
+        self.add_connection(connection)
+
+    def get_in(self, node, ctypes = ()):
+        """
+        Get the connections going to node.
+        :param node: The node.
+        :param ctypes: Restrict type of connections to look for. Default is any type.
+        :return: Set of connections.
+        """
+        return self._collect(self.Incoming.get(node), ctypes)
+
+    def get_out(self, node, ctypes = ()):
+        """
+        Get the connections going from node.
+        :param node: The node.
+        :param ctypes: Restrict type of connections to look for. Default is any type.
+        :return: Set of connections.
+        """
+        return self._collect(self.Outgoing.get(node), ctypes)
+
+    @staticmethod
+    def _collect(by_type, ctypes):
+        if not by_type:
+            return set()
+        if not ctypes:
+            return set().union(*by_type.values())
+        return set().union(*(by_type[t] for t in ctypes if t in by_type))
+
+class DCRPositionTable(object):
+    """ #own
+    Numbering of the nodes and connections of a graph, so that other structures can refer to them by position,
+    in arrays of 4 byte integers, instead of keeping sets of references.
+    The table is not updated when the graph changes. The graph drops it instead.
+    """
+
+    def __init__(self, nodes, connections):
+        """
+        Constructor for the table.
+        :param nodes: The nodes to number.
+        :param connections: The connections to number.
+        """
+        self.Nodes = tuple(nodes)
+        self.Connections = tuple(connections)
+        self.NodePositions = {n: i for i, n in enumerate(self.Nodes)}
+        self.ConnectionPositions = {c: i for i, c in enumerate(self.Connections)}
+
+    def node_positions(self, nodes):
+        """
+        Get the positions of nodes, in increasing order.
+        :param nodes: Nodes of the table.
+        :return: array of positions.
+        """
+        return array('I', sorted(self.NodePositions[n] for n in nodes))
+
+    def connection_positions(self, connections):
+        """
+        Get the positions of connections, in increasing order.
+        :param connections: Connections of the table.
+        :return: array of positions.
+        """
+        return array('I', sorted(self.ConnectionPositions[c] for c in connections))
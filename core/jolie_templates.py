@@ -0,0 +1,97 @@
+# coding=utf-8
+"""
+This module contains the templates of the generated Jolie, and the backends that fill them in differently:
+the protocol of the ports, and how the services execute.
+"""
+import re
+
+class JolieTemplate(object):
+    """ #own
+    A template with fields written as ${name}. Braces are common in Jolie, so they need no escaping.
+    The template is compiled once into a function of its fields, that builds the text with an f-string.
+    render is that function, so rendering costs no more than building the string by hand.
+    """
+    FIELD = re.compile(r"\$\{([A-Za-z_]\w*)\}")
+
+    def __init__(self, text):
+        """
+        Constructor for the template.
+        :param text: The template text.
+        """
+        self.Text = text
+        parts = self.FIELD.split(text)
+        # Every other part is the name of a field, starting with the second.
+        self.Fields = tuple(dict.fromkeys(parts[1::2]))
+        body = "".join("{" + p + "}" if i % 2 else p.replace("{", "{{").replace("}", "}}") for i, p in enumerate(parts))
+        self.Source = "lambda " + ", ".join(self.Fields) + ": f" + repr(body)
+        # Fill in the template. Takes the value of every field, by name, and returns the string.
+        self.render = eval(self.Source, {})
+
+    def render_to(self, out, **values):
+        """
+        Fill in the template, and write it.
+        :param out: The file, or io.StringIO, to write to.
+        :param values: The value of every field.
+        """
+        out.write(self.render(**values))
+
+INTERFACE = "interface ${name}{\n\toneWay:\n\t\t${operations}\n}\n\n"
+OPERATION = "${name}(${datatype})"
+PORT = "\t${direction}putPort ${name}Service {\n\t\tlocation: \"${location}\"\n\t\tprotocol: ${protocol}\n\t\tinterfaces: ${interface}\n\t}\n\n"
+LOCATION = "socket://localhost:port_of_${peer_direction}putPort_'${peer_name}Service'_in_${service}"
+SERVICE = "include \"${interfaces}.iol\"\n\nservice ${actor}Service{\n\texecution: {${execution}}\n\n${ports}\n\tmain {\n\n\t}\n}"
+
+class JolieBackend(object):
+    """ #own
+    The compiled templates of the generated Jolie, with the protocol of the ports, and the execution modality of services.
+    """
+
+    def __init__(self, name, protocol, user_execution = "single", service_execution = "sequential"):
+        """
+        Constructor for the backend.
+        :param name: Name of the backend.
+        :param protocol: The protocol of all ports.
+        :param user_execution: Execution modality of the services of users.
+        :param service_execution: Execution modality of the services of services.
+        """
+        self.Name = name
+        self.Protocol = protocol
+        self.UserExecution = user_execution
+        self.ServiceExecution = service_execution
+        self.Interface = JolieTemplate(INTERFACE)
+        self.Operation = JolieTemplate(OPERATION)
+        self.Port = JolieTemplate(PORT)
+        self.Location = JolieTemplate(LOCATION)
+        self.Service = JolieTemplate(SERVICE)
+
+    def get_execution(self, is_user):
+        """
+        Get the execution modality of a service.
+        :param is_user: Whether the actor of the service is a user.
+        :return: String.
+        """
+        return self.UserExecution if is_user else self.ServiceExecution
+
+BACKENDS = {b.Name: b for b in [
+    # The default, as the Jolie has always been generated.
+    JolieBackend("http", "http { format = \"json\"}"),
+    # Jolie's own binary protocol.
+    JolieBackend("sodep", "sodep"),
+    # Services handle every request in its own thread, for high throughput. Users still run once.
+    JolieBackend("http-concurrent", "http { format = \"json\"}", service_execution="concurrent"),
+    JolieBackend("sodep-concurrent", "sodep", service_execution="concurrent"),
+]}
+
+DEFAULT_BACKEND = BACKENDS["http"]
+
+def get_backend(name = None):
+    """ #own
+    Get a backend by name.
+    :param name: Name of the backend. Default is http.
+    :return: JolieBackend
+    """
+    if name is None:
+        return DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError("Unknown Jolie backend " + name + ". Choose one of " + ", ".join(sorted(BACKENDS)) + ".")
+    return BACKENDS[name]
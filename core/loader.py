@@ -0,0 +1,87 @@
+# coding=utf-8
+"""
+This module contains the streaming reader for the DCR graph XML format.
+"""
+import xml.etree.ElementTree as Etree
+
+class DCRXMLReader(object):
+    """ #own
+    Reads a DCR graph XML file in one pass with iterparse.
+    Elements are cleared as soon as they have been read, so memory grows with the size of the graph,
+    not with the size of the file. The reader only collects plain records. The graph is built from them
+    afterwards, so forward references (e.g. constraints or label mappings before events) are resolved.
+    """
+
+    MARKING_TAGS = ('included', 'executed', 'pendingResponses')
+
+    def __init__(self, xml_path):
+        """
+        Constructor for the reader.
+        :param xml_path: Path of the XML file.
+        """
+        self.xml_path = xml_path
+
+        # eventId -> labelId
+        self.Mappings = {}
+        # (event id, data type, role texts, child ids) in document order, children before their nest.
+        # child ids is empty if the event is not a nest.
+        self.Events = []
+        # (connection tag, source id, target id)
+        self.Connections = []
+        # marking tag -> event ids
+        self.Marking = {tag: [] for tag in self.MARKING_TAGS}
+
+    def read(self):
+        """
+        Read the XML file.
+        :return: self
+        """
+        stack = []        # Open elements.
+        is_event = []     # For every open element, whether it is an event (or nest) of the graph.
+        child_ids = []    # For every open event, the ids of its sub-events.
+
+        for action, elem in Etree.iterparse(self.xml_path, events=('start', 'end')):
+            if action == 'start':
+                is_event.append(elem.tag == 'event' and stack != [] and (stack[-1].tag == 'events' or is_event[-1]))
+                stack.append(elem)
+                if is_event[-1]:
+                    child_ids.append([])
+                continue
+
+            stack.pop()
+            parent = stack[-1] if stack else None
+
+            if is_event.pop():
+                self.read_event(elem, child_ids.pop())
+                if child_ids:
+                    child_ids[-1].append(elem.get('id'))
+            elif child_ids:
+                # Part of an event that is still open. It is read and cleared with the event.
+                continue
+            elif elem.tag == 'labelMapping':
+                self.Mappings[elem.get('eventId')] = elem.get('labelId')
+            elif len(stack) > 1 and stack[-2].tag == 'constraints':
+                self.Connections.append((elem.tag, elem.get('sourceId'), elem.get('targetId')))
+            elif parent is not None and parent.tag in self.MARKING_TAGS:
+                self.Marking[parent.tag].append(elem.get('id'))
+
+            # The element has been consumed. All earlier siblings have been removed already, so removing it is cheap.
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+
+        return self
+
+    def read_event(self, event, children):
+        """
+        Make a record of an event or nest.
+        :param event: The XML element of the event.
+        :param children: Ids of the sub-events of the event.
+        """
+        event_id = event.get('id')
+        if children:
+            self.Events.append((event_id, None, [], children))
+        else:
+            datatype_field = event.find('custom').find('eventData').find('dataType')
+            datatype = datatype_field.text if datatype_field is not None else ""
+            self.Events.append((event_id, datatype, [role.text for role in event.iter('role')], children))
@@ -33,7 +33,7 @@ class Marking(object):
         return connection.perform_transition(self)
 
     def perform_transition_node(self, node, event, trace_data):
-        """
+        """ #modified to handle recursive nesting.
         Performs a transition on a marking and a connection
         :param trace_data:
         :param event: Event from the trace
@@ -42,14 +42,14 @@ class Marking(object):
         """
         if node is None:
             return True  # Global variable
-        if hasattr(node, "Activities"):
+        if node.isNest:
             trace_data.add_violating_nesting_activity_occurred(node.ActivityName)
 
         if self.node_is_blocked(node, trace_data, event):
             trace_data.add_violating_activity(node.ActivityName)
 
-        if node.NestingActivity is not None: # FIXME does't take recursive nesting into account.
-            if self.node_is_blocked(node.NestingActivity, trace_data, event):
+        for ancestor in node.get_ancestors():
+            if self.node_is_blocked(ancestor, trace_data, event):
                 trace_data.add_violating_nesting_activity_blocked(node)
 
         if node not in self.Included:
@@ -57,27 +57,19 @@ class Marking(object):
 
         if node not in self.Executed:
             self.Executed.append(node)
-            if node.NestingActivity is not None: # FIXME doesn't take recursive nesting into account.
-                included_activities = self.get_included_activities(node.NestingActivity.Activities)
-                if set(included_activities).issubset(set(self.Executed)):
-                    self.Executed.append(node.NestingActivity) # FIXME doesn't make sense to have nests executed.
 
         if node in self.PendingResponse:
             self.PendingResponse.remove(node)
-            if node.NestingActivity is not None: # FIXME recursive nesting.
-                pending = any(activity in node.NestingActivity.Activities for activity in self.PendingResponse)
-                if not pending and node.NestingActivity in self.PendingResponse:
-                    self.PendingResponse.remove(node.NestingActivity)
 
         if len(node.Roles) > 0:
             if event.Role not in node.Roles:
-                trace_data.add_violating_role(event.Role, node.Roles[0])
+                trace_data.add_violating_role(event.Role, sorted(node.Roles)[0])
 
-        # FIXME There's a new way to get_connections.
-        connections = self.dcr_graph.get_connections_outgoing(node.ActivityId)
-        if node.NestingActivity is not None: # FIXME recursive nesting. This is in the new get_connections
-            connections.extend(self.dcr_graph.get_connections_outgoing(node.NestingActivity.ActivityId))
-        for connection in connections:
+        # The connections of the nests node is in apply to node as well.
+        # Exclusions are applied before inclusions, and cancelled responses before new responses.
+        connections = self.dcr_graph.get_out_connections(node)
+        order = [conn.Exclude, conn.Include, conn.CoResponse, conn.Response]
+        for connection in sorted(connections, key=lambda c: order.index(type(c)) if type(c) in order else len(order)):
             if connection.HasExpression:
                 if connection.Expression.evaluate_expression(event, trace_data):
                     self.perform_transition_connection(connection)
@@ -87,50 +79,53 @@ class Marking(object):
                 self.perform_transition_connection(connection)
 
     def node_is_blocked(self, node, trace_data, event):
-        """
-        Checks if the node is blocked in the current constellation of the marking
+        """ #modified to handle recursive nesting.
+        Checks if the node is blocked in the current constellation of the marking.
+        Only the connections to node itself are checked, not those to the nests it is in.
+        A connection from a nest is blocking if it would be blocking from any activity in the nest.
         :param event: The event from the event log
         :param trace_data: The whole related trace data
         :param node: The node to be checked
         :return: True if blocked, False if not
         """
         blocked = False
-        # Check only if the node is a milestone target
-        if node.IsMilestoneTarget:
-            #FIXME there's a new way to get_connections
-            milestones = self.dcr_graph.get_connections_incoming(node.ActivityId, conn.Milestone)
-            for milestone in milestones:
-                # Evaluate a related expression
-                if milestone.HasExpression:
-                    if not milestone.Expression.evaluate_expression(event, trace_data):
-                        continue
-                # If the Start Node is included in the model as well as pending
-                # the target is blocked
-                if milestone.StartNode in self.Included and \
-                        milestone.StartNode in self.PendingResponse:
-                    blocked = True
-                    trace_data.add_violating_connection(
-                        "milestone-{}-{}".format(milestone.StartNode.ActivityName,
-                                                 milestone.EndNode.ActivityName))
-        # Check only if the node is a condition target
-        if node.IsConditionTarget:
-            # FIXME There's a new way to get_connections.
-            conditions = self.dcr_graph.get_connections_incoming(node.ActivityId, conn.Condition)
-            for condition in conditions:
-                if condition.HasExpression:
-                    if not condition.Expression.evaluate_expression(event, trace_data):
-                        continue
+        milestones = self.dcr_graph.get_in_connections(node, False, [conn.Milestone])
+        for milestone in milestones:
+            # Evaluate a related expression
+            if milestone.HasExpression:
+                if not milestone.Expression.evaluate_expression(event, trace_data):
+                    continue
+            # If the Start Node is included in the model as well as pending
+            # the target is blocked
+            if any(n in self.Included and n in self.PendingResponse for n in self.get_activities_below(milestone.StartNode)):
+                blocked = True
+                trace_data.add_violating_connection(
+                    "milestone-{}-{}".format(milestone.StartNode.ActivityName,
+                                             milestone.EndNode.ActivityName))
+        conditions = self.dcr_graph.get_in_connections(node, False, [conn.Condition])
+        for condition in conditions:
+            if condition.HasExpression:
+                if not condition.Expression.evaluate_expression(event, trace_data):
+                    continue
 
-                # If the Start Node connection is included in the model
-                # as well as not executed yet the activity is blocked
-                if condition.StartNode in self.Included \
-                        and condition.StartNode not in self.Executed:
-                    blocked = True
-                    trace_data.add_violating_connection(
-                        "condition-{}-{}".format(condition.StartNode.ActivityName,
-                                                 condition.EndNode.ActivityName))
+            # If the Start Node connection is included in the model
+            # as well as not executed yet the activity is blocked
+            if any(n in self.Included and n not in self.Executed for n in self.get_activities_below(condition.StartNode)):
+                blocked = True
+                trace_data.add_violating_connection(
+                    "condition-{}-{}".format(condition.StartNode.ActivityName,
+                                             condition.EndNode.ActivityName))
         return blocked
 
+    @staticmethod
+    def get_activities_below(node):
+        """ #own
+        Get the activities that are not nests, nested under node at any depth, or node itself if it is not a nest.
+        :param node: The node.
+        :return: List of activities.
+        """
+        return [n for n in conn.get_nodes_below(node) if not n.isNest]
+
     def get_included_activities(self, activities: []):
         """
         Get all included activities in a list
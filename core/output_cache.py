@@ -0,0 +1,115 @@
+# coding=utf-8
+"""
+This module contains the cache of generated Jolie files, so that unchanged projections are not generated
+or written again.
+"""
+import json
+import os
+
+CACHE_VERSION = 1
+
+class JolieOutputCache(object):
+    """ #own
+    Cache from actor to the structure hash of its projection, and the files that were generated from it.
+    A projection doesn't have to be generated if its hash is unchanged, and its files have not been changed or removed since they were written.
+    """
+
+    def __init__(self, cache_path):
+        """
+        Constructor for the cache. Use load to read an existing cache.
+        :param cache_path: Path of the cache file.
+        """
+        self.cache_path = cache_path
+        # actor -> {'hash': structure hash, 'files': {file name: [size, mtime_ns]}}
+        self.Entries = {}
+
+    @classmethod
+    def load(cls, cache_path):
+        """
+        Read the cache. A missing or unreadable cache is empty.
+        :param cache_path: Path of the cache file.
+        :return: JolieOutputCache
+        """
+        cache = cls(cache_path)
+        try:
+            with open(cache_path) as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                cache.Entries = data['actors']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return cache
+
+    def save(self):
+        """
+        Write the cache atomically.
+        """
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'version': CACHE_VERSION, 'actors': self.Entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    @staticmethod
+    def stat_file(fname):
+        """
+        Get what is remembered about a file, to see if it has changed.
+        :param fname: The file name.
+        :return: [size, mtime_ns] or None if the file doesn't exist.
+        """
+        try:
+            st = os.stat(fname)
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def get_fresh_hash(self, actor):
+        """
+        Get the structure hash that the files of actor were generated from, if the files are unchanged since.
+        :param actor: The actor.
+        :return: The structure hash, or None if there are no files, or they have been changed or removed.
+        """
+        entry = self.Entries.get(actor)
+        if entry is None:
+            return None
+        if any(self.stat_file(fname) != stat for fname, stat in entry['files'].items()):
+            return None
+        return entry['hash']
+
+    def get_files(self, actor):
+        """
+        Get the file names that were generated for actor.
+        :param actor: The actor.
+        :return: [string]
+        """
+        entry = self.Entries.get(actor)
+        return sorted(entry['files']) if entry is not None else []
+
+    def update(self, actor, structure_hash, fnames):
+        """
+        Remember the files that were written for actor.
+        :param actor: The actor.
+        :param structure_hash: The structure hash of the projection.
+        :param fnames: The names of the files.
+        """
+        self.Entries[actor] = {'hash': structure_hash, 'files': {fname: self.stat_file(fname) for fname in fnames}}
+
+    def remove_stale(self, actors, keep = ()):
+        """
+        Delete the files of the actors that are no longer projected, e.g. after a role was removed or another
+        choreography was generated to the same folder, and forget those actors.
+        :param actors: The actors that are projected.
+        :param keep: File names that must not be deleted, as they are files of the projected actors.
+        :return: [string] The names of the deleted files, sorted.
+        """
+        removed = []
+        keep = set(keep)
+        for actor in sorted(set(self.Entries).difference(actors)):
+            for fname in self.Entries.pop(actor)['files']:
+                if fname in keep:
+                    continue
+                try:
+                    os.remove(fname)
+                    removed.append(fname)
+                except FileNotFoundError:
+                    pass
+        return sorted(removed)
@@ -0,0 +1,217 @@
+# coding=utf-8
+"""
+This module contains the instrumentation of the compile pipeline: wall time per phase and per actor,
+call counts of the graph lookups, and peak memory. Nothing is instrumented unless a profiler is started,
+as the methods are only wrapped while it runs.
+"""
+import cProfile
+import contextlib
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+
+try:
+    import resource
+except ImportError: # Not on Windows.
+    resource = None
+
+from graph import DCRGraph, DCRChoreography, DCRJolieGenerator, DCRProjectionView
+from writer import JolieFileWriter
+
+# (class, method, phase) of the methods that are timed. A phase is the time spent in the method, including what it calls.
+TIMED_METHODS = [
+    (DCRGraph, 'from_xml_or_snapshot', 'load'),
+    (DCRGraph, 'parse', 'parse'),
+    (DCRGraph, 'collapse', 'collapse'),
+    (DCRChoreography, 'is_projectable_for_actors', 'is_projectable'),
+    (DCRChoreography, 'get_projectability_violations', 'diagnostics'),
+    (DCRChoreography, 'project_view_for_actor', 'project'),
+    (DCRProjectionView, 'materialize', 'materialize'),
+    (DCRJolieGenerator, 'gen_jolie_files', 'generate'),
+    (JolieFileWriter, 'flush', 'write'),
+]
+
+# (class, method) of the methods whose calls are counted.
+COUNTED_METHODS = [
+    (DCRGraph, 'get_event'),
+    (DCRGraph, 'get_in_connections'),
+    (DCRGraph, 'get_out_connections'),
+]
+
+class DCRProfiler(object):
+    """ #own
+    Collects where the time of a run goes. While it runs, the methods in TIMED_METHODS and COUNTED_METHODS are replaced
+    by wrappers that time or count them, and the originals are put back when it stops.
+    Time spent while an actor is set with actor() is also added to that actor.
+    """
+
+    def __init__(self, use_cprofile = False):
+        """
+        Constructor for the profiler.
+        :param use_cprofile: Whether to also run cProfile, for a dump of every function.
+        """
+        # phase -> seconds, and number of calls.
+        self.Phases = defaultdict(float)
+        self.PhaseCalls = Counter()
+        # actor -> phase -> seconds. The phase "total" is all the time the actor was set.
+        self.Actors = defaultdict(lambda: defaultdict(float))
+        # method -> number of calls.
+        self.Calls = Counter()
+        self.CurrentActor = None
+        # Phases that are running, so that recursive calls are only timed once.
+        self.Running = set()
+        self.Originals = []
+        self.Profile = cProfile.Profile() if use_cprofile else None
+        self.Start = None
+        self.Seconds = 0.0
+
+    def start(self):
+        """
+        Wrap the instrumented methods, and start the clock.
+        """
+        for cls, name, phase in TIMED_METHODS:
+            self.wrap(cls, name, lambda f, phase=phase: self.timed(f, phase))
+        for cls, name in COUNTED_METHODS:
+            self.wrap(cls, name, lambda f, name=name: self.counted(f, name))
+        self.Start = time.perf_counter()
+        if self.Profile is not None:
+            self.Profile.enable()
+
+    def stop(self):
+        """
+        Stop the clock, and put the original methods back.
+        """
+        if self.Profile is not None:
+            self.Profile.disable()
+        self.Seconds += time.perf_counter() - self.Start
+        for cls, name, original in reversed(self.Originals):
+            setattr(cls, name, original)
+        self.Originals = []
+
+    def wrap(self, cls, name, make_wrapper):
+        """
+        Replace a method of a class by a wrapper, and remember the original.
+        :param cls: The class that defines the method.
+        :param name: The name of the method.
+        :param make_wrapper: Function from the original function to the wrapper.
+        """
+        original = cls.__dict__[name]
+        if isinstance(original, classmethod):
+            wrapper = classmethod(make_wrapper(original.__func__))
+        elif isinstance(original, staticmethod):
+            wrapper = staticmethod(make_wrapper(original.__func__))
+        else:
+            wrapper = make_wrapper(original)
+        self.Originals.append((cls, name, original))
+        setattr(cls, name, wrapper)
+
+    def timed(self, f, phase):
+        """
+        Make a wrapper that adds the time spent in f to phase.
+        :param f: The function.
+        :param phase: The name of the phase.
+        :return: The wrapper.
+        """
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if phase in self.Running:
+                return f(*args, **kwargs)
+            self.Running.add(phase)
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                self.Running.discard(phase)
+                self.Phases[phase] += seconds
+                self.PhaseCalls[phase] += 1
+                if self.CurrentActor is not None:
+                    self.Actors[self.CurrentActor][phase] += seconds
+        return wrapper
+
+    def counted(self, f, name):
+        """
+        Make a wrapper that counts the calls of f.
+        :param f: The function.
+        :param name: The name to count the calls by.
+        :return: The wrapper.
+        """
+        calls = self.Calls
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return f(*args, **kwargs)
+        return wrapper
+
+    @contextlib.contextmanager
+    def actor(self, actor):
+        """
+        Add the time spent in the block, and in the phases it runs, to actor.
+        :param actor: The actor.
+        """
+        previous = self.CurrentActor
+        self.CurrentActor = actor
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.Actors[actor]["total"] += time.perf_counter() - start
+            self.CurrentActor = previous
+
+    @staticmethod
+    def get_peak_memory():
+        """
+        Get the peak resident memory of the process.
+        :return: Bytes, or None where it is not known.
+        """
+        if resource is None:
+            return None
+        # Bytes on macOS, kilobytes elsewhere.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def report(self):
+        """
+        Get what was collected, as plain data.
+        :return: dict
+        """
+        return {'seconds': round(self.Seconds, 6),
+                'phases': {p: {'seconds': round(s, 6), 'calls': self.PhaseCalls[p]} for p, s in sorted(self.Phases.items())},
+                'actors': {a: {p: round(s, 6) for p, s in sorted(phases.items())} for a, phases in sorted(self.Actors.items())},
+                'calls': {name: self.Calls[name] for _, name in COUNTED_METHODS},
+                'peak_memory_bytes': self.get_peak_memory()}
+
+    def write_report(self, path):
+        """
+        Write the report as json.
+        :param path: The file to write to, or - for the console.
+        """
+        text = json.dumps(self.report(), indent=1)
+        if path == "-":
+            print(text)
+        else:
+            with open(path, "w") as f:
+                f.write(text)
+
+    def dump_cprofile(self, path):
+        """
+        Write the cProfile statistics, for pstats or snakeviz.
+        :param path: The file to write to.
+        """
+        self.Profile.dump_stats(path)
+
+class DCRNullProfiler(object):
+    """ #own
+    Stands in for DCRProfiler when profiling is off, so that code can set the actor without checking.
+    """
+
+    def actor(self, actor):
+        """
+        Does nothing.
+        :param actor: The actor.
+        """
+        return contextlib.nullcontext()
+
+NULL_PROFILER = DCRNullProfiler()
@@ -0,0 +1,137 @@
+# coding=utf-8
+"""
+This module contains the binary snapshot format for parsed DCR graphs.
+
+A snapshot is a small header followed by a zlib compressed marshal payload of plain tuples.
+Nodes are stored once, sorted by ActivityId, and everything else refers to them by their position.
+"""
+import marshal
+import struct
+import zlib
+
+from activity import DCRActivity, DCRActivityNest, DCREndpointActivity, DCRInteractionActivity
+from conn import DCRConnection
+
+MAGIC = b'DCRS'
+FORMAT_VERSION = 1
+# magic, format version, marshal version.
+HEADER = struct.Struct('<4sHH')
+
+# Node kinds, most specific class first.
+NODE_KINDS = [DCRActivityNest, DCREndpointActivity, DCRInteractionActivity, DCRActivity]
+CONNECTION_TYPES = ["condition", "response", "exclude", "include", "milestone", "coresponse"]
+
+def get_node_kind(node):
+    """ #own
+    Get the kind of a node, as stored in snapshots.
+    :param node: The node.
+    :return: Index in NODE_KINDS.
+    """
+    for kind, node_class in enumerate(NODE_KINDS):
+        if isinstance(node, node_class):
+            return kind
+    raise ValueError('Could not recognize node type ' + type(node).__name__)
+
+def dumps(graph):
+    """ #own
+    Make a snapshot of a graph.
+    :param graph: The DCRGraph, or any subclass of it.
+    :return: bytes
+    """
+    nodes = sorted(graph.Nodes, key=lambda n: n.ActivityId)
+    positions = {n: i for i, n in enumerate(nodes)}
+
+    def position(n):
+        # Unknown ids in the XML are parsed to None.
+        if n is None:
+            return -1
+        if n not in positions:
+            raise ValueError('Node ' + n.ActivityId + ' is referenced, but is not a node of the graph')
+        return positions[n]
+
+    node_records = []
+    for n in nodes:
+        kind = get_node_kind(n)
+        parent = position(n.Parent)
+        if n.isNest:
+            node_records.append((kind, n.ActivityId, n.ActivityName, parent, tuple(sorted(n.Roles))))
+        else:
+            node_records.append((kind, n.ActivityId, n.ActivityName, parent, tuple(sorted(n.Roles)), n.datatype,
+                                 getattr(n, 'initiator', None),
+                                 tuple(sorted(n.receivers)) if getattr(n, 'receivers', None) is not None else None,
+                                 getattr(n, 'is_output', None)))
+
+    connections = sorted((CONNECTION_TYPES.index(DCRConnection.get_connection_string(type(c))), position(c.StartNode), position(c.EndNode))
+                         for c in graph.Connections)
+
+    payload = (
+        dict(graph.Mappings),
+        tuple(node_records),
+        tuple(i for c in connections for i in c),
+        tuple(sorted(position(n) for n in graph.InitialIncluded)),
+        tuple(sorted(position(n) for n in graph.InitialPending)),
+        tuple(sorted(position(n) for n in graph.InitialExecuted)),
+        tuple(sorted(getattr(graph, 'Users', ()))),
+        tuple(sorted(getattr(graph, 'Services', ()))),
+    )
+    return HEADER.pack(MAGIC, FORMAT_VERSION, marshal.version) + zlib.compress(marshal.dumps(payload))
+
+def loads(graph, data):
+    """ #own
+    Fill an empty graph from a snapshot.
+    :param graph: The empty DCRGraph, or subclass of it, to fill.
+    :param data: bytes of the snapshot.
+    :return: The graph.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError('Snapshot is too short')
+    magic, format_version, marshal_version = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not a DCR graph snapshot')
+    if format_version != FORMAT_VERSION or marshal_version != marshal.version:
+        raise ValueError('Unsupported snapshot version ' + str(format_version) + '/' + str(marshal_version))
+
+    try:
+        mapping, node_records, connections, included, pending, executed, users, services = marshal.loads(zlib.decompress(data[HEADER.size:]))
+    except (zlib.error, EOFError, TypeError, ValueError) as e:
+        raise ValueError('Snapshot is corrupt: ' + str(e))
+
+    nodes = []
+    for record in node_records:
+        kind, activity_id, activity_name = record[0], record[1], record[2]
+        node_class = NODE_KINDS[kind]
+        if node_class == DCRActivityNest:
+            node = DCRActivityNest(activity_id, activity_name, set())
+        else:
+            datatype, initiator, receivers, is_output = record[5:]
+            receivers = set(receivers) if receivers is not None else None
+            if node_class == DCREndpointActivity:
+                node = DCREndpointActivity(activity_id, activity_name, initiator, receivers, is_output)
+            elif node_class == DCRInteractionActivity:
+                node = DCRInteractionActivity(activity_id, activity_name, initiator, receivers)
+            else:
+                node = DCRActivity(activity_id, activity_name)
+            node.set_datatype(datatype)
+        node.set_roles(record[4])
+        nodes.append(node)
+
+    for node, record in zip(nodes, node_records):
+        if record[3] != -1:
+            nodes[record[3]].add_child_activity(node)
+
+    def get_node(i):
+        return nodes[i] if i != -1 else None
+
+    connection_types = [DCRConnection.get_connection_type(t) for t in CONNECTION_TYPES]
+    graph.Mappings = mapping
+    graph.Nodes = set(nodes)
+    graph.Connections = {DCRConnection.create_connection(get_node(connections[i+1]), get_node(connections[i+2]), connection_types[connections[i]])
+                         for i in range(0, len(connections), 3)}
+    graph.InitialIncluded = {get_node(i) for i in included}
+    graph.InitialPending = {get_node(i) for i in pending}
+    graph.InitialExecuted = {get_node(i) for i in executed}
+    if hasattr(graph, 'Users'):
+        graph.set_roles(set(users), set(services))
+    graph.invalidate_index()
+
+    return graph
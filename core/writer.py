@@ -0,0 +1,103 @@
+# coding=utf-8
+"""
+This module contains the writing of generated files. Files are written atomically, and concurrently,
+as writing many small files is mostly waiting for the file system.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+def write_file(fname, fcontents):
+    """ #own
+    Write a generated file atomically, and only if the contents changed.
+    The contents are written to a temporary file next to it, which is then renamed over it.
+    :param fname: The file name.
+    :param fcontents: The contents of the file.
+    :return: "skipped" if the file already had the contents, "rewritten" if it was replaced, or "created".
+    """
+    data = fcontents.encode("utf-8")
+    status = "created"
+    if os.path.exists(fname):
+        with open(fname, "rb") as f:
+            if f.read() == data:
+                return "skipped"
+        status = "rewritten"
+
+    tmp_fname = fname + ".tmp"
+    try:
+        with open(tmp_fname, "wb") as f:
+            f.write(data)
+        os.replace(tmp_fname, fname)
+    except OSError:
+        if os.path.exists(tmp_fname):
+            os.remove(tmp_fname)
+        raise
+    return status
+
+class JolieFileWriter(object):
+    """ #own
+    Writer stage for generated files. Files are collected with add, and written by flush, in a bounded pool of threads.
+    Every file is written with write_file, so a file is either replaced completely or not at all.
+    """
+
+    def __init__(self, threads = 8):
+        """
+        Constructor for the writer.
+        :param threads: The largest number of files written at the same time.
+        """
+        self.threads = max(1, threads)
+        # [(file name, contents)], in the order they were added.
+        self.Files = []
+
+    def add(self, fname, fcontents):
+        """
+        Add a file to be written by the next flush.
+        :param fname: The file name.
+        :param fcontents: The contents of the file.
+        """
+        self.Files.append((fname, fcontents))
+
+    def add_files(self, files):
+        """
+        Add files to be written by the next flush.
+        :param files: Dict from file name to file contents.
+        """
+        for fname, fcontents in files.items():
+            self.add(fname, fcontents)
+
+    def flush(self):
+        """
+        Write the files that were added, and wait until all have been written or have failed.
+        :return: Dict from file name to how it was written (see write_file), for the files that were written,
+        in the order they were added. And the first error, in the same order, or None if all were written.
+        """
+        files, self.Files = self.Files, []
+        written = {}
+        error = None
+        if not files:
+            return written, error
+
+        if self.threads == 1 or len(files) == 1:
+            results = [self.try_write(fname, fcontents) for fname, fcontents in files]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.threads, len(files))) as executor:
+                results = list(executor.map(lambda f: self.try_write(*f), files))
+
+        for (fname, _), (status, e) in zip(files, results):
+            if e is None:
+                written[fname] = status
+            elif error is None:
+                error = e
+        return written, error
+
+    @staticmethod
+    def try_write(fname, fcontents):
+        """
+        Write a file, and catch the error, so that the other files are still written.
+        :param fname: The file name.
+        :param fcontents: The contents of the file.
+        :return: How the file was written, or None, and the error, or None.
+        """
+        try:
+            return write_file(fname, fcontents), None
+        except OSError as e:
+            return None, e
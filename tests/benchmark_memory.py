@@ -0,0 +1,104 @@
+"""
+Memory benchmark of a choreography and all its projections, for the example inputs scaled up.
+Where the revision has projection views, the memory of a view of every projection is measured as well.
+The example is copied a number of times into one graph, with new ids, so there are as many roles but many more events.
+
+Compares the working tree with an older revision of core, e.g. the one before activities and connections had __slots__:
+
+    python tests/benchmark_memory.py --baseline <revision> [--copies 200] [--xml input/Buyer_Seller_Shipper.xml]
+
+Prints one json object per measurement.
+"""
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import xml.etree.ElementTree as Etree
+
+MEASURE = """
+import gc, json, sys, tracemalloc
+sys.path.insert(0, sys.argv[1])
+from graph import DCRChoreography
+tracemalloc.start()
+choreography = DCRChoreography().from_xml(sys.argv[2])
+gc.collect()
+graph_bytes = tracemalloc.get_traced_memory()[0]
+projections = [choreography.project_for_actor(a) for a in sorted(choreography.get_roles())]
+gc.collect()
+total_bytes = tracemalloc.get_traced_memory()[0]
+result = {'nodes': len(choreography.Nodes), 'connections': len(choreography.Connections),
+          'projected_nodes': sum(len(p.Nodes) for p in projections),
+          'choreography_bytes': graph_bytes, 'projections_bytes': total_bytes - graph_bytes}
+if hasattr(choreography, 'project_view_for_actor'):
+    del projections
+    gc.collect()
+    before_bytes = tracemalloc.get_traced_memory()[0]
+    views = [choreography.project_view_for_actor(a) for a in sorted(choreography.get_roles())]
+    gc.collect()
+    result['views_bytes'] = tracemalloc.get_traced_memory()[0] - before_bytes
+print(json.dumps(result))
+"""
+
+def scale_xml(xml_path, copies, out_path):
+    """
+    Write a graph with copies of the graph in xml_path. The ids of events and labels of copy k get the suffix -copyk.
+    """
+    tree = Etree.parse(xml_path)
+    root = tree.getroot()
+    renamed_attributes = ('id', 'eventId', 'labelId', 'sourceId', 'targetId')
+
+    def rename(elem, k):
+        for e in elem.iter():
+            for a in renamed_attributes:
+                if e.get(a) is not None and e.tag != 'expression':
+                    e.set(a, e.get(a) + "-copy" + str(k))
+        return elem
+
+    containers = [root.find('specification/resources/events'), root.find('specification/resources/labels'),
+                  root.find('specification/resources/labelMappings')]
+    containers += list(root.find('specification/constraints'))
+    containers += [root.find('runtime/marking/' + tag) for tag in ('executed', 'included', 'pendingResponses')]
+    for container in containers:
+        if container is None:
+            continue
+        originals = list(container)
+        for k in range(1, copies):
+            for elem in originals:
+                container.append(rename(copy.deepcopy(elem), k))
+    tree.write(out_path)
+
+def measure(core_path, xml_path):
+    output = subprocess.run([sys.executable, "-c", MEASURE, core_path, xml_path], check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--xml', default='input/Buyer_Seller_Shipper.xml')
+    parser.add_argument('--copies', type=int, default=200)
+    parser.add_argument('--baseline', default=None, help='Git revision to compare with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        xml_path = os.path.join(folder, "scaled.xml")
+        scale_xml(args.xml, args.copies, xml_path)
+
+        trees = [("working tree", os.path.abspath("core"))]
+        if args.baseline is not None:
+            archive = os.path.join(folder, "baseline.tar")
+            subprocess.run(["git", "archive", "-o", archive, args.baseline, "core"], check=True)
+            with tarfile.open(archive) as tar:
+                tar.extractall(os.path.join(folder, "baseline"))
+            trees.insert(0, (args.baseline, os.path.join(folder, "baseline", "core")))
+
+        for name, core_path in trees:
+            result = measure(core_path, xml_path)
+            result.update({'revision': name, 'xml': args.xml, 'copies': args.copies})
+            print(json.dumps(result))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+Scaling benchmark of the compile pipeline, on synthetic choreographies.
+The choreographies are made by a seeded generator, so the same parameters always give the same XML, and vary in the
+number of events, roles, relations per event and the depth of nesting. Every phase is timed: parse, the projectability
+check, projection of every role and emission of the Jolie of every projection.
+
+    python tests/benchmark_scaling.py [--events 100 1000 10000] [--roles 4 16] [--density 1 3] [--depth 0 3]
+                                      [--seed 0] [--repeat 3] [--output results.jsonl]
+
+Writes one json object per choreography, to the console or appended to --output, so runs of different revisions
+can be compared.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as Etree
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../core')))
+
+from graph import DCRChoreography
+from jolie_templates import DEFAULT_BACKEND
+
+CONNECTION_TAGS = ('conditions', 'responses', 'coresponses', 'excludes', 'includes', 'milestones')
+DATATYPES = ('text', 'int', 'float', 'bool')
+
+def generate_choreography(n_events, n_roles, density = 1.0, depth = 0, seed = 0, users = 0.25):
+    """
+    Generate a projectable DCR choreography in the XML format of DCR graphs, with roles written as
+    DCRChoreography.handle_roles expects. Every role has a conversation with one or two other roles. Events are made in
+    runs of up to 4 in the same conversation, initiated, S:, by one of its roles and received, R:, by the others.
+    A share of the roles are users, U:, the others services.
+    Events are grouped in nests of up to 4, and those nests again, depth times. A group of one is not nested.
+    A relation is only made from a node to a node whose events only have participants that take part in every event
+    of the first. Then every direct dependency, also through two relations or through a nest, is between events
+    where the initiator of the depender takes part in the other, so the choreography is projectable.
+    :param n_events: Number of events, not counting nests.
+    :param n_roles: Number of roles, at least 2.
+    :param density: Number of relations per event. Fewer are made where a node has no node it can relate to.
+    :param depth: Largest number of nests around an event.
+    :param seed: Seed of the random choices.
+    :param users: Share of the roles that are users.
+    :return: The XML, as a string.
+    """
+    if n_roles < 2:
+        raise ValueError("A choreography needs at least 2 roles.")
+    rnd = random.Random(seed)
+    roles = ["Role" + str(r) for r in range(n_roles)]
+    role_prefix = {r: "U:" if rnd.random() < users else "S:" for r in roles}
+    conversations = [[r] + rnd.sample([o for o in roles if o != r], min(rnd.randint(1, 2), n_roles - 1)) for r in roles]
+
+    root = Etree.Element('dcrgraph', title="Generated_{}_{}_{}_{}_{}".format(n_events, n_roles, density, depth, seed))
+    specification = Etree.SubElement(root, 'specification')
+    resources = Etree.SubElement(specification, 'resources')
+    events_elem = Etree.SubElement(resources, 'events')
+    labels_elem = Etree.SubElement(resources, 'labels')
+    mappings_elem = Etree.SubElement(resources, 'labelMappings')
+
+    # node id -> (XML element, the participants of any / every event under it).
+    nodes = {}
+    level = []
+    conversation = None
+    for i in range(n_events):
+        if i % 4 == 0 or rnd.random() < 0.25:
+            conversation = rnd.choice(conversations)
+        event_id = "Activity" + str(i)
+        initiator = rnd.choice(conversation)
+        elem = Etree.Element('event', id=event_id)
+        custom = Etree.SubElement(elem, 'custom')
+        roles_elem = Etree.SubElement(custom, 'roles')
+        Etree.SubElement(roles_elem, 'role').text = "S:" + role_prefix[initiator] + initiator
+        for r in conversation:
+            if r != initiator:
+                Etree.SubElement(roles_elem, 'role').text = "R:" + role_prefix[r] + r
+        Etree.SubElement(Etree.SubElement(custom, 'eventData'), 'dataType').text = rnd.choice(DATATYPES)
+        nodes[event_id] = (elem, frozenset(conversation), frozenset(conversation))
+        level.append(event_id)
+
+    for d in range(depth):
+        next_level = []
+        i = 0
+        while i < len(level):
+            group = level[i:i + rnd.randint(1, 4)]
+            i += len(group)
+            if len(group) == 1:
+                next_level.append(group[0])
+                continue
+            nest_id = "Nest{}_{}".format(d, len(next_level))
+            elem = Etree.Element('event', id=nest_id, type="nesting")
+            Etree.SubElement(Etree.SubElement(elem, 'custom'), 'roles')
+            for child in group:
+                elem.append(nodes[child][0])
+            nodes[nest_id] = (elem, frozenset().union(*(nodes[c][1] for c in group)),
+                              frozenset.intersection(*(nodes[c][2] for c in group)))
+            next_level.append(nest_id)
+        level = next_level
+
+    for node_id in level:
+        events_elem.append(nodes[node_id][0])
+    node_ids = list(nodes)
+    for node_id in node_ids:
+        Etree.SubElement(labels_elem, 'label', id="Action " + node_id)
+        Etree.SubElement(mappings_elem, 'labelMapping', eventId=node_id, labelId="Action " + node_id)
+
+    # The nodes by the participants of any of their events, to find the nodes a node can relate to.
+    by_participants = {}
+    for node_id in node_ids:
+        by_participants.setdefault(nodes[node_id][1], []).append(node_id)
+
+    constraints = Etree.SubElement(specification, 'constraints')
+    containers = {tag: Etree.SubElement(constraints, tag) for tag in CONNECTION_TAGS}
+    relations = set()
+    for _ in range(round(density * n_events)):
+        source = rnd.choice(node_ids)
+        every = sorted(nodes[source][2])
+        targets = [t for k in range(2, len(every) + 1) for c in itertools.combinations(every, k)
+                   for t in by_participants.get(frozenset(c), [])]
+        if not targets:
+            continue
+        relation = (rnd.choice(CONNECTION_TAGS), source, rnd.choice(targets))
+        if relation not in relations:
+            relations.add(relation)
+            Etree.SubElement(containers[relation[0]], relation[0][:-1], sourceId=source, targetId=relation[2])
+
+    marking = Etree.SubElement(Etree.SubElement(root, 'runtime'), 'marking')
+    Etree.SubElement(marking, 'executed')
+    included = Etree.SubElement(marking, 'included')
+    for node_id in node_ids:
+        Etree.SubElement(included, 'event', id=node_id)
+    pending = Etree.SubElement(marking, 'pendingResponses')
+    for node_id in node_ids:
+        if node_id.startswith("Activity") and rnd.random() < 0.1:
+            Etree.SubElement(pending, 'event', id=node_id)
+
+    return Etree.tostring(root, encoding="unicode")
+
+def best_time(f, repeat):
+    """
+    Run f repeat times.
+    :return: The fastest time in seconds, and what the last run returned.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ret = f()
+        times.append(time.perf_counter() - start)
+    return min(times), ret
+
+def measure(xml_path, repeat):
+    """
+    Time every phase of the compile pipeline on a choreography.
+    """
+    parse, choreography = best_time(lambda: DCRChoreography().from_xml(xml_path), repeat)
+    # The check builds the indexes of the graph, which are kept, so it is timed on a graph of its own every time.
+    graphs = [DCRChoreography().from_xml(xml_path) for _ in range(repeat)]
+    check, violations = best_time(lambda: graphs.pop().get_projectability_violations(), repeat)
+    roles = sorted(choreography.get_roles())
+    project, views = best_time(lambda: [choreography.project_view_for_actor(a) for a in roles], repeat)
+    emit, files = best_time(lambda: [v.gen_jolie_files(DEFAULT_BACKEND) for v in views], repeat)
+    return {'nodes': len(choreography.Nodes), 'connections': len(choreography.Connections), 'violations': len(violations), 'jolie_bytes': sum(len(c) for f in files for c in f.values()),
+            'seconds': {'parse': round(parse, 6), 'is_projectable': round(check, 6),
+                        'project': round(project, 6), 'emit': round(emit, 6)}}
+
+def get_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--roles', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--density', type=float, nargs='+', default=[1.0, 3.0])
+    parser.add_argument('--depth', type=int, nargs='+', default=[0, 3])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of every phase. The fastest is kept')
+    parser.add_argument('--output', default=None, help='File to append the results to, one json object per line')
+    args = parser.parse_args()
+
+    revision = get_revision()
+    out = open(args.output, "a") if args.output is not None else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            for n_events, n_roles, density, depth in itertools.product(args.events, args.roles, args.density, args.depth):
+                xml_path = os.path.join(folder, "generated.xml")
+                with open(xml_path, "w") as f:
+                    f.write(generate_choreography(n_events, n_roles, density, depth, args.seed))
+                result = {'revision': revision, 'python': platform.python_version(), 'events': n_events,
+                          'roles': n_roles, 'density': density, 'depth': depth, 'seed': args.seed}
+                result.update(measure(xml_path, args.repeat))
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import gc
+import unittest
+
+from graph import DCRGraph
+from activity import DCRActivity, DCRActivityNest, DCRInteractionActivity, ROLE_SETS
+from conn import DCRConnection, Response
+
+class TestNesting(unittest.TestCase):
+
+    def setUp(self):
+        # outer = {inner, c}, inner = {a, b}
+        self.a = DCRActivity("a", "A")
+        self.b = DCRActivity("b", "B")
+        self.c = DCRActivity("c", "C")
+        self.inner = DCRActivityNest("inner", "Inner", {self.a, self.b})
+        self.outer = DCRActivityNest("outer", "Outer", {self.inner, self.c})
+
+    def test_ancestors(self):
+        self.assertEqual(self.a.get_ancestors(), {self.inner, self.outer})
+        self.assertIs(self.a.get_ancestors(), self.a.get_ancestors())
+        self.assertTrue(self.a.has_ancestor(self.outer))
+        self.assertFalse(self.c.has_ancestor(self.inner))
+        self.assertEqual(self.outer.get_ancestors(), set())
+
+    def test_successors(self):
+        self.assertEqual(self.outer.get_successors(), {self.inner, self.a, self.b, self.c})
+        # The children of the nest are not changed.
+        self.assertEqual(self.outer.Activities, {self.inner, self.c})
+        self.assertEqual(self.a.get_successors(), set())
+
+    def test_invalidation(self):
+        self.assertEqual(self.outer.get_successors(), {self.inner, self.a, self.b, self.c})
+        self.assertEqual(self.a.get_ancestors(), {self.inner, self.outer})
+
+        top = DCRActivityNest("top", "Top")
+        top.add_child_activity(self.outer)
+        self.assertEqual(self.a.get_ancestors(), {self.inner, self.outer, top})
+        self.assertEqual(top.get_successors(), {self.outer, self.inner, self.a, self.b, self.c})
+
+        d = DCRActivity("d", "D")
+        self.inner.add_child_activity(d)
+        self.assertIn(d, top.get_successors())
+        self.assertTrue(d.has_ancestor(top))
+
+        self.inner.remove_child_activity(self.b)
+        self.b.set_parent_activity(None)
+        self.assertNotIn(self.b, self.outer.get_successors())
+        self.assertEqual(self.b.get_ancestors(), set())
+
+    def test_collapse(self):
+        # inner has no connections, so it is collapsed, and a and b are nested directly in outer.
+        connection = DCRConnection.create_connection(self.outer, self.c, Response)
+        self.assertEqual(self.a.get_ancestors(), {self.inner, self.outer})
+        graph = DCRGraph.from_data(dict(), {self.a, self.b, self.c, self.inner, self.outer}, {connection}, set(), set(), set())
+        graph.collapse()
+        self.assertNotIn(self.inner, graph.Nodes)
+        self.assertEqual(self.a.get_ancestors(), {self.outer})
+        self.assertEqual(self.outer.get_successors(), {self.a, self.b, self.c})
+
+    def test_collapse_chain(self):
+        # A chain of nests with one child each, around outer. The connection of the top nest goes down to outer,
+        # which has connections and two children after inner is collapsed, so it is kept.
+        d = DCRActivity("d", "D")
+        chain = [self.outer]
+        for i in range(2000):
+            chain.append(DCRActivityNest("n" + str(i), "N", {chain[-1]}))
+        connection = DCRConnection.create_connection(d, chain[-1], Response)
+        graph = DCRGraph.from_data(dict(), {self.a, self.b, self.c, self.inner, d} | set(chain), {connection}, set(), set(), set())
+        graph.collapse()
+        self.assertEqual(graph.Nodes, {self.a, self.b, self.c, self.outer, d})
+        self.assertIs(connection.EndNode, self.outer)
+        self.assertEqual(graph.get_in_connections(self.a), {connection})
+        self.assertIsNone(self.outer.Parent)
+        self.assertEqual(self.a.get_ancestors(), {self.outer})
+        self.assertEqual(self.outer.get_successors(), {self.a, self.b, self.c})
+
+class TestCompact(unittest.TestCase):
+
+    def test_slots(self):
+        a = DCRInteractionActivity("a", "A", "Buyer", {"Seller"})
+        connection = DCRConnection.create_connection(a, a, Response)
+        for obj in [a, connection, DCRActivityNest("n", "N")]:
+            self.assertFalse(hasattr(obj, "__dict__"))
+        self.assertRaises(AttributeError, setattr, a, "no_such_attribute", 1)
+
+    def test_shared_roles(self):
+        a = DCRInteractionActivity("a", "A", "Buyer", {"Seller"})
+        b = DCRInteractionActivity("b", "B", "Seller", ["Buyer"])
+        a.set_roles({"Buyer", "Seller"})
+        b.set_roles(["Seller"])
+        b.set_roles({"Buyer"})
+        self.assertEqual(a.Roles, {"Buyer", "Seller"})
+        self.assertIs(a.Roles, b.Roles)
+        self.assertIsInstance(a.receivers, frozenset)
+        self.assertEqual(b.get_initiator_and_receivers(), {"Buyer", "Seller"})
+
+    def test_shared_roles_freed(self):
+        # A role set is dropped from the table when no activity uses it anymore.
+        a = DCRInteractionActivity("a", "A", "Only here", {"Also only here"})
+        a.set_roles({"Only here", "Also only here"})
+        roles = frozenset({"Only here", "Also only here"})
+        self.assertIs(ROLE_SETS[roles], a.Roles)
+        del a
+        gc.collect()
+        self.assertNotIn(roles, ROLE_SETS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from batch import find_choreographies, get_output_folders, compile_batch, print_summary
+from graph import DCRChoreography
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_find(self):
+        self.assertEqual(find_choreographies("input"), find_choreographies("input/*.xml"))
+        self.assertIn("input/House_for_sale.xml", find_choreographies("input"))
+        self.assertEqual(find_choreographies("input/House*.xml"), ["input/House_for_sale.xml"])
+        self.assertEqual(find_choreographies("input/missing*.xml"), [])
+
+    def test_output_folders(self):
+        self.assertEqual(get_output_folders(["in/a.xml", "in/sub/a.xml"], "out"), ["out/a", "out/sub/a"])
+        self.assertEqual(get_output_folders([], "out"), [])
+
+    def test_compile(self):
+        xml_paths = find_choreographies("input")
+        for jobs in [1, 2]:
+            output_root = os.path.join(self.folder, str(jobs))
+            results = compile_batch(xml_paths, output_root, jobs)
+            statuses = {r['xml']: r['status'] for r in results}
+            self.assertEqual(statuses["input/House_for_sale.xml"], "generated")
+            self.assertEqual(statuses["input/_House_for_sale_not_projectable.xml"], "not projectable")
+            self.assertEqual([r['xml'] for r in results], xml_paths)
+
+            # Every choreography is written to its own folder, as epp_dcr would write it.
+            choreography = DCRChoreography().from_xml("input/House_for_sale.xml")
+            for a in choreography.get_roles():
+                for fname, fcontents in choreography.project_for_actor(a).gen_jolie_files().items():
+                    with open(os.path.join(output_root, "House_for_sale", os.path.basename(fname))) as f:
+                        self.assertEqual(f.read(), fcontents)
+            self.assertFalse(os.path.exists(os.path.join(output_root, "_House_for_sale_not_projectable")))
+
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                print_summary(results)
+            self.assertIn("input/House_for_sale.xml", out.getvalue())
+            self.assertIn("1 not projectable", out.getvalue())
+
+    def test_broken_files(self):
+        # A truncated file, a file that is not a DCR graph and an event without its data do not stop the batch,
+        # also not in worker processes.
+        inputs = os.path.join(self.folder, "in")
+        os.makedirs(inputs)
+        for name, text in [("truncated.xml", "<dcrgraph><specification>"), ("foo.xml", "<foo/>"),
+                           ("no_data.xml", "<dcrgraph><specification><resources><events><event id='a'/></events></resources></specification></dcrgraph>")]:
+            with open(os.path.join(inputs, name), "w") as f:
+                f.write(text)
+        shutil.copy("input/House_for_sale.xml", inputs)
+        xml_paths = find_choreographies(inputs)
+        for jobs in [1, 2]:
+            results = compile_batch(xml_paths, os.path.join(self.folder, "out" + str(jobs)), jobs)
+            statuses = {os.path.basename(r['xml']): r['status'] for r in results}
+            self.assertEqual(statuses, {"truncated.xml": "unreadable", "foo.xml": "no actors", "no_data.xml": "failed",
+                                        "House_for_sale.xml": "generated"})
+
+if __name__ == '__main__':
+    unittest.main()
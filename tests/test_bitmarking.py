@@ -0,0 +1,89 @@
+import unittest
+
+from graph import DCRGraph, DCRChoreography
+from activity import DCRActivity, DCRActivityNest
+from conn import DCRConnection, Condition, Milestone, Response, CoResponse, Include, Exclude
+from bitmarking import DCRMarkingIndex, BitMarking, FrozenBitMarking
+
+class TestBitMarking(unittest.TestCase):
+
+    def setUp(self):
+        # a -condition-> b, a -response-> b, a -exclude-> a, b -include-> c, n = {c, d}, b -milestone-> n, d -coresponse-> b
+        self.a = DCRActivity("a", "A")
+        self.b = DCRActivity("b", "B")
+        self.c = DCRActivity("c", "C")
+        self.d = DCRActivity("d", "D")
+        self.n = DCRActivityNest("n", "N", {self.c, self.d})
+        connections = {DCRConnection.create_connection(s, e, t) for s, e, t in [
+            (self.a, self.b, Condition), (self.a, self.b, Response), (self.a, self.a, Exclude),
+            (self.b, self.c, Include), (self.b, self.n, Milestone), (self.d, self.b, CoResponse)]}
+        nodes = {self.a, self.b, self.c, self.d, self.n}
+        self.graph = DCRGraph.from_data(dict(), nodes, connections, {self.a, self.b, self.d, self.n}, set(), set())
+        self.marking = BitMarking.from_graph(self.graph)
+
+    def enabled(self):
+        return {n for n in self.graph.Nodes if self.marking.is_enabled(n)}
+
+    def test_initial(self):
+        self.assertEqual(self.enabled(), {self.a, self.d})
+        self.assertTrue(self.marking.is_accepting())
+
+    def test_condition_and_response(self):
+        self.marking.perform_transition_node(self.a)
+        self.assertFalse(self.marking.is_included(self.a))
+        self.assertTrue(self.marking.is_executed(self.a))
+        self.assertTrue(self.marking.is_pending(self.b))
+        self.assertFalse(self.marking.is_accepting())
+        # b is pending, so the milestone to the nest blocks d.
+        self.assertEqual(self.enabled(), {self.b})
+
+    def test_nest_flattening(self):
+        self.marking.perform_transition_node(self.a)
+        self.marking.perform_transition_node(self.b)
+        self.assertTrue(self.marking.is_included(self.c))
+        self.assertFalse(self.marking.is_pending(self.b))
+        self.assertTrue(self.marking.is_accepting())
+        self.assertEqual(self.enabled(), {self.b, self.c, self.d})
+
+    def test_coresponse(self):
+        self.marking.perform_transition_node(self.a)
+        self.marking.perform_transition_node(self.d)
+        self.assertFalse(self.marking.is_pending(self.b))
+
+    def test_copy_and_hash(self):
+        copy = self.marking.copy()
+        self.assertEqual(copy, self.marking)
+        self.assertEqual(hash(copy), hash(self.marking))
+        copy.perform_transition_node(self.a)
+        self.assertNotEqual(copy, self.marking)
+        self.assertTrue(self.marking.is_included(self.a))
+
+    def test_frozen(self):
+        frozen = self.marking.freeze()
+        self.assertIs(frozen.copy(), frozen)
+        self.assertEqual(frozen, self.marking)
+        self.assertEqual(hash(frozen), hash(self.marking))
+        self.assertRaises(AttributeError, frozen.perform_transition_node, self.a)
+        self.assertRaises(AttributeError, setattr, frozen, "Included", 0)
+
+        after = frozen.execute(self.a)
+        self.assertIsInstance(after, FrozenBitMarking)
+        self.marking.perform_transition_node(self.a)
+        self.assertEqual(after, self.marking)
+        self.assertNotEqual(after, frozen)
+        self.assertEqual(len({frozen, after, after.thaw().freeze()}), 2)
+
+    def test_index_masks(self):
+        index = DCRMarkingIndex(self.graph)
+        self.assertEqual(index.nodes(index.Below[self.n]), {self.n, self.c, self.d})
+        self.assertEqual(index.nodes(index.LeavesBelow[self.n]), {self.c, self.d})
+        self.assertEqual(index.nodes(index.MilestoneMask[self.c]), {self.b})
+        self.assertEqual(index.nodes(index.IncludeMask[self.b]), {self.c})
+
+    def test_choreography(self):
+        choreography = DCRChoreography().from_xml("input/House_for_sale.xml")
+        marking = BitMarking.from_graph(choreography)
+        self.assertEqual({e.ActivityName for e in choreography.get_interactions() if marking.is_enabled(e)}, {"Publish"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from graph import DCRChoreography
+from eventlog import LogEvent, read_event_log
+from conformance import DCRConformanceChecker, check_log, print_stats
+
+class TestConformance(unittest.TestCase):
+
+    def setUp(self):
+        self.choreography = DCRChoreography().from_xml("input/House_for_sale.xml")
+        self.checker = DCRConformanceChecker(self.choreography)
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_conformant_trace(self):
+        trace_data = self.checker.check_trace([LogEvent("Publish", "Seller"), LogEvent("Pull", "Seller")])
+        self.assertTrue(trace_data.is_conformant())
+
+    def test_violations(self):
+        trace_data = self.checker.check_trace([LogEvent("Offer", "Buyer"), LogEvent("Publish", "Buyer"), LogEvent("Sell", "Seller")])
+        self.assertEqual(trace_data.Connections, ["condition-Publish-Offer"])
+        self.assertEqual(trace_data.Activities, ["Offer"])
+        self.assertEqual(trace_data.Roles, [("Buyer", "Seller")])
+        self.assertEqual(trace_data.Unknown, ["Sell"])
+        self.assertEqual(trace_data.EventRoles, ["Buyer", "Buyer", "Seller"])
+        self.assertIn("Offer", trace_data.Pending)
+
+    def test_read_xes(self):
+        traces = list(read_event_log("input/House_for_sale.xes"))
+        self.assertEqual([t for t, _ in traces], ["sold", "pulled", "offer before publish"])
+        self.assertEqual(traces[1][1], [LogEvent("Publish", "Seller"), LogEvent("Pull", "Seller")])
+
+    def test_read_csv(self):
+        path = os.path.join(self.folder, "log.csv")
+        with open(path, "w") as f:
+            f.write("case,activity,role\n1,Publish,Seller\n1,Pull,Seller\n2,Offer,\n")
+        self.assertEqual(list(read_event_log(path)),
+                         [("1", [LogEvent("Publish", "Seller"), LogEvent("Pull", "Seller")]), ("2", [LogEvent("Offer")])])
+
+    def test_read_csv_rows(self):
+        path = os.path.join(self.folder, "log.csv")
+        with open(path, "w") as f:
+            f.write("case,activity,role\n1,Publish,Seller\n\n,,\n1,Pull,Seller\n")
+        self.assertEqual(list(read_event_log(path)), [("1", [LogEvent("Publish", "Seller"), LogEvent("Pull", "Seller")])])
+        with open(path, "a") as f:
+            f.write("2,Offer\n")
+        with self.assertRaisesRegex(ValueError, "Line 6 "):
+            list(read_event_log(path))
+
+    def test_unnamed_event(self):
+        path = os.path.join(self.folder, "log.xes")
+        with open(path, "w") as f:
+            f.write('<log><trace><event><string key="concept:name" value="Publish"/><string key="org:role" value="Seller"/></event>'
+                    '<event><string key="org:role" value="Seller"/></event></trace></log>')
+        traces = list(read_event_log(path))
+        self.assertEqual(traces, [("0", [LogEvent("Publish", "Seller"), LogEvent(None, "Seller")])])
+        stats = check_log([self.checker], traces)[0]
+        self.assertEqual(stats.Unknown, {None: 1})
+        stats.Unknown["Sell"] = 1
+        self.assertEqual(stats.to_dict()['unknown'], {None: 1, "Sell": 1})
+        json.dumps(stats.to_dict())
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            print_stats("House_for_sale", stats)
+        self.assertIn("None", out.getvalue())
+
+    def test_check_log(self):
+        traces = list(read_event_log("input/House_for_sale.xes")) * 5
+        buyer = DCRConformanceChecker(self.choreography.project_for_actor("Buyer"), ignore_unknown=True)
+        serial = check_log([self.checker, buyer], traces, chunk_size=2)
+        parallel = check_log([self.checker, buyer], iter(traces), jobs=2, chunk_size=2)
+        self.assertEqual([s.to_dict() for s in serial], [s.to_dict() for s in parallel])
+
+        stats = serial[0]
+        self.assertEqual((stats.Traces, stats.ConformantTraces, stats.Events), (15, 10, 50))
+        self.assertEqual(stats.Relations, {"condition-Publish-Offer": 5})
+        self.assertEqual(stats.Roles, {"Buyer": 10})
+        self.assertEqual(serial[1].Unknown, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from daemon import DCRChoreographyCache, DCRCompileServer, serve_stream, serve_socket, NOT_PROJECTABLE, FILE_NOT_FOUND, INVALID_PARAMS, \
+    UNREADABLE, INTERNAL_ERROR
+
+def request(method, request_id = 1, **params):
+    return json.dumps({'jsonrpc': "2.0", 'id': request_id, 'method': method, 'params': params})
+
+class TestChoreographyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.paths = []
+        for name in ["a", "b", "c"]:
+            path = os.path.join(self.folder, name + ".xml")
+            shutil.copy("input/House_for_sale.xml", path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_lru(self):
+        cache = DCRChoreographyCache(2)
+        a = cache.get_choreography(self.paths[0])
+        self.assertIs(cache.get_choreography(self.paths[0]), a)
+        cache.get_choreography(self.paths[1])
+        cache.get_choreography(self.paths[0])
+        # b is the least recently used, so it is dropped when c is added.
+        cache.get_choreography(self.paths[2])
+        self.assertEqual(list(cache.Entries), [os.path.abspath(self.paths[0]), os.path.abspath(self.paths[2])])
+        self.assertEqual((cache.Hits, cache.Misses), (2, 3))
+
+    def test_changed_file(self):
+        cache = DCRChoreographyCache()
+        a = cache.get_choreography(self.paths[0])
+        st = os.stat(self.paths[0])
+        os.utime(self.paths[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertIsNot(cache.get_choreography(self.paths[0]), a)
+
+class TestCompileServer(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.server = DCRCompileServer()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def call(self, method, **params):
+        return json.loads(self.server.handle_line(request(method, **params)))
+
+    def test_generate(self):
+        response = self.call("generate", path="input/House_for_sale.xml", output=self.folder)
+        self.assertFalse(response['result']['cached'])
+        files = response['result']['files']
+        self.assertEqual(set(files.values()), {"created"})
+        self.assertEqual(len(files), 6)
+
+        response = self.call("generate", path="input/House_for_sale.xml", output=self.folder, actors=["Bank"])
+        self.assertTrue(response['result']['cached'])
+        self.assertEqual(response['result']['files'], {os.path.join(self.folder, "BankInterfaces.iol"): "skipped",
+                                                       os.path.join(self.folder, "BankService.ol"): "skipped"})
+
+    def test_project(self):
+        result = self.call("project", path="input/House_for_sale.xml")['result']
+        self.assertEqual(sorted(result['projections']), ["Bank", "Buyer", "Seller"])
+        other = self.call("project", path="input/House_for_sale.xml", backend="sodep")['result']
+        self.assertNotEqual(result['projections']['Bank']['structure_hash'], other['projections']['Bank']['structure_hash'])
+
+    def test_errors(self):
+        self.assertEqual(self.call("generate", path="input/_House_for_sale_not_projectable.xml")['error']['code'], NOT_PROJECTABLE)
+        self.assertEqual(self.call("project", path="input/missing.xml")['error']['code'], FILE_NOT_FOUND)
+        self.assertEqual(self.call("project")['error']['code'], INVALID_PARAMS)
+        self.assertEqual(self.call("project", path="input/House_for_sale.xml", actors=["Nobody"])['error']['code'], INVALID_PARAMS)
+        self.assertEqual(self.call("unknown")['error']['code'], -32601)
+        self.assertEqual(json.loads(self.server.handle_line("{"))['error']['code'], -32700)
+        # Notifications are not answered.
+        self.assertIsNone(self.server.handle_line(json.dumps({'jsonrpc': "2.0", 'method': "stats"})))
+
+    def test_bad_requests(self):
+        # A file that is still being written, a folder, and actors that are not strings, are answered with errors,
+        # and the server answers the requests after them.
+        truncated = os.path.join(self.folder, "truncated.xml")
+        with open(truncated, "w") as f:
+            f.write("<dcrgraph><specification>")
+        self.assertEqual(self.call("project", path=truncated)['error']['code'], UNREADABLE)
+        self.assertEqual(self.call("project", path="input")['error']['code'], UNREADABLE)
+        self.assertEqual(self.call("project", path="input/House_for_sale.xml", actors=[["x"]])['error']['code'], INVALID_PARAMS)
+
+        def fail(params):
+            raise KeyError("bug")
+        self.server.methods['stats'] = fail
+        error = self.call("stats")['error']
+        self.assertEqual(error['code'], INTERNAL_ERROR)
+        self.assertIn("KeyError", error['data'])
+        self.assertIn('result', self.call("project", path="input/House_for_sale.xml"))
+
+    def test_output_folder_spelling(self):
+        self.call("generate", path="input/House_for_sale.xml", output=self.folder)
+        response = self.call("generate", path="input/House_for_sale.xml", output=os.path.join(self.folder, ".", ""))
+        self.assertEqual(set(response['result']['files'].values()), {"skipped"})
+        self.assertEqual(len(self.server.OutputCaches), 1)
+
+    def test_stream(self):
+        lines = [request("diagnostics", 1, path="input/_House_for_sale_not_projectable.xml"), request("shutdown", 2),
+                 request("stats", 3)]
+        out = io.StringIO()
+        serve_stream(self.server, iter(line + "\n" for line in lines), out)
+        responses = [json.loads(line) for line in out.getvalue().splitlines()]
+        # Nothing is answered after shutdown.
+        self.assertEqual([r['id'] for r in responses], [1, 2])
+        self.assertFalse(responses[0]['result']['projectable'])
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs unix domain sockets")
+    def test_socket(self):
+        socket_path = os.path.join(self.folder, "epp.sock")
+        thread = threading.Thread(target=serve_socket, args=(self.server, socket_path), daemon=True)
+        thread.start()
+        try:
+            for _ in range(100):
+                if os.path.exists(socket_path):
+                    break
+                threading.Event().wait(0.01)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                s.connect(socket_path)
+                f = s.makefile("rw")
+                f.write(request("project", 1, path="input/House_for_sale.xml") + "\n" + request("shutdown", 2) + "\n")
+                f.flush()
+                responses = [json.loads(f.readline()) for _ in range(2)]
+        finally:
+            self.server.Running = False
+            thread.join(5)
+        self.assertEqual(sorted(responses[0]['result']['projections']), ["Bank", "Buyer", "Seller"])
+        self.assertTrue(responses[1]['result'])
+        self.assertFalse(os.path.exists(socket_path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from graph import DCRGraph, DCRChoreography
+from activity import DCRActivity, DCRActivityNest
+from conn import DCRConnection, Condition, Milestone, Response, Include
+
+class TestDependencyIndex(unittest.TestCase):
+
+    def setUp(self):
+        # a -include-> n, n = {b, c}, b -condition-> d, c -response-> d, n -milestone-> e
+        self.a, self.b, self.c, self.d, self.e = [DCRActivity(i, i.upper()) for i in "abcde"]
+        self.n = DCRActivityNest("n", "N", {self.b, self.c})
+        connections = {DCRConnection.create_connection(s, e, t) for s, e, t in [
+            (self.a, self.n, Include), (self.b, self.d, Condition), (self.c, self.d, Response), (self.n, self.e, Milestone)]}
+        self.graph = DCRGraph.from_data(dict(), {self.a, self.b, self.c, self.d, self.e, self.n}, connections, set(), set(), set())
+
+    def test_dependers(self):
+        # a includes n, which has a milestone to e. The connections of the children of n are not followed.
+        self.assertEqual(self.graph.get_direct_dependers(self.a), {self.a, self.b, self.c, self.e})
+        # c has the milestone of n.
+        self.assertEqual(self.graph.get_direct_dependers(self.c), {self.c, self.d, self.e})
+        self.assertEqual(self.graph.get_direct_dependers(self.n), {self.n, self.e})
+
+    def test_dependees(self):
+        self.assertEqual(self.graph.get_direct_dependees(self.d), {self.a, self.b, self.c, self.d})
+        self.assertEqual(self.graph.get_direct_dependees(self.e), {self.a, self.b, self.c, self.e})
+        self.assertEqual(self.graph.get_direct_dependees(self.b), {self.a, self.b})
+
+    def test_invalidated_on_mutation(self):
+        index = self.graph.get_dependency_index()
+        self.assertIs(self.graph.get_dependency_index(), index)
+
+        f = DCRActivity("f", "F")
+        self.graph.add_node(f)
+        connection = DCRConnection.create_connection(self.d, f, Response)
+        self.graph.add_connection(connection)
+        self.assertIsNot(self.graph.get_dependency_index(), index)
+        self.assertIn(f, self.graph.get_direct_dependers(self.d))
+
+        self.graph.remove_connection(connection)
+        self.assertNotIn(f, self.graph.get_direct_dependers(self.d))
+
+    def test_projectability(self):
+        choreography = DCRChoreography().from_xml("input/_House_for_sale_not_projectable.xml")
+        self.assertFalse(choreography.is_projectable())
+        self.assertIs(choreography.get_dependency_index(), choreography.get_dependency_index())
+        self.assertTrue(DCRChoreography().from_xml("input/House_for_sale.xml").is_projectable())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import json
+import unittest
+
+from graph import DCRChoreography
+from diagnostics import violations_to_json
+
+class TestDiagnostics(unittest.TestCase):
+
+    def test_all_violations(self):
+        choreography = DCRChoreography().from_xml("input/_House_for_sale_not_projectable.xml")
+        violations = choreography.get_projectability_violations()
+        self.assertEqual([(v.Action.ActivityName, v.Depender.ActivityName, v.Initiator) for v in violations],
+                         [("Accept offer", "Reject loan", "Bank"), ("Accept offer", "Approve loan", "Bank")])
+        self.assertFalse(choreography.is_projectable())
+
+        report = json.loads(violations_to_json(violations))
+        self.assertFalse(report["projectable"])
+        self.assertEqual(report["violations"][0]["allowed"], ["Buyer", "Seller"])
+
+    def test_projectable(self):
+        choreography = DCRChoreography().from_xml("input/House_for_sale.xml")
+        self.assertEqual(choreography.get_projectability_violations(), [])
+        self.assertEqual(json.loads(violations_to_json([])), {"projectable": True, "violations": []})
+
+if __name__ == '__main__':
+    unittest.main()
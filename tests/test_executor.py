@@ -0,0 +1,87 @@
+import random
+import unittest
+
+from graph import DCRGraph, DCRChoreography
+from activity import DCRActivity, DCRActivityNest
+from conn import DCRConnection, Condition, Milestone, Response, CoResponse, Include, Exclude
+from executor import DCRExecutor
+from marking import Marking
+
+class TraceData(object):
+    """ Collects the violations reported by Marking. """
+
+    def __init__(self):
+        self.violations = []
+
+    def __getattr__(self, name):
+        if name.startswith("add_violating"):
+            return lambda *args: self.violations.append((name,) + args)
+        raise AttributeError(name)
+
+class Event(object):
+    Role = None
+
+class TestExecutor(unittest.TestCase):
+
+    def setUp(self):
+        # a -condition-> n, a -response-> c, n = {m, d}, m = {b, c}, b -exclude-> n, d -include-> b, c -milestone-> d
+        self.a = DCRActivity("a", "A")
+        self.b = DCRActivity("b", "B")
+        self.c = DCRActivity("c", "C")
+        self.d = DCRActivity("d", "D")
+        self.m = DCRActivityNest("m", "M", {self.b, self.c})
+        self.n = DCRActivityNest("n", "N", {self.m, self.d})
+        connections = {DCRConnection.create_connection(s, e, t) for s, e, t in [
+            (self.a, self.n, Condition), (self.a, self.c, Response), (self.b, self.n, Exclude),
+            (self.d, self.b, Include), (self.c, self.d, Milestone), (self.d, self.c, CoResponse)]}
+        nodes = {self.a, self.b, self.c, self.d, self.m, self.n}
+        self.graph = DCRGraph.from_data(dict(), nodes, connections, set(nodes), set(), set())
+        self.executor = DCRExecutor(self.graph)
+
+    def test_recursive_nesting(self):
+        marking = self.executor.initial_marking()
+        # The condition to n blocks everything below it.
+        self.assertEqual(self.executor.enabled_events(marking), {self.a})
+        self.assertRaises(ValueError, self.executor.execute, marking, self.b)
+
+        marking = self.executor.execute(marking, self.a)
+        self.assertFalse(self.executor.is_accepting(marking))
+        # c is pending, so the milestone blocks d.
+        self.assertEqual(self.executor.enabled_events(marking), {self.a, self.b, self.c})
+
+        after_b = self.executor.execute(marking, self.b)
+        self.assertEqual(self.executor.enabled_events(after_b), {self.a})
+        self.assertTrue(self.executor.is_accepting(after_b))
+        self.assertEqual(self.executor.enabled_events(marking), {self.a, self.b, self.c})
+
+        marking = self.executor.execute_trace([self.c, self.d], marking)
+        self.assertTrue(self.executor.is_accepting(marking))
+        self.assertEqual(self.executor.enabled_events(marking), {self.a, self.b, self.c, self.d})
+
+    def test_legacy_marking_agrees(self):
+        rnd = random.Random(7)
+        leaves = sorted((n for n in self.graph.Nodes if not n.isNest), key=lambda n: n.ActivityId)
+        for _ in range(50):
+            marking = self.executor.initial_marking()
+            legacy = Marking(list(self.graph.InitialIncluded), [], [], self.graph)
+            for _ in range(10):
+                e = rnd.choice(leaves)
+                trace_data = TraceData()
+                legacy.perform_transition_node(e, Event(), trace_data)
+                self.assertEqual(not trace_data.violations, self.executor.is_enabled(marking, e))
+                marking = marking.copy()
+                marking.perform_transition_node(e)
+                self.assertEqual(set(legacy.Included), self.executor.index.nodes(marking.Included))
+                self.assertEqual(set(legacy.PendingResponse), self.executor.index.nodes(marking.PendingResponse))
+
+    def test_choreography(self):
+        choreography = DCRChoreography().from_xml("input/House_for_sale.xml")
+        executor = DCRExecutor(choreography)
+        marking = executor.initial_marking()
+        enabled = executor.enabled_events(marking)
+        self.assertEqual({e.ActivityName for e in enabled}, {"Publish"})
+        marking = executor.execute(marking, next(iter(enabled)))
+        self.assertNotEqual(executor.enabled_events(marking), enabled)
+
+if __name__ == '__main__':
+    unittest.main()
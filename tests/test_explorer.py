@@ -0,0 +1,57 @@
+import unittest
+
+from graph import DCRGraph, DCRChoreography
+from activity import DCRActivity
+from conn import DCRConnection, Condition, Milestone, Response, Include, Exclude
+from explorer import DCRStateExplorer
+
+class TestExplorer(unittest.TestCase):
+
+    def make_graph(self, relations, included, pending):
+        events = {name: DCRActivity(name, name.upper()) for name in "abcd"}
+        connections = {DCRConnection.create_connection(events[s], events[e], t) for s, e, t in relations}
+        return DCRGraph.from_data(dict(), set(events.values()), connections,
+                                  {events[n] for n in included}, {events[n] for n in pending}, set())
+
+    def test_deadlock(self):
+        # After a, c is pending and blocked by the condition from d, and d is blocked by the milestone from c.
+        # After c, a can no longer make c pending, as c is excluded.
+        graph = self.make_graph([("a", "a", Exclude), ("a", "d", Include), ("a", "c", Response), ("c", "c", Exclude),
+                                 ("d", "c", Condition), ("c", "d", Milestone)], "ac", "")
+        space = DCRStateExplorer(graph).explore()
+        self.assertTrue(space.Complete)
+        deadlocks = space.get_deadlocks()
+        self.assertEqual(len(deadlocks), 1)
+        self.assertEqual([e.ActivityId for e in space.get_trace(deadlocks[0])], ["a"])
+        self.assertFalse(space.is_live())
+        self.assertEqual([e.ActivityId for e in space.get_dead_events()], ["b"])
+
+    def test_not_live_without_deadlock(self):
+        # c and d block each other, and c is pending. b can always happen.
+        graph = self.make_graph([("d", "c", Condition), ("c", "d", Milestone)], "bcd", "c")
+        space = DCRStateExplorer(graph).explore()
+        self.assertEqual(space.get_deadlocks(), [])
+        self.assertFalse(space.is_live())
+
+    def test_executed_is_forgotten(self):
+        # Executing b changes nothing that matters, so it doesn't make new states.
+        graph = self.make_graph([("a", "c", Condition)], "abc", "")
+        space = DCRStateExplorer(graph).explore()
+        self.assertEqual(len(space.States), 2)
+        self.assertTrue(space.is_live())
+
+    def test_max_states(self):
+        space = DCRStateExplorer(DCRChoreography().from_xml("input/House_for_sale.xml"), max_states=3).explore()
+        self.assertFalse(space.Complete)
+        self.assertLess(space.Expanded, len(space.States))
+        self.assertLess(len(space.States), 18)
+        self.assertEqual(space.get_non_live_states(), [])
+
+    def test_choreography(self):
+        space = DCRStateExplorer(DCRChoreography().from_xml("input/House_for_sale.xml")).explore()
+        self.assertTrue(space.Complete)
+        self.assertEqual(space.get_deadlocks(), [])
+        self.assertTrue(space.is_live())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from graph import DCRChoreography
+from tests.benchmark_scaling import generate_choreography
+
+class TestGeneratedChoreography(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def parse(self, xml):
+        xml_path = os.path.join(self.folder, "generated.xml")
+        with open(xml_path, "w") as f:
+            f.write(xml)
+        return DCRChoreography().from_xml(xml_path)
+
+    def test_seeded(self):
+        self.assertEqual(generate_choreography(200, 5, 2.0, 2, seed=1), generate_choreography(200, 5, 2.0, 2, seed=1))
+        self.assertNotEqual(generate_choreography(200, 5, 2.0, 2, seed=1), generate_choreography(200, 5, 2.0, 2, seed=2))
+
+    def test_projectable(self):
+        for n_roles in (2, 3, 12):
+            for depth in (0, 1, 4):
+                choreography = self.parse(generate_choreography(300, n_roles, 3.0, depth, seed=n_roles + depth))
+                self.assertEqual(len(choreography.get_interactions()), 300)
+                self.assertLessEqual(len(choreography.get_roles()), n_roles)
+                self.assertGreater(len(choreography.Connections), 0)
+                self.assertEqual(choreography.get_projectability_violations(), [])
+                for actor in choreography.get_roles():
+                    self.assertTrue(choreography.project_view_for_actor(actor).gen_jolie_files())
+
+    def test_roles_and_nesting(self):
+        choreography = self.parse(generate_choreography(100, 8, 1.0, 3, users=0.5))
+        self.assertTrue(choreography.get_users())
+        self.assertTrue(choreography.get_services())
+        self.assertTrue(any(n.isNest and n.ActivityId.startswith("Nest2_") for n in choreography.Nodes))
+
+if __name__ == '__main__':
+    unittest.main()
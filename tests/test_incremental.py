@@ -0,0 +1,94 @@
+import unittest
+
+from graph import DCRChoreography
+from change import DCRChoreographyChange
+from activity import DCRInteractionActivity
+from conn import DCRConnection, Condition, Response
+
+def describe(projection):
+    """
+    Describe a projection by ids, so that projections with different node objects can be compared.
+    """
+    nodes = {(n.ActivityId, n.Parent.ActivityId if n.Parent else None, getattr(n, 'is_output', None),
+              frozenset(getattr(n, 'receivers', None) or [])) for n in projection.Nodes}
+    connections = {(type(c), c.StartNode.ActivityId, c.EndNode.ActivityId) for c in projection.Connections}
+    marking = tuple(frozenset(n.ActivityId for n in m) for m in [projection.InitialIncluded, projection.InitialPending, projection.InitialExecuted])
+    return nodes, connections, marking
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.choreography = DCRChoreography().from_xml("input/Buyer_Seller_Shipper.xml")
+        self.projections = {a: self.choreography.project_for_actor(a) for a in self.choreography.get_roles()}
+
+    def assert_reprojected(self, change):
+        projections = self.choreography.reproject(self.projections, change)
+        fresh = DCRChoreography().from_xml("input/Buyer_Seller_Shipper.xml")
+        fresh.apply_change(self.copy_change(change, fresh))
+        for a in fresh.get_roles():
+            self.assertEqual(describe(projections[a]), describe(fresh.project_for_actor(a)))
+        return projections
+
+    def copy_change(self, change, choreography):
+        """ Make the same change for another instance of the choreography. """
+        get = lambda n: choreography.get_event(n.ActivityId) or n
+        return DCRChoreographyChange(
+            added_events = change.AddedEvents,
+            removed_events = [get(e) for e in change.RemovedEvents],
+            added_connections = [DCRConnection.create_connection(get(c.StartNode), get(c.EndNode), type(c)) for c in change.AddedConnections],
+            removed_connections = [c2 for c in change.RemovedConnections for c2 in choreography.Connections
+                                   if (type(c2), c2.StartNode.ActivityId, c2.EndNode.ActivityId) == (type(c), c.StartNode.ActivityId, c.EndNode.ActivityId)],
+            marking = {get(e): m for e, m in change.Marking.items()},
+            users = change.Users, services = change.Services)
+
+    def test_unaffected_projections_are_reused(self):
+        ask = self.choreography.get_event_by_name("Ask")
+        reject = self.choreography.get_event_by_name("Reject")
+        change = DCRChoreographyChange(marking = {reject: (True, True, False)})
+
+        affected = self.choreography.get_participants(self.choreography.get_sub_nodes(reject))
+        projections = self.assert_reprojected(change)
+
+        for a, p in projections.items():
+            if a in affected:
+                self.assertIsNot(p, self.projections[a])
+            else:
+                self.assertIs(p, self.projections[a])
+        self.assertNotEqual(affected, self.choreography.get_roles())
+        self.assertNotIn(ask, self.choreography.InitialPending)
+
+    def test_add_connection(self):
+        ask = self.choreography.get_event_by_name("Ask")
+        reject = self.choreography.get_event_by_name("Reject")
+        self.assert_reprojected(DCRChoreographyChange(added_connections = [DCRConnection.create_connection(ask, reject, Response)]))
+
+    def test_remove_connection(self):
+        connection = next(iter(self.choreography.get_connections_to(self.choreography.Nodes, [Condition])))
+        self.assert_reprojected(DCRChoreographyChange(removed_connections = [connection]))
+
+    def test_add_and_remove_event(self):
+        ask = self.choreography.get_event_by_name("Ask")
+        e = DCRInteractionActivity("New", "Cancel")
+        e.set_initiator_and_receivers(ask.initiator, set(ask.receivers))
+        e.set_roles(ask.Roles.copy())
+        e.set_datatype("void")
+        self.projections = self.assert_reprojected(DCRChoreographyChange(
+            added_events = [e], added_connections = [DCRConnection.create_connection(ask, e, Condition)]))
+        self.assertIn("New", {n.ActivityId for n in self.projections[ask.initiator].Nodes})
+
+        self.assert_reprojected(DCRChoreographyChange(removed_events = [self.choreography.get_event("New")]))
+        self.assertIsNone(self.choreography.get_event("New"))
+
+    def test_reclassify_role(self):
+        service = lambda a: self.projections[a].gen_jolie_files()["output/" + a + "Service.ol"]
+        self.assertIn("execution: {single}", service("Buyer"))
+        self.assertIn("execution: {sequential}", service("Shipper"))
+
+        self.projections = self.assert_reprojected(DCRChoreographyChange(services = ["Buyer"], users = ["Shipper"]))
+        self.assertNotIn("Buyer", self.choreography.get_users())
+        self.assertNotIn("Shipper", self.choreography.get_services())
+        self.assertIn("execution: {sequential}", service("Buyer"))
+        self.assertIn("execution: {single}", service("Shipper"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from graph import DCRGraph, DCRChoreography
+from activity import DCRActivity, DCRActivityNest
+from conn import DCRConnection, Condition, Response
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = DCRGraph().from_xml("input/data_test.xml")
+
+    def test_get_event(self):
+        for node in self.graph.Nodes:
+            self.assertIs(self.graph.get_event(node.ActivityId), node)
+        self.assertIsNone(self.graph.get_event("no such event"))
+
+    def test_connections_match_scan(self):
+        for node in self.graph.Nodes:
+            nodes = node.get_ancestors().union({node})
+            self.assertEqual(self.graph.get_in_connections(node), {c for c in self.graph.Connections if c.EndNode in nodes})
+            self.assertEqual(self.graph.get_out_connections(node), {c for c in self.graph.Connections if c.StartNode in nodes})
+            self.assertEqual(self.graph.get_out_connections(node, False, [Condition]),
+                             {c for c in self.graph.Connections if c.StartNode == node and type(c) == Condition})
+
+    def test_collapse_rewires_index(self):
+        a = DCRActivity("a", "A")
+        b = DCRActivity("b", "B")
+        nest = DCRActivityNest("n", "N", {b})
+        to_nest = DCRConnection.create_connection(a, nest, Response)
+        from_nest = DCRConnection.create_connection(nest, a, Condition)
+        graph = DCRGraph.from_data(dict(), {a, b, nest}, {to_nest, from_nest}, set(), set(), set())
+
+        self.assertEqual(graph.get_in_connections(nest), {to_nest})
+        graph.collapse()
+
+        self.assertIsNone(graph.get_event("n"))
+        self.assertEqual(graph.get_in_connections(b), {to_nest})
+        self.assertEqual(graph.get_out_connections(b), {from_nest})
+        self.assertEqual(graph.get_in_connections(nest, False), set())
+
+    def test_role_index(self):
+        choreography = DCRChoreography().from_xml("input/Buyer_Seller_Shipper.xml")
+        for actor in choreography.get_roles():
+            self.assertEqual(choreography.get_initiated_by(actor), {e for e in choreography.get_interactions() if e.initiator == actor})
+            self.assertEqual(choreography.get_received_by(actor), {e for e in choreography.get_interactions() if actor in e.receivers})
+
+    def test_choreography_projection(self):
+        choreography = DCRChoreography().from_xml("input/House_for_sale.xml")
+        for actor in choreography.get_roles():
+            projection = choreography.project_for_actor(actor)
+            for node in projection.Nodes:
+                self.assertIs(projection.get_event(node.ActivityId), node)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import os
+import re
+import tempfile
+import unittest
+
+from graph import DCRChoreography
+
+GOLDEN_FOLDER = "tests/Buyer_Seller_Shipper"
+
+def interfaces_of(text):
+    """
+    The interfaces of an .iol file, as interface name -> set of operations.
+    The golden files were written before interfaces and operations were sorted, so the order is not compared.
+    """
+    return {name: {o.strip() for o in body.split(",")}
+            for name, body in re.findall(r"interface (\w+)\{\s*oneWay:\s*(.*?)\s*\}", text, re.S)}
+
+def service_of(text):
+    """
+    The structure of an .ol file: its interface include, the service name, and its ports with their interfaces.
+    Locations, the execution modality, and the main block were filled in by hand in the golden files.
+    """
+    return (re.findall(r'include "(\w+Interfaces)\.iol"', text), re.findall(r"service (\w+)\s*\{", text),
+            sorted(re.findall(r"(input|output)Port (\w+) \{.*?interfaces: (\w+)", text, re.S)))
+
+class TestJolieGolden(unittest.TestCase):
+
+    def setUp(self):
+        self.choreography = DCRChoreography().from_xml("input/Buyer_Seller_Shipper.xml")
+
+    def test_golden(self):
+        for actor in sorted(self.choreography.get_roles()):
+            files = self.choreography.project_for_actor(actor).gen_jolie_files()
+            with open(os.path.join(GOLDEN_FOLDER, actor + "Interfaces.iol")) as f:
+                self.assertEqual(interfaces_of(files["output/" + actor + "Interfaces.iol"]), interfaces_of(f.read()))
+            with open(os.path.join(GOLDEN_FOLDER, actor + "Service.ol")) as f:
+                self.assertEqual(service_of(files["output/" + actor + "Service.ol"]), service_of(f.read()))
+
+    def test_golden_interfaces_verbatim(self):
+        # The only golden file that was not reordered or edited by hand.
+        files = self.choreography.project_for_actor("Shipper").gen_jolie_files()
+        with open(os.path.join(GOLDEN_FOLDER, "ShipperInterfaces.iol")) as f:
+            self.assertEqual(files["output/ShipperInterfaces.iol"], f.read())
+
+    def test_emit_to_file(self):
+        projection = self.choreography.project_for_actor("Buyer")
+        files = projection.gen_jolie_files()
+        with tempfile.TemporaryDirectory() as folder:
+            interface_path = os.path.join(folder, "BuyerInterfaces.iol")
+            service_path = os.path.join(folder, "BuyerService.ol")
+            with open(interface_path, "w") as interface_out, open(service_path, "w") as service_out:
+                projection.emit_jolie(interface_out, service_out)
+            with open(interface_path) as f:
+                self.assertEqual(f.read(), files["output/BuyerInterfaces.iol"])
+            with open(service_path) as f:
+                self.assertEqual(f.read(), files["output/BuyerService.ol"])
+
+    def test_emit_interfaces(self):
+        projection = self.choreography.project_for_actor("Buyer")
+        operations = {"Seller1": projection.get_interactions()}
+        out = io.StringIO()
+        projection.emit_interfaces(out, operations, True)
+        self.assertEqual(out.getvalue(), projection.gen_interfaces(operations, True))
+        self.assertEqual(projection.gen_interfaces({}, True), "")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from graph import DCRChoreography
+from jolie_templates import JolieTemplate, get_backend, DEFAULT_BACKEND
+
+class TestJolieTemplate(unittest.TestCase):
+
+    def test_render(self):
+        template = JolieTemplate("service ${name}Service{\n\texecution: {${execution}}\n\tprotocol: http { format = \"json\"}\n}")
+        self.assertEqual(template.Fields, ("name", "execution"))
+        self.assertEqual(template.render(name="A", execution="single"),
+                         "service AService{\n\texecution: {single}\n\tprotocol: http { format = \"json\"}\n}")
+
+    def test_repeated_field(self):
+        template = JolieTemplate("${a}'${b}'${a}\\")
+        self.assertEqual(template.Fields, ("a", "b"))
+        self.assertEqual(template.render(a="x", b="y"), "x'y'x\\")
+
+    def test_missing_field(self):
+        with self.assertRaises(TypeError):
+            JolieTemplate("${a}${b}").render(a="x")
+
+class TestJolieBackends(unittest.TestCase):
+
+    def setUp(self):
+        choreography = DCRChoreography().from_xml("input/Buyer_Seller_Shipper.xml")
+        self.projection = choreography.project_for_actor("Shipper")
+
+    def test_default(self):
+        self.assertIs(get_backend(), DEFAULT_BACKEND)
+        self.assertEqual(self.projection.gen_jolie_files(get_backend("http")), self.projection.gen_jolie_files())
+
+    def test_backends(self):
+        files = self.projection.gen_jolie_files(get_backend("sodep-concurrent"))
+        service = files["output/ShipperService.ol"]
+        self.assertIn("\t\tprotocol: sodep\n", service)
+        self.assertIn("execution: {concurrent}", service)
+        self.assertNotIn("http", service)
+        # Only the service depends on the backend.
+        self.assertEqual(files["output/ShipperInterfaces.iol"], self.projection.gen_jolie_files()["output/ShipperInterfaces.iol"])
+
+        self.assertIn("execution: {sequential}", self.projection.gen_jolie_files(get_backend("sodep"))["output/ShipperService.ol"])
+
+    def test_structure_hash(self):
+        hashes = {self.projection.get_structure_hash(get_backend(name)) for name in ["http", "sodep", "http-concurrent"]}
+        self.assertEqual(len(hashes), 3)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            get_backend("soap")
+
+if __name__ == '__main__':
+    unittest.main()
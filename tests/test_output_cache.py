@@ -0,0 +1,74 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from graph import DCRChoreography, DCRProjection
+from output_cache import JolieOutputCache
+
+class TestOutputCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.fname = os.path.join(self.folder, "AService.ol")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_write_file(self):
+        self.assertEqual(DCRProjection.write_file(self.fname, "a"), "created")
+        self.assertEqual(DCRProjection.write_file(self.fname, "a"), "skipped")
+        self.assertEqual(DCRProjection.write_file(self.fname, "b"), "rewritten")
+        with open(self.fname) as f:
+            self.assertEqual(f.read(), "b")
+        self.assertEqual(os.listdir(self.folder), ["AService.ol"])
+
+    def test_fresh_hash(self):
+        cache_path = os.path.join(self.folder, "cache.json")
+        DCRProjection.write_file(self.fname, "a")
+        cache = JolieOutputCache(cache_path)
+        self.assertIsNone(cache.get_fresh_hash("A"))
+
+        cache.update("A", "hash", [self.fname])
+        cache.save()
+        cache = JolieOutputCache.load(cache_path)
+        self.assertEqual(cache.get_fresh_hash("A"), "hash")
+        self.assertEqual(cache.get_files("A"), [self.fname])
+
+        # Changed or removed files must be generated again.
+        with open(self.fname, "a") as f:
+            f.write("changed")
+        self.assertIsNone(cache.get_fresh_hash("A"))
+        os.remove(self.fname)
+        self.assertIsNone(cache.get_fresh_hash("A"))
+
+    def test_structure_hash(self):
+        hashes = {a: p.get_structure_hash() for a, p in self.project("input/House_for_sale.xml").items()}
+        self.assertEqual({a: p.get_structure_hash() for a, p in self.project("input/House_for_sale.xml").items()}, hashes)
+
+        projections = self.project("input/House_for_sale.xml")
+        e = next(iter(projections["Buyer"].get_interactions()))
+        e.set_datatype("narwhal")
+        self.assertNotEqual(projections["Buyer"].get_structure_hash(), hashes["Buyer"])
+
+    def test_removed_actors(self):
+        # House_for_sale has Bank, Buyer and Seller, Buyer_Seller_Shipper has Buyer, but neither Bank nor Seller,
+        # so their files are removed when it is generated to the same folder.
+        os.makedirs(os.path.join(self.folder, "output"))
+        for xml in ["House_for_sale.xml", "Buyer_Seller_Shipper.xml"]:
+            subprocess.run([sys.executable, os.path.abspath("core/epp_dcr.py"), "--xml", os.path.abspath(os.path.join("input", xml)),
+                            "--no-snapshot"], cwd=self.folder, check=True, stdout=subprocess.DEVNULL)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.folder, "output"))),
+                         sorted([".jolie_cache.json"] + [a + f for a in ["Buyer", "Seller1", "Seller2", "Shipper"]
+                                                         for f in ["Interfaces.iol", "Service.ol"]]))
+        cache = JolieOutputCache.load(os.path.join(self.folder, "output", ".jolie_cache.json"))
+        self.assertEqual(sorted(cache.Entries), ["Buyer", "Seller1", "Seller2", "Shipper"])
+
+    def project(self, xml_path):
+        choreography = DCRChoreography().from_xml(xml_path)
+        return {a: choreography.project_for_actor(a) for a in choreography.get_roles()}
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,31 @@
 from builtins import set
+import os
+import tempfile
 import unittest
+import xml.etree.ElementTree as Etree
 
 from graph import DCRChoreography, DCRProjection, DCRGraph
+from conn import Condition, Response
+
+# Constraints, labels and marking come before the events they refer to.
+FORWARD_REFERENCES_XML = """<dcrgraph>
+    <runtime><marking><executed/><included><event id="a"/><event id="n"/></included><pendingResponses><event id="b"/></pendingResponses></marking></runtime>
+    <specification>
+        <constraints>
+            <conditions><condition sourceId="a" targetId="n"/></conditions>
+            <responses><response sourceId="b" targetId="a"/></responses>
+        </constraints>
+        <resources>
+            <labelMappings><labelMapping eventId="a" labelId="Ask"/><labelMapping eventId="b" labelId="Answer"/><labelMapping eventId="n" labelId="Nest"/></labelMappings>
+            <events>
+                <event id="a"><custom><roles><role>S:U:Buyer</role><role>R:Seller</role></roles><eventData><dataType>text</dataType></eventData></custom></event>
+                <event id="n" type="nesting"><custom><roles><role/></roles><eventData/></custom>
+                    <event id="b"><custom><roles><role>S:Seller</role><role>R:U:Buyer</role></roles><eventData><dataType>int</dataType></eventData></custom></event>
+                </event>
+            </events>
+        </resources>
+    </specification>
+</dcrgraph>"""
 
 class TestParser(unittest.TestCase):
 
@@ -25,6 +49,35 @@ class TestParser(unittest.TestCase):
         # graph, DCRChoreography)
         #print (graph)
 
+    def test_parse_matches_document(self):
+        root = Etree.parse("input/data_test.xml").getroot()
+        self.assertEqual(self.graph.Mappings, {m.get('eventId'): m.get('labelId') for m in root.iter('labelMapping')})
+        self.assertEqual({n.ActivityId for n in self.graph.Nodes}, {e.get('id') for events in root.iter('events') for e in events.iter('event')})
+        self.assertEqual(len(self.graph.Connections), len([c for cs in root.iter('constraints') for t in cs for c in t]))
+        self.assertEqual({n.ActivityId for n in self.graph.InitialIncluded}, {e.get('id') for i in root.iter('included') for e in i})
+
+    def test_parse_forward_references(self):
+        fd, path = tempfile.mkstemp(suffix=".xml")
+        with os.fdopen(fd, "w") as f:
+            f.write(FORWARD_REFERENCES_XML)
+        try:
+            choreography = DCRChoreography().from_xml(path)
+        finally:
+            os.remove(path)
+
+        a = choreography.get_event("a")
+        b = choreography.get_event("b")
+        n = choreography.get_event("n")
+        self.assertEqual((a.ActivityName, a.datatype, a.initiator, a.receivers), ("Ask", "text", "Buyer", {"Seller"}))
+        self.assertEqual((b.ActivityName, b.datatype, b.initiator, b.receivers), ("Answer", "int", "Seller", {"Buyer"}))
+        self.assertEqual(n.Activities, {b})
+        self.assertIs(b.Parent, n)
+        self.assertEqual({(type(c), c.StartNode, c.EndNode) for c in choreography.Connections}, {(Condition, a, n), (Response, b, a)})
+        self.assertEqual(choreography.InitialIncluded, {a, n})
+        self.assertEqual(choreography.InitialPending, {b})
+        self.assertEqual(choreography.get_users(), {"Buyer"})
+        self.assertEqual(choreography.get_services(), {"Seller"})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,47 @@
+import time
+import unittest
+
+from graph import DCRChoreography
+from activity import DCRInteractionActivity
+from conn import DCRConnection, Condition, Response, Exclude
+
+def make_chain_choreography(n_events, n_roles):
+    """
+    Make a projectable choreography with a chain of n_events interactions between n_roles services.
+    Event i is sent from role i to role i+1, and has a condition and a response to event i+1.
+    """
+    roles = ["Role"+str(r) for r in range(n_roles)]
+    events = []
+    for i in range(n_events):
+        e = DCRInteractionActivity("Activity"+str(i), "Action "+str(i))
+        e.set_initiator_and_receivers(roles[i % n_roles], {roles[(i+1) % n_roles]})
+        e.set_roles({roles[i % n_roles], roles[(i+1) % n_roles]})
+        e.set_datatype("int")
+        events.append(e)
+
+    connections = set()
+    for i in range(n_events-1):
+        connections.add(DCRConnection.create_connection(events[i], events[i+1], Condition))
+        connections.add(DCRConnection.create_connection(events[i], events[i+1], Response))
+        connections.add(DCRConnection.create_connection(events[i], events[i], Exclude))
+
+    mapping = {e.ActivityId: e.ActivityName for e in events}
+    return DCRChoreography.from_data(mapping, set(events), connections, set(events), {events[0]}, set(), set(), set(roles))
+
+class TestPerformance(unittest.TestCase):
+
+    def test_project_10k_events(self):
+        choreography = make_chain_choreography(10000, 10)
+
+        start = time.perf_counter()
+        projections = choreography.project()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(projections), 10)
+        for p in projections:
+            # Every role initiates 1000 events and receives 1000 events.
+            self.assertEqual(len(p.Nodes), 2000)
+        self.assertLess(elapsed, 5.0)
+
+if __name__ == '__main__':
+    unittest.main()
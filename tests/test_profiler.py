@@ -0,0 +1,74 @@
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from graph import DCRGraph, DCRChoreography
+from profiler import DCRProfiler, NULL_PROFILER, TIMED_METHODS, COUNTED_METHODS
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def run_pipeline(self, profiler):
+        choreography = DCRChoreography().from_xml("input/House_for_sale.xml")
+        for a in sorted(choreography.get_roles()):
+            with profiler.actor(a):
+                choreography.project_for_actor(a).gen_jolie_files()
+        choreography.get_in_connections(choreography.get_event("Activity3"))
+        return choreography
+
+    def test_report(self):
+        profiler = DCRProfiler()
+        profiler.start()
+        self.run_pipeline(profiler)
+        profiler.stop()
+        report = profiler.report()
+        self.assertEqual(report['phases']['parse']['calls'], 1)
+        for phase in ["is_projectable", "project", "materialize", "collapse", "generate"]:
+            self.assertIn(phase, report['phases'])
+        self.assertEqual(sorted(report['actors']), ["Bank", "Buyer", "Seller"])
+        self.assertGreater(report['actors']["Bank"]["total"], 0)
+        self.assertGreater(report["actors"]["Bank"]["project"], 0)
+        # The graph is looked up while it is parsed, and the pipeline looks up connections.
+        self.assertGreater(report['calls']['get_event'], 0)
+        self.assertGreater(report['calls']['get_in_connections'], 0)
+        self.assertGreaterEqual(report['seconds'], report['phases']['parse']['seconds'])
+
+    def test_restored(self):
+        originals = {(cls, name): cls.__dict__[name] for cls, name, _ in TIMED_METHODS}
+        originals.update({(cls, name): cls.__dict__[name] for cls, name in COUNTED_METHODS})
+        profiler = DCRProfiler()
+        profiler.start()
+        self.assertIsNot(DCRGraph.__dict__['get_event'], originals[(DCRGraph, 'get_event')])
+        profiler.stop()
+        for (cls, name), original in originals.items():
+            self.assertIs(cls.__dict__[name], original)
+
+        # Nothing is counted when the profiler is not running.
+        self.run_pipeline(NULL_PROFILER)
+        self.assertEqual(sum(profiler.Calls.values()), sum(profiler.report()['calls'].values()))
+        calls = dict(profiler.Calls)
+        self.run_pipeline(NULL_PROFILER)
+        self.assertEqual(dict(profiler.Calls), calls)
+
+    def test_cprofile(self):
+        profiler = DCRProfiler(use_cprofile=True)
+        profiler.start()
+        self.run_pipeline(profiler)
+        profiler.stop()
+        path = os.path.join(self.folder, "run.prof")
+        profiler.dump_cprofile(path)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+        report_path = os.path.join(self.folder, "report.json")
+        profiler.write_report(report_path)
+        self.assertTrue(os.path.getsize(report_path) > 0)
+
+if __name__ == '__main__':
+    unittest.main()
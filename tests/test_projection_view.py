@@ -0,0 +1,64 @@
+import glob
+import unittest
+
+from graph import DCRChoreography
+from activity import DCRInteractionActivity
+
+class TestProjectionView(unittest.TestCase):
+
+    def setUp(self):
+        self.choreography = DCRChoreography().from_xml("input/Buyer_Seller_Shipper.xml")
+
+    def test_same_as_projection(self):
+        for path in sorted(glob.glob("input/*.xml")):
+            try:
+                choreography = DCRChoreography().from_xml(path)
+            except ValueError:
+                continue
+            if not choreography.is_projectable():
+                continue
+            for actor in sorted(choreography.get_roles()):
+                view = choreography.project_view_for_actor(actor)
+                projection = choreography.project_for_actor(actor)
+                self.assertEqual(view.get_structure_hash(), projection.get_structure_hash(), path + " " + actor)
+                self.assertEqual(view.gen_jolie_files(), projection.gen_jolie_files(), path + " " + actor)
+                self.assertEqual(view.get_roles(), projection.get_roles())
+
+    def test_shares_structure(self):
+        views = [self.choreography.project_view_for_actor(a) for a in sorted(self.choreography.get_roles())]
+        for view in views:
+            self.assertIs(view.Table, views[0].Table)
+            for e in view.get_events():
+                self.assertIn(e, self.choreography.Nodes)
+            for c in view.get_connections():
+                self.assertIn(c, self.choreography.Connections)
+
+    def test_overlay(self):
+        view = self.choreography.project_view_for_actor("Shipper")
+        for e in view.get_interactions():
+            if view.is_output(e):
+                self.assertEqual(view.get_receivers(e), e.receivers)
+            else:
+                self.assertEqual(view.get_receivers(e), {"Shipper"})
+
+        projection = view.materialize()
+        by_id = lambda events: sorted(e.ActivityId for e in events)
+        self.assertEqual(by_id(view.get_events(view.Included)), by_id(projection.InitialIncluded))
+        self.assertEqual(by_id(view.get_events(view.Pending)), by_id(projection.InitialPending))
+        self.assertEqual(by_id(view.get_events(view.Executed)), by_id(projection.InitialExecuted))
+
+    def test_stale(self):
+        view = self.choreography.project_view_for_actor("Buyer")
+        self.choreography.add_node(DCRInteractionActivity("new", "New", "Buyer", {"Seller1"}))
+        with self.assertRaises(ValueError):
+            view.get_events()
+        self.assertIsNot(self.choreography.project_view_for_actor("Buyer").Table, view.Table)
+
+    def test_not_projectable(self):
+        choreography = DCRChoreography().from_xml("input/_House_for_sale_not_projectable.xml")
+        with self.assertRaises(AssertionError):
+            for a in choreography.get_roles():
+                choreography.project_view_for_actor(a)
+
+if __name__ == '__main__':
+    unittest.main()
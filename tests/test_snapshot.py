@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from graph import DCRChoreography, DCRGraph
+from conn import DCRConnection
+
+def describe(graph):
+    """
+    Describe a graph by ids, so that two graphs with different node objects can be compared.
+    """
+    nodes = {(n.ActivityId, n.ActivityName, n.Parent.ActivityId if n.Parent else None, frozenset(n.Roles),
+              getattr(n, 'datatype', None), getattr(n, 'initiator', None), frozenset(getattr(n, 'receivers', None) or []))
+             for n in graph.Nodes}
+    connections = {(DCRConnection.get_connection_string(type(c)), c.StartNode.ActivityId, c.EndNode.ActivityId) for c in graph.Connections}
+    marking = tuple(frozenset(n.ActivityId for n in m) for m in [graph.InitialIncluded, graph.InitialPending, graph.InitialExecuted])
+    return nodes, connections, marking, graph.Mappings
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_round_trip_choreography(self):
+        for xml_path in ["input/House_for_sale.xml", "input/Buyer_Seller_Shipper.xml", "input/shared_interface.xml"]:
+            choreography = DCRChoreography().from_xml(xml_path)
+            snapshot_path = os.path.join(self.folder, "graph.dcrs")
+            choreography.save_snapshot(snapshot_path)
+            loaded = DCRChoreography.from_snapshot(snapshot_path)
+
+            self.assertEqual(describe(loaded), describe(choreography))
+            self.assertEqual(loaded.get_users(), choreography.get_users())
+            self.assertEqual(loaded.get_services(), choreography.get_services())
+            for actor in choreography.get_roles():
+                self.assertEqual(describe(loaded.project_for_actor(actor)), describe(choreography.project_for_actor(actor)))
+
+    def test_round_trip_graph(self):
+        graph = DCRGraph().from_xml("input/data_test.xml")
+        snapshot_path = os.path.join(self.folder, "graph.dcrs")
+        graph.save_snapshot(snapshot_path)
+        self.assertEqual(describe(DCRGraph.from_snapshot(snapshot_path)), describe(graph))
+
+    def test_snapshot_is_deterministic(self):
+        a = os.path.join(self.folder, "a.dcrs")
+        b = os.path.join(self.folder, "b.dcrs")
+        DCRChoreography().from_xml("input/House_for_sale.xml").save_snapshot(a)
+        DCRChoreography().from_xml("input/House_for_sale.xml").save_snapshot(b)
+        with open(a, "rb") as fa, open(b, "rb") as fb:
+            self.assertEqual(fa.read(), fb.read())
+
+    def test_bad_snapshot(self):
+        snapshot_path = os.path.join(self.folder, "graph.dcrs")
+        with open(snapshot_path, "wb") as f:
+            f.write(b"DCRS\x63\x00\x04\x00garbage")
+        with self.assertRaises(ValueError):
+            DCRChoreography.from_snapshot(snapshot_path)
+
+    def test_from_xml_or_snapshot(self):
+        xml_path = os.path.join(self.folder, "graph.xml")
+        snapshot_path = os.path.join(self.folder, "graph.dcrs")
+        shutil.copy("input/House_for_sale.xml", xml_path)
+
+        parsed = DCRChoreography.from_xml_or_snapshot(xml_path, snapshot_path)
+        self.assertTrue(os.path.exists(snapshot_path))
+        loaded = DCRChoreography.from_xml_or_snapshot(xml_path, snapshot_path)
+        self.assertEqual(describe(loaded), describe(parsed))
+
+        # A stale snapshot is replaced.
+        os.utime(snapshot_path, (0, 0))
+        DCRChoreography.from_xml_or_snapshot(xml_path, snapshot_path)
+        self.assertGreaterEqual(os.path.getmtime(snapshot_path), os.path.getmtime(xml_path))
+
+if __name__ == '__main__':
+    unittest.main()
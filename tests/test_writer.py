@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from writer import JolieFileWriter
+
+class TestJolieFileWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def test_flush(self):
+        writer = JolieFileWriter(threads=4)
+        files = {self.path("A%d.ol" % i): "service A%d" % i for i in range(20)}
+        writer.add_files(files)
+        written, error = writer.flush()
+        self.assertIsNone(error)
+        self.assertEqual(list(written), list(files))
+        self.assertEqual(set(written.values()), {"created"})
+        for fname, fcontents in files.items():
+            with open(fname) as f:
+                self.assertEqual(f.read(), fcontents)
+
+        # Flushing empties the writer.
+        self.assertEqual(writer.flush(), ({}, None))
+
+        writer.add(self.path("A0.ol"), "service A0")
+        writer.add(self.path("A1.ol"), "changed")
+        written, error = writer.flush()
+        self.assertEqual(written, {self.path("A0.ol"): "skipped", self.path("A1.ol"): "rewritten"})
+        self.assertEqual(sorted(os.listdir(self.folder)), sorted(os.path.basename(f) for f in files))
+
+    def test_first_error(self):
+        writer = JolieFileWriter(threads=4)
+        writer.add(self.path("A.ol"), "a")
+        writer.add(self.path("missing1/B.ol"), "b")
+        writer.add(self.path("missing2/C.ol"), "c")
+        writer.add(self.path("D.ol"), "d")
+        written, error = writer.flush()
+        # The other files are still written, and the error is the first in the order the files were added.
+        self.assertEqual(list(written), [self.path("A.ol"), self.path("D.ol")])
+        self.assertIsInstance(error, OSError)
+        self.assertIn("missing1", error.filename)
+        self.assertEqual(sorted(os.listdir(self.folder)), ["A.ol", "D.ol"])
+
+if __name__ == '__main__':
+    unittest.main()